@@ -0,0 +1,33 @@
+"""Make certificate status index partial and drop redundant verification index
+
+Revision ID: 007_certificate_partial_indexes
+Revises: 006_add_school_education_support
+Create Date: 2024-08-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_certificate_partial_indexes'
+down_revision = '006_add_school_education_support'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # verification_code is already uniquely indexed on its own
+    op.drop_index('idx_certificate_verification', table_name='certificates')
+    
+    # Only generated/issued certificates are looked up by status and date
+    op.drop_index('idx_certificate_status_date', table_name='certificates')
+    op.create_index(
+        'idx_certificate_status_date', 'certificates', ['status', 'issued_at'], unique=False,
+        postgresql_where=sa.text("status IN ('generated', 'issued')")
+    )
+
+
+def downgrade():
+    op.drop_index('idx_certificate_status_date', table_name='certificates')
+    op.create_index('idx_certificate_status_date', 'certificates', ['status', 'issued_at'], unique=False)
+    op.create_index('idx_certificate_verification', 'certificates', ['verification_code', 'status'], unique=False)
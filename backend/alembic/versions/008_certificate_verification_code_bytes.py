@@ -0,0 +1,37 @@
+"""Store certificate verification codes as raw bytes
+
+Revision ID: 008_certificate_verification_code_bytes
+Revises: 007_certificate_partial_indexes
+Create Date: 2024-08-05 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_certificate_verification_code_bytes'
+down_revision = '007_certificate_partial_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Codes are unpadded base64url; decode them to their 32 raw bytes
+    op.alter_column(
+        'certificates', 'verification_code',
+        type_=sa.LargeBinary(length=32),
+        existing_nullable=False,
+        postgresql_using=(
+            "decode(rpad(translate(verification_code, '-_', '+/'), "
+            "((length(verification_code) + 3) / 4) * 4, '='), 'base64')"
+        )
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'certificates', 'verification_code',
+        type_=sa.String(length=100),
+        existing_nullable=False,
+        postgresql_using="rtrim(translate(encode(verification_code, 'base64'), '+/', '-_'), '=')"
+    )
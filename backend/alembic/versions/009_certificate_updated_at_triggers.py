@@ -0,0 +1,43 @@
+"""Maintain certificate updated_at timestamps with a database trigger
+
+Revision ID: 009_certificate_updated_at_triggers
+Revises: 008_certificate_verification_code_bytes
+Create Date: 2024-08-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_certificate_updated_at_triggers'
+down_revision = '008_certificate_verification_code_bytes'
+branch_labels = None
+depends_on = None
+
+TIMESTAMPED_TABLES = ('certificate_templates', 'certificates')
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    
+    for table in TIMESTAMPED_TABLES:
+        op.alter_column(table, 'updated_at', server_default=sa.text('now()'))
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_updated_at BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+        )
+
+
+def downgrade():
+    for table in TIMESTAMPED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+        op.alter_column(table, 'updated_at', server_default=None)
+    
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
@@ -0,0 +1,59 @@
+"""Add composite and partial indexes for independent learner queries
+
+Revision ID: 010_independent_learner_indexes
+Revises: 009_certificate_updated_at_triggers
+Create Date: 2024-08-06 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_independent_learner_indexes'
+down_revision = '009_certificate_updated_at_triggers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_independent_learner_category_active', 'independent_learners', ['category'], unique=False,
+        postgresql_where=sa.text("is_active")
+    )
+    op.create_index(
+        'idx_independent_learner_subscription_end', 'independent_learners',
+        ['subscription_type', 'subscription_end_date'], unique=False
+    )
+    
+    op.create_index(
+        'idx_independent_registration_learner_exam_date', 'independent_exam_registrations',
+        ['learner_id', 'exam_date'], unique=False
+    )
+    op.create_index(
+        'idx_independent_registration_upcoming', 'independent_exam_registrations', ['exam_date'], unique=False,
+        postgresql_where=sa.text("status = 'registered'")
+    )
+    
+    op.create_index(
+        'idx_independent_payment_pending', 'independent_payments', ['initiated_at'], unique=False,
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    op.create_index(
+        'idx_independent_payment_created_brin', 'independent_payments', ['created_at'], unique=False,
+        postgresql_using='brin'
+    )
+    
+    op.create_index(
+        'idx_discount_coupon_active_window', 'discount_coupons',
+        ['is_active', 'valid_from', 'valid_until'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('idx_discount_coupon_active_window', table_name='discount_coupons')
+    op.drop_index('idx_independent_payment_created_brin', table_name='independent_payments')
+    op.drop_index('idx_independent_payment_pending', table_name='independent_payments')
+    op.drop_index('idx_independent_registration_upcoming', table_name='independent_exam_registrations')
+    op.drop_index('idx_independent_registration_learner_exam_date', table_name='independent_exam_registrations')
+    op.drop_index('idx_independent_learner_subscription_end', table_name='independent_learners')
+    op.drop_index('idx_independent_learner_category_active', table_name='independent_learners')
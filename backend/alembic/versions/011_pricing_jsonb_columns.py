@@ -0,0 +1,66 @@
+"""Store pricing and proctoring JSON columns as JSONB with GIN indexes
+
+Revision ID: 011_pricing_jsonb_columns
+Revises: 010_independent_learner_indexes
+Create Date: 2024-08-06 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '011_pricing_jsonb_columns'
+down_revision = '010_independent_learner_indexes'
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = {
+    'global_pricing_config': (
+        'supported_currencies', 'currency_conversion_rates', 'country_pricing_multipliers',
+        'state_pricing_multipliers', 'city_tier_multipliers', 'bulk_discount_config',
+        'loyalty_discount_config', 'seasonal_discounts', 'promotional_campaigns',
+        'gateway_charges_config', 'tax_config',
+    ),
+    'discount_coupons': ('applicable_programs', 'applicable_categories', 'applicable_countries'),
+    'certification_programs': ('pricing_tiers',),
+    'independent_exam_registrations': ('proctoring_violations',),
+}
+
+GIN_INDEXES = (
+    ('idx_global_pricing_country_multipliers', 'global_pricing_config', 'country_pricing_multipliers'),
+    ('idx_global_pricing_tax_config', 'global_pricing_config', 'tax_config'),
+    ('idx_discount_coupon_programs', 'discount_coupons', 'applicable_programs'),
+    ('idx_discount_coupon_categories', 'discount_coupons', 'applicable_categories'),
+)
+
+
+def upgrade():
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSONB(astext_type=sa.Text()),
+                existing_type=postgresql.JSON(astext_type=sa.Text()),
+                postgresql_using=f'{column}::jsonb'
+            )
+    
+    for name, table, column in GIN_INDEXES:
+        op.create_index(
+            name, table, [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'}
+        )
+
+
+def downgrade():
+    for name, table, _ in reversed(GIN_INDEXES):
+        op.drop_index(name, table_name=table)
+    
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSON(astext_type=sa.Text()),
+                existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                postgresql_using=f'{column}::json'
+            )
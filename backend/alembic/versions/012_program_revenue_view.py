@@ -0,0 +1,35 @@
+"""Precompute per-program daily revenue in a materialized view
+
+Revision ID: 012_program_revenue_view
+Revises: 011_pricing_jsonb_columns
+Create Date: 2024-08-07 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012_program_revenue_view'
+down_revision = '011_pricing_jsonb_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE MATERIALIZED VIEW program_revenue_mv AS
+        SELECT program_id,
+               date_trunc('day', payment_date) AS day,
+               SUM(amount_paid) AS revenue,
+               COUNT(*) AS registrations
+        FROM independent_exam_registrations
+        WHERE payment_status = 'paid' AND payment_date IS NOT NULL
+        GROUP BY 1, 2
+        WITH DATA
+    """)
+    # A unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.create_index('idx_program_revenue_mv_program_day', 'program_revenue_mv', ['program_id', 'day'], unique=True)
+
+
+def downgrade():
+    op.drop_index('idx_program_revenue_mv_program_day', table_name='program_revenue_mv')
+    op.execute("DROP MATERIALIZED VIEW program_revenue_mv")
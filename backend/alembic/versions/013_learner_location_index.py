@@ -0,0 +1,25 @@
+"""Cover learner location columns for revenue report joins
+
+Revision ID: 013_learner_location_index
+Revises: 012_program_revenue_view
+Create Date: 2024-08-07 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '013_learner_location_index'
+down_revision = '012_program_revenue_view'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_independent_learner_location', 'independent_learners', ['id'], unique=False,
+        postgresql_include=['country', 'state', 'city']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_independent_learner_location', table_name='independent_learners')
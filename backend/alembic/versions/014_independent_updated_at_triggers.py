@@ -0,0 +1,47 @@
+"""Maintain independent learner and pricing updated_at timestamps with a database trigger
+
+Revision ID: 014_independent_updated_at_triggers
+Revises: 013_learner_location_index
+Create Date: 2024-08-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_independent_updated_at_triggers'
+down_revision = '013_learner_location_index'
+branch_labels = None
+depends_on = None
+
+TIMESTAMPED_TABLES = (
+    'independent_learners', 'certification_programs', 'independent_exam_registrations',
+    'independent_certificates', 'independent_payments', 'global_pricing_config',
+    'program_pricing_overrides', 'discount_coupons',
+)
+
+# Update-heavy tables keep free space per page so updates can stay HOT
+FILLFACTOR_TABLES = ('independent_learners', 'independent_exam_registrations', 'independent_payments')
+FILLFACTOR = 85
+
+
+def upgrade():
+    # set_updated_at() was created in 009_certificate_updated_at_triggers
+    for table in TIMESTAMPED_TABLES:
+        op.alter_column(table, 'updated_at', server_default=sa.text('now()'))
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_updated_at BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+        )
+    
+    for table in FILLFACTOR_TABLES:
+        op.execute(f"ALTER TABLE {table} SET (fillfactor = {FILLFACTOR})")
+
+
+def downgrade():
+    for table in FILLFACTOR_TABLES:
+        op.execute(f"ALTER TABLE {table} RESET (fillfactor)")
+    
+    for table in TIMESTAMPED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+        op.alter_column(table, 'updated_at', server_default=None)
@@ -0,0 +1,47 @@
+"""Store the remaining independent learner JSON columns as JSONB
+
+Revision ID: 015_independent_jsonb_columns
+Revises: 014_independent_updated_at_triggers
+Create Date: 2024-08-08 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '015_independent_jsonb_columns'
+down_revision = '014_independent_updated_at_triggers'
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = {
+    'independent_learners': ('preferred_subjects', 'preferred_exam_types'),
+    'certification_programs': (
+        'prerequisites', 'target_audience', 'bulk_discount_config',
+        'study_materials', 'downloadable_resources',
+    ),
+    'independent_payments': ('billing_address',),
+}
+
+
+def upgrade():
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSONB(astext_type=sa.Text()),
+                existing_type=postgresql.JSON(astext_type=sa.Text()),
+                postgresql_using=f'{column}::jsonb'
+            )
+
+
+def downgrade():
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSON(astext_type=sa.Text()),
+                existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                postgresql_using=f'{column}::json'
+            )
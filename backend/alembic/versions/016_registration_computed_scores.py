@@ -0,0 +1,68 @@
+"""Derive registration percentage and program success rate in the database
+
+Revision ID: 016_registration_computed_scores
+Revises: 015_independent_jsonb_columns
+Create Date: 2024-08-09 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_registration_computed_scores'
+down_revision = '015_independent_jsonb_columns'
+branch_labels = None
+depends_on = None
+
+SMALLINT_COLUMNS = ('score_obtained', 'total_score', 'proctoring_score')
+
+
+def upgrade():
+    # Generated columns pin the types of the columns they read, so the old
+    # percentage goes before the score columns are narrowed
+    op.drop_column('independent_exam_registrations', 'percentage')
+    for column in SMALLINT_COLUMNS:
+        op.alter_column(
+            'independent_exam_registrations', column,
+            type_=sa.SmallInteger(), existing_type=sa.Integer()
+        )
+    op.add_column('independent_exam_registrations', sa.Column(
+        'percentage', sa.Numeric(5, 2),
+        sa.Computed("CAST(score_obtained AS NUMERIC) * 100 / NULLIF(total_score, 0)", persisted=True)
+    ))
+    op.create_check_constraint(
+        'ck_independent_exam_registrations_score_within_total',
+        'independent_exam_registrations',
+        'score_obtained <= total_score'
+    )
+    
+    op.drop_column('certification_programs', 'success_rate')
+    op.add_column('certification_programs', sa.Column(
+        'success_rate', sa.Numeric(5, 2),
+        sa.Computed("CAST(total_certifications AS NUMERIC) * 100 / NULLIF(total_enrollments, 0)", persisted=True)
+    ))
+
+
+def downgrade():
+    op.drop_column('certification_programs', 'success_rate')
+    op.add_column('certification_programs', sa.Column('success_rate', sa.Numeric(5, 2)))
+    op.execute(
+        "UPDATE certification_programs SET success_rate = "
+        "COALESCE(CAST(total_certifications AS NUMERIC) * 100 / NULLIF(total_enrollments, 0), 0)"
+    )
+    
+    op.drop_constraint(
+        'ck_independent_exam_registrations_score_within_total',
+        'independent_exam_registrations', type_='check'
+    )
+    op.drop_column('independent_exam_registrations', 'percentage')
+    for column in SMALLINT_COLUMNS:
+        op.alter_column(
+            'independent_exam_registrations', column,
+            type_=sa.Integer(), existing_type=sa.SmallInteger()
+        )
+    op.add_column('independent_exam_registrations', sa.Column('percentage', sa.Numeric(5, 2)))
+    op.execute(
+        "UPDATE independent_exam_registrations SET percentage = "
+        "CAST(score_obtained AS NUMERIC) * 100 / NULLIF(total_score, 0)"
+    )
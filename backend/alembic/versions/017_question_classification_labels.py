@@ -0,0 +1,43 @@
+"""Denormalize subject and topic labels onto questions
+
+Revision ID: 017_question_classification_labels
+Revises: 016_registration_computed_scores
+Create Date: 2024-08-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_question_classification_labels'
+down_revision = '016_registration_computed_scores'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('questions', sa.Column('subject_code', sa.String(length=20), nullable=True))
+    op.add_column('questions', sa.Column('subject_name', sa.String(length=100), nullable=True))
+    op.add_column('questions', sa.Column('topic_name', sa.String(length=200), nullable=True))
+    
+    op.execute("""
+        UPDATE questions q
+        SET subject_code = s.code, subject_name = s.name
+        FROM subjects s
+        WHERE q.subject_id = s.id
+    """)
+    op.execute("""
+        UPDATE questions q
+        SET topic_name = t.name
+        FROM topics t
+        WHERE q.topic_id = t.id
+    """)
+    
+    op.create_index('ix_questions_subject_code', 'questions', ['subject_code'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_questions_subject_code', table_name='questions')
+    op.drop_column('questions', 'topic_name')
+    op.drop_column('questions', 'subject_name')
+    op.drop_column('questions', 'subject_code')
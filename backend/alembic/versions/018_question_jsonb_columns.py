@@ -0,0 +1,76 @@
+"""Store question and school curriculum JSON columns as JSONB with GIN indexes
+
+Revision ID: 018_question_jsonb_columns
+Revises: 017_question_classification_labels
+Create Date: 2024-08-12 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '018_question_jsonb_columns'
+down_revision = '017_question_classification_labels'
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = {
+    'topics': ('learning_objectives', 'prerequisites'),
+    'questions': ('options', 'hints', 'attachments', 'generation_metadata'),
+    'question_banks': ('subjects_covered', 'difficulty_distribution'),
+    'ai_question_generations': ('generation_parameters',),
+    'school_subjects': (
+        'applicable_streams', 'syllabus_outline', 'learning_objectives', 'assessment_pattern',
+        'prerequisite_subjects', 'next_level_subjects',
+    ),
+    'school_topics': (
+        'learning_objectives', 'key_concepts', 'prerequisite_topics', 'assessment_methods',
+        'sample_questions', 'reference_materials', 'practical_activities',
+    ),
+    'school_curricula': (
+        'objectives', 'learning_outcomes', 'core_subjects', 'optional_subjects',
+        'co_curricular_subjects', 'assessment_pattern', 'grading_system', 'promotion_criteria',
+        'subject_wise_hours', 'board_exam_pattern',
+    ),
+    'school_academic_years': ('term_structure', 'exam_schedule', 'holiday_calendar'),
+    'school_grading_systems': ('applicable_classes', 'grading_scale', 'grade_points', 'passing_criteria'),
+}
+
+GIN_INDEXES = (
+    ('idx_questions_generation_metadata', 'questions', 'generation_metadata'),
+    ('idx_ai_question_generations_parameters', 'ai_question_generations', 'generation_parameters'),
+)
+
+
+def upgrade():
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSONB(astext_type=sa.Text()),
+                existing_type=postgresql.JSON(astext_type=sa.Text()),
+                postgresql_using=f'{column}::jsonb'
+            )
+    
+    # The question bank stays writable while its indexes build
+    with op.get_context().autocommit_block():
+        for name, table, column in GIN_INDEXES:
+            op.create_index(
+                name, table, [column], unique=False, postgresql_concurrently=True,
+                postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'}
+            )
+
+
+def downgrade():
+    for name, table, _ in reversed(GIN_INDEXES):
+        op.drop_index(name, table_name=table)
+    
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=postgresql.JSON(astext_type=sa.Text()),
+                existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                postgresql_using=f'{column}::json'
+            )
@@ -0,0 +1,33 @@
+"""Add GIN indexes on question tags and keywords
+
+Revision ID: 019_question_tag_indexes
+Revises: 018_question_jsonb_columns
+Create Date: 2024-08-13 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '019_question_tag_indexes'
+down_revision = '018_question_jsonb_columns'
+branch_labels = None
+depends_on = None
+
+GIN_INDEXES = (
+    ('idx_questions_tags_gin', 'tags'),
+    ('idx_questions_keywords_gin', 'keywords'),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, column in GIN_INDEXES:
+            op.create_index(
+                name, 'questions', [column], unique=False,
+                postgresql_using='gin', postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    for name, _ in reversed(GIN_INDEXES):
+        op.drop_index(name, table_name='questions')
@@ -0,0 +1,69 @@
+"""Store question and school classification columns as native enums
+
+Revision ID: 020_question_native_enums
+Revises: 019_question_tag_indexes
+Create Date: 2024-08-13 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '020_question_native_enums'
+down_revision = '019_question_tag_indexes'
+branch_labels = None
+depends_on = None
+
+ENUM_TYPES = {
+    'question_type': (
+        'multiple_choice', 'true_false', 'fill_in_blank', 'short_answer',
+        'essay', 'code', 'image_based', 'audio_based',
+    ),
+    'difficulty_level': ('beginner', 'intermediate', 'advanced', 'expert'),
+    'question_status': ('draft', 'pending_review', 'approved', 'rejected', 'archived'),
+    'education_board': (
+        'cbse', 'icse', 'maharashtra', 'tamil_nadu', 'karnataka', 'uttar_pradesh',
+        'west_bengal', 'rajasthan', 'gujarat', 'andhra_pradesh', 'kerala', 'punjab',
+        'haryana', 'bihar', 'odisha', 'assam', 'jharkhand', 'chhattisgarh',
+        'himachal_pradesh', 'uttarakhand',
+    ),
+    'class_level': tuple(f'class_{number}' for number in range(1, 13)),
+    'school_education_level': ('primary', 'upper_primary', 'secondary', 'higher_secondary'),
+    'stream': ('science', 'commerce', 'arts', 'humanities', 'vocational'),
+}
+
+# (table, column, enum type, previous varchar length)
+ENUM_COLUMNS = (
+    ('questions', 'question_type', 'question_type', 50),
+    ('questions', 'difficulty_level', 'difficulty_level', 20),
+    ('questions', 'status', 'question_status', 20),
+    ('ai_question_generations', 'question_type', 'question_type', 50),
+    ('ai_question_generations', 'difficulty_level', 'difficulty_level', 20),
+    ('school_subjects', 'education_board', 'education_board', 50),
+    ('school_subjects', 'class_level', 'class_level', 20),
+    ('school_subjects', 'education_level', 'school_education_level', 30),
+    ('school_curricula', 'education_board', 'education_board', 50),
+    ('school_curricula', 'class_level', 'class_level', 20),
+    ('school_curricula', 'stream', 'stream', 30),
+    ('school_grading_systems', 'education_board', 'education_board', 50),
+)
+
+
+def upgrade():
+    for name, values in ENUM_TYPES.items():
+        labels = ", ".join(f"'{value}'" for value in values)
+        op.execute(f"CREATE TYPE {name} AS ENUM ({labels})")
+    
+    for table, column, enum_type, _ in ENUM_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {enum_type} USING {column}::{enum_type}"
+        )
+
+
+def downgrade():
+    for table, column, _, length in ENUM_COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar({length}) USING {column}::text"
+        )
+    
+    for name in reversed(list(ENUM_TYPES)):
+        op.execute(f"DROP TYPE IF EXISTS {name}")
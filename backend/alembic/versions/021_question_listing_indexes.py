@@ -0,0 +1,40 @@
+"""Add composite question listing indexes
+
+Revision ID: 021_question_listing_indexes
+Revises: 020_question_native_enums
+Create Date: 2024-08-14 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '021_question_listing_indexes'
+down_revision = '020_question_native_enums'
+branch_labels = None
+depends_on = None
+
+# Standalone indexes now covered by the composite ones (or never selective enough)
+REDUNDANT_INDEXES = ('ix_questions_question_type', 'ix_questions_status')
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_q_subject_status_diff_created', 'questions',
+            ['subject_id', 'status', 'difficulty_level', 'created_at'], unique=False,
+            postgresql_include=['quality_score'], postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_q_topic_status_created', 'questions',
+            ['topic_id', 'status', 'created_at'], unique=False, postgresql_concurrently=True
+        )
+    
+    for name in REDUNDANT_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def downgrade():
+    op.create_index('ix_questions_status', 'questions', ['status'], unique=False)
+    op.create_index('ix_questions_question_type', 'questions', ['question_type'], unique=False)
+    op.drop_index('idx_q_topic_status_created', table_name='questions')
+    op.drop_index('idx_q_subject_status_diff_created', table_name='questions')
@@ -0,0 +1,44 @@
+"""Link questions to their AI generation with a foreign key
+
+Revision ID: 022_question_generation_fk
+Revises: 021_question_listing_indexes
+Create Date: 2024-08-14 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '022_question_generation_fk'
+down_revision = '021_question_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('questions', sa.Column('generation_id', postgresql.UUID(as_uuid=True), nullable=True))
+    
+    # Only ids that match an existing generation are carried over, so malformed
+    # or orphaned generation_metadata values cannot break the cast or the FK
+    op.execute("""
+        UPDATE questions q
+        SET generation_id = g.id
+        FROM ai_question_generations g
+        WHERE q.ai_generated
+          AND q.generation_metadata ->> 'generation_id' = g.id::text
+    """)
+    
+    op.create_foreign_key(
+        'fk_questions_generation_id_ai_question_generations',
+        'questions', 'ai_question_generations', ['generation_id'], ['id']
+    )
+    op.create_index('ix_questions_generation_id', 'questions', ['generation_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_questions_generation_id', table_name='questions')
+    op.drop_constraint(
+        'fk_questions_generation_id_ai_question_generations', 'questions', type_='foreignkey'
+    )
+    op.drop_column('questions', 'generation_id')
@@ -0,0 +1,44 @@
+"""Narrow small-range question and curriculum columns
+
+Revision ID: 023_narrow_curriculum_columns
+Revises: 022_question_generation_fk
+Create Date: 2024-08-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023_narrow_curriculum_columns'
+down_revision = '022_question_generation_fk'
+branch_labels = None
+depends_on = None
+
+SMALLINT_COLUMNS = {
+    'subjects': ('level',),
+    'question_feedback': ('rating',),
+    'school_subjects': ('theory_marks', 'practical_marks', 'internal_assessment_marks'),
+    'school_topics': ('level', 'sequence_order'),
+}
+
+
+def upgrade():
+    for table, columns in SMALLINT_COLUMNS.items():
+        for column in columns:
+            op.alter_column(table, column, type_=sa.SmallInteger(), existing_type=sa.Integer())
+    
+    op.alter_column(
+        'school_topics', 'weightage_percentage',
+        type_=sa.Float(precision=24), existing_type=sa.Float(precision=53)
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'school_topics', 'weightage_percentage',
+        type_=sa.Float(precision=53), existing_type=sa.Float(precision=24)
+    )
+    
+    for table, columns in SMALLINT_COLUMNS.items():
+        for column in columns:
+            op.alter_column(table, column, type_=sa.Integer(), existing_type=sa.SmallInteger())
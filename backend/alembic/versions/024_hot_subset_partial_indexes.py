@@ -0,0 +1,45 @@
+"""Add partial indexes for approved questions and current/active curriculum rows
+
+Revision ID: 024_hot_subset_partial_indexes
+Revises: 023_narrow_curriculum_columns
+Create Date: 2024-08-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '024_hot_subset_partial_indexes'
+down_revision = '023_narrow_curriculum_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # questions takes steady writes, so its index is built without blocking them
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_q_active_approved', 'questions', ['subject_id', 'difficulty_level', 'created_at'],
+            unique=False, postgresql_where=sa.text("status = 'approved'"), postgresql_concurrently=True
+        )
+    op.create_index(
+        'idx_ss_active', 'school_subjects', ['education_board', 'class_level'],
+        unique=False, postgresql_where=sa.text('is_active')
+    )
+    op.create_index(
+        'idx_sc_current', 'school_curricula', ['education_board', 'class_level', 'academic_year'],
+        unique=False, postgresql_where=sa.text('is_current AND is_active')
+    )
+    # Fails if more than one academic year is already flagged current;
+    # resolve that by hand before upgrading
+    op.create_index(
+        'idx_say_current', 'school_academic_years', ['is_current'],
+        unique=True, postgresql_where=sa.text('is_current')
+    )
+
+
+def downgrade():
+    op.drop_index('idx_say_current', table_name='school_academic_years')
+    op.drop_index('idx_sc_current', table_name='school_curricula')
+    op.drop_index('idx_ss_active', table_name='school_subjects')
+    op.drop_index('idx_q_active_approved', table_name='questions')
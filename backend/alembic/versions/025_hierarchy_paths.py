@@ -0,0 +1,56 @@
+"""Add materialized paths to the subject and school topic hierarchies
+
+Revision ID: 025_hierarchy_paths
+Revises: 024_hot_subset_partial_indexes
+Create Date: 2024-08-15 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '025_hierarchy_paths'
+down_revision = '024_hot_subset_partial_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('subjects', sa.Column('path', sa.Text(), nullable=True))
+    op.add_column('school_topics', sa.Column('path', sa.Text(), nullable=True))
+    
+    # One-off recursive walk; afterwards the model listeners keep paths current
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, code::text AS path FROM subjects WHERE parent_subject_id IS NULL
+            UNION ALL
+            SELECT s.id, tree.path || '/' || s.code
+            FROM subjects s JOIN tree ON s.parent_subject_id = tree.id
+        )
+        UPDATE subjects SET path = tree.path FROM tree WHERE subjects.id = tree.id
+    """)
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, code::text AS path FROM school_topics WHERE parent_topic_id IS NULL
+            UNION ALL
+            SELECT t.id, tree.path || '/' || t.code
+            FROM school_topics t JOIN tree ON t.parent_topic_id = tree.id
+        )
+        UPDATE school_topics SET path = tree.path FROM tree WHERE school_topics.id = tree.id
+    """)
+    
+    op.create_index(
+        'idx_subjects_path', 'subjects', ['path'],
+        unique=False, postgresql_ops={'path': 'text_pattern_ops'}
+    )
+    op.create_index(
+        'idx_school_topic_path', 'school_topics', ['subject_id', 'path'],
+        unique=False, postgresql_ops={'path': 'text_pattern_ops'}
+    )
+
+
+def downgrade():
+    op.drop_index('idx_school_topic_path', table_name='school_topics')
+    op.drop_index('idx_subjects_path', table_name='subjects')
+    op.drop_column('school_topics', 'path')
+    op.drop_column('subjects', 'path')
@@ -0,0 +1,37 @@
+"""Move question flag, score and counter defaults to the server
+
+Revision ID: 026_question_server_defaults
+Revises: 025_hierarchy_paths
+Create Date: 2024-08-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '026_question_server_defaults'
+down_revision = '025_hierarchy_paths'
+branch_labels = None
+depends_on = None
+
+
+QUESTION_SERVER_DEFAULTS = {
+    'ai_generated': sa.false(),
+    'quality_score': sa.text('0'),
+    'difficulty_score': sa.text('0'),
+    'discrimination_index': sa.text('0'),
+    'times_used': sa.text('0'),
+    'times_correct': sa.text('0'),
+    'average_time_taken': sa.text('0'),
+    'status': sa.text("'draft'"),
+}
+
+
+def upgrade():
+    for column, default in QUESTION_SERVER_DEFAULTS.items():
+        op.alter_column('questions', column, server_default=default)
+
+
+def downgrade():
+    for column in QUESTION_SERVER_DEFAULTS:
+        op.alter_column('questions', column, server_default=None)
@@ -0,0 +1,36 @@
+"""Add value-domain CHECK constraints to questions and question feedback
+
+Revision ID: 027_question_check_constraints
+Revises: 026_question_server_defaults
+Create Date: 2024-08-16 11:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '027_question_check_constraints'
+down_revision = '026_question_server_defaults'
+branch_labels = None
+depends_on = None
+
+
+# (table, constraint name) -> condition
+CHECK_CONSTRAINTS = {
+    ('questions', 'ck_questions_quality_score_range'): 'quality_score BETWEEN 0 AND 100',
+    ('questions', 'ck_questions_correct_within_used'): 'times_correct <= times_used',
+    ('question_feedback', 'ck_question_feedback_rating_range'): 'rating BETWEEN 1 AND 5',
+}
+
+
+def upgrade():
+    # Added NOT VALID first so the ADD only needs a brief lock; VALIDATE then
+    # scans existing rows without blocking writes
+    for (table, name), condition in CHECK_CONSTRAINTS.items():
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID")
+    for (table, name) in CHECK_CONSTRAINTS:
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def downgrade():
+    for (table, name) in CHECK_CONSTRAINTS:
+        op.drop_constraint(name, table, type_='check')
@@ -0,0 +1,46 @@
+"""Key question bank links by (question_bank_id, question_id)
+
+Revision ID: 028_question_bank_link_pk
+Revises: 027_question_check_constraints
+Create Date: 2024-08-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '028_question_bank_link_pk'
+down_revision = '027_question_check_constraints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the earliest link of any duplicated pair before the pair becomes the key
+    op.execute("""
+        DELETE FROM question_bank_questions a
+        USING question_bank_questions b
+        WHERE a.question_bank_id = b.question_bank_id
+          AND a.question_id = b.question_id
+          AND (a.added_at, a.id) > (b.added_at, b.id)
+    """)
+    
+    op.drop_constraint('pk_question_bank_questions', 'question_bank_questions', type_='primary')
+    op.drop_column('question_bank_questions', 'id')
+    op.create_primary_key(
+        'pk_question_bank_questions', 'question_bank_questions', ['question_bank_id', 'question_id']
+    )
+    op.create_index(
+        'idx_qbq_question', 'question_bank_questions', ['question_id', 'question_bank_id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('idx_qbq_question', table_name='question_bank_questions')
+    op.drop_constraint('pk_question_bank_questions', 'question_bank_questions', type_='primary')
+    op.add_column('question_bank_questions', sa.Column(
+        'id', postgresql.UUID(as_uuid=True), nullable=False, server_default=sa.text('gen_random_uuid()')
+    ))
+    op.alter_column('question_bank_questions', 'id', server_default=None)
+    op.create_primary_key('pk_question_bank_questions', 'question_bank_questions', ['id'])
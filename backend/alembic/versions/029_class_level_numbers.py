@@ -0,0 +1,63 @@
+"""Add integer class level columns for class range filters
+
+Revision ID: 029_class_level_numbers
+Revises: 028_question_bank_link_pk
+Create Date: 2024-08-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '029_class_level_numbers'
+down_revision = '028_question_bank_link_pk'
+branch_labels = None
+depends_on = None
+
+
+# Table -> (index name, old columns, new columns)
+CLASS_INDEXES = {
+    'school_subjects': (
+        'idx_school_subject_board_class',
+        ['education_board', 'class_level'],
+        ['education_board', 'class_level_num'],
+    ),
+    'school_curricula': (
+        'idx_curriculum_board_class_year',
+        ['education_board', 'class_level', 'academic_year'],
+        ['education_board', 'class_level_num', 'academic_year'],
+    ),
+}
+
+
+def upgrade():
+    for table in CLASS_INDEXES:
+        op.add_column(table, sa.Column('class_level_num', sa.SmallInteger(), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET class_level_num = "
+            "CAST(split_part(CAST(class_level AS TEXT), '_', 2) AS SMALLINT)"
+        )
+    
+    op.add_column('school_topics', sa.Column('class_level_num', sa.SmallInteger(), nullable=True))
+    op.execute("""
+        UPDATE school_topics t
+        SET class_level_num = s.class_level_num
+        FROM school_subjects s
+        WHERE t.subject_id = s.id
+    """)
+    op.create_index('ix_school_topics_class_level_num', 'school_topics', ['class_level_num'], unique=False)
+    
+    for table, (name, old_columns, new_columns) in CLASS_INDEXES.items():
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, new_columns, unique=False)
+
+
+def downgrade():
+    for table, (name, old_columns, new_columns) in CLASS_INDEXES.items():
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, old_columns, unique=False)
+    
+    op.drop_index('ix_school_topics_class_level_num', table_name='school_topics')
+    op.drop_column('school_topics', 'class_level_num')
+    for table in CLASS_INDEXES:
+        op.drop_column(table, 'class_level_num')
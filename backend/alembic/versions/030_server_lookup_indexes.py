@@ -0,0 +1,33 @@
+"""Add active-server and per-server metrics indexes
+
+Revision ID: 030_server_lookup_indexes
+Revises: 029_class_level_numbers
+Create Date: 2024-08-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '030_server_lookup_indexes'
+down_revision = '029_class_level_numbers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_servers_active_type', 'servers', ['server_type'],
+        unique=False, postgresql_where=sa.text("status = 'active'")
+    )
+    op.create_index(
+        'idx_server_metrics_server_time', 'server_metrics', ['server_id', 'recorded_at'], unique=False
+    )
+    # Active-server lookups now use the partial index; the rest are rare admin/cleanup scans
+    op.drop_index('ix_servers_status', table_name='servers')
+
+
+def downgrade():
+    op.create_index('ix_servers_status', 'servers', ['status'], unique=False)
+    op.drop_index('idx_server_metrics_server_time', table_name='server_metrics')
+    op.drop_index('idx_servers_active_type', table_name='servers')
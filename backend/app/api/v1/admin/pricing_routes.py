@@ -4,10 +4,11 @@ Configure pricing for independent learners
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func
 from typing import Dict, List, Any, Optional
 
 from app.core.database import get_db
+from app.core.pricing_cache import pricing_cache
 from app.api.v1.auth.dependencies import get_current_user, get_super_admin_user
 from app.models.user import User
 from app.services.independent_learner_service import pricing_management_service
@@ -137,6 +138,7 @@ async def update_global_pricing_config(
     
     try:
         db.commit()
+        pricing_cache.invalidate()
         return {
             "status": "success",
             "message": "Pricing configuration updated successfully"
@@ -279,6 +281,7 @@ async def update_discount_coupon(
     
     try:
         db.commit()
+        pricing_cache.invalidate()
         return {
             "status": "success",
             "message": "Coupon updated successfully"
@@ -310,6 +313,7 @@ async def delete_discount_coupon(
     try:
         db.delete(coupon)
         db.commit()
+        pricing_cache.invalidate()
         return {
             "status": "success",
             "message": "Coupon deleted successfully"
@@ -418,8 +422,6 @@ async def get_revenue_report(
     """Generate revenue report for specified period"""
     
     from datetime import datetime
-    from app.models.independent_learner import IndependentPayment
-    from sqlalchemy import func, and_
     
     try:
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
@@ -430,45 +432,15 @@ async def get_revenue_report(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
     
-    # Get payment data for the period
-    payments = db.query(IndependentPayment).filter(
-        and_(
-            IndependentPayment.completed_at >= start_dt,
-            IndependentPayment.completed_at <= end_dt,
-            IndependentPayment.status == "success"
-        )
-    ).all()
-    
-    # Calculate metrics
-    total_revenue = sum(float(p.amount) for p in payments)
-    total_transactions = len(payments)
-    
-    # Payment method breakdown
-    payment_methods = {}
-    for payment in payments:
-        method = payment.payment_method or "unknown"
-        payment_methods[method] = payment_methods.get(method, 0) + float(payment.amount)
-    
-    # Payment type breakdown
-    payment_types = {}
-    for payment in payments:
-        ptype = payment.payment_type or "unknown"
-        payment_types[ptype] = payment_types.get(ptype, 0) + float(payment.amount)
+    # All breakdowns come from a single aggregate query over the period
+    report = pricing_management_service.generate_revenue_report(start_dt, end_dt, db)
     
     report_data = {
         "period": {
             "start_date": start_date,
             "end_date": end_date
         },
-        "summary": {
-            "total_revenue": total_revenue,
-            "total_transactions": total_transactions,
-            "average_transaction_value": round(total_revenue / total_transactions, 2) if total_transactions > 0 else 0
-        },
-        "breakdown": {
-            "payment_methods": payment_methods,
-            "payment_types": payment_types
-        }
+        **report
     }
     
     return {
@@ -290,6 +290,10 @@ async def search_questions(
     if search_params.grade_level:
         query = query.filter(Question.grade_level == search_params.grade_level)
     
+    if search_params.tags:
+        # Overlap (&&) is served by the GIN index on tags
+        query = query.filter(Question.tags.overlap(search_params.tags))
+    
     if search_params.ai_generated is not None:
         query = query.filter(Question.ai_generated == search_params.ai_generated)
     
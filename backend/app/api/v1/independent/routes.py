@@ -3,7 +3,7 @@ Independent Learner API routes for MEDHASAKTHI
 For individuals registering outside of institutions
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, lazyload, load_only
 from typing import Dict, List, Any, Optional
 
 from app.core.database import get_db
@@ -51,11 +51,9 @@ async def get_available_programs(
     learner_id = None
     if current_user and current_user.role == "independent_learner":
         from app.models.independent_learner import IndependentLearner
-        learner = db.query(IndependentLearner).filter(
+        learner_id = db.query(IndependentLearner.learner_id).filter(
             IndependentLearner.user_id == current_user.id
-        ).first()
-        if learner:
-            learner_id = learner.learner_id
+        ).scalar()
     
     programs = independent_learner_service.get_available_programs(
         learner_id=learner_id,
@@ -89,11 +87,9 @@ async def get_program_pricing(
     learner_id = None
     if current_user and current_user.role == "independent_learner":
         from app.models.independent_learner import IndependentLearner
-        learner = db.query(IndependentLearner).filter(
+        learner_id = db.query(IndependentLearner.learner_id).filter(
             IndependentLearner.user_id == current_user.id
-        ).first()
-        if learner:
-            learner_id = learner.learner_id
+        ).scalar()
     
     pricing = independent_learner_service.calculate_program_pricing(
         program_id=program_id,
@@ -305,8 +301,10 @@ async def get_exam_registrations(
             detail="Independent learner access required"
         )
     
-    from app.models.independent_learner import IndependentLearner, IndependentExamRegistration
-    learner = db.query(IndependentLearner).filter(
+    from app.models.independent_learner import IndependentLearner
+    learner = db.query(IndependentLearner).options(
+        load_only(IndependentLearner.id), lazyload(IndependentLearner.user)
+    ).filter(
         IndependentLearner.user_id == current_user.id
     ).first()
     
@@ -316,16 +314,7 @@ async def get_exam_registrations(
             detail="Learner profile not found"
         )
     
-    query = db.query(IndependentExamRegistration).filter(
-        IndependentExamRegistration.learner_id == learner.id
-    )
-    
-    if status:
-        query = query.filter(IndependentExamRegistration.status == status)
-    
-    registrations = query.order_by(
-        IndependentExamRegistration.created_at.desc()
-    ).all()
+    registrations = independent_learner_service.get_registration_rows(learner.id, status, db)
     
     registrations_data = []
     for reg in registrations:
@@ -333,10 +322,10 @@ async def get_exam_registrations(
             "id": str(reg.id),
             "registration_number": reg.registration_number,
             "program": {
-                "id": str(reg.program.id),
-                "title": reg.program.title,
-                "code": reg.program.program_code,
-                "category": reg.program.category
+                "id": str(reg.program_id),
+                "title": reg.program_title,
+                "code": reg.program_code,
+                "category": reg.program_category
             },
             "registration_date": reg.registration_date.isoformat(),
             "exam_date": reg.exam_date.isoformat() if reg.exam_date else None,
@@ -377,8 +366,10 @@ async def get_certificates(
             detail="Independent learner access required"
         )
     
-    from app.models.independent_learner import IndependentLearner, IndependentCertificate
-    learner = db.query(IndependentLearner).filter(
+    from app.models.independent_learner import IndependentLearner
+    learner = db.query(IndependentLearner).options(
+        load_only(IndependentLearner.id), lazyload(IndependentLearner.user)
+    ).filter(
         IndependentLearner.user_id == current_user.id
     ).first()
     
@@ -388,9 +379,7 @@ async def get_certificates(
             detail="Learner profile not found"
         )
     
-    certificates = db.query(IndependentCertificate).filter(
-        IndependentCertificate.learner_id == learner.id
-    ).order_by(IndependentCertificate.issue_date.desc()).all()
+    certificates = independent_learner_service.get_certificate_rows(learner.id, db)
     
     certificates_data = []
     for cert in certificates:
@@ -399,7 +388,7 @@ async def get_certificates(
             "certificate_number": cert.certificate_number,
             "program": {
                 "title": cert.program_title,
-                "code": cert.program.program_code
+                "code": cert.program_code
             },
             "issue_date": cert.issue_date.isoformat(),
             "expiry_date": cert.expiry_date.isoformat() if cert.expiry_date else None,
@@ -434,7 +423,9 @@ async def get_referral_info(
         )
     
     from app.models.independent_learner import IndependentLearner
-    learner = db.query(IndependentLearner).filter(
+    learner = db.query(IndependentLearner).options(
+        load_only(IndependentLearner.referral_code, IndependentLearner.referral_bonus_earned), lazyload(IndependentLearner.user)
+    ).filter(
         IndependentLearner.user_id == current_user.id
     ).first()
     
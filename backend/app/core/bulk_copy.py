@@ -0,0 +1,109 @@
+"""
+Bulk loading helpers for MEDHASAKTHI
+Streams large batches of event-like rows (payments, coupon usage, audit logs)
+into PostgreSQL with COPY instead of one INSERT per row
+"""
+import io
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import JSON, Enum, insert
+from sqlalchemy.orm import Session
+
+from app.core.database import json_dumps
+
+# Batches smaller than this go through a regular executemany INSERT
+COPY_THRESHOLD = 100
+
+
+def _quote(value: str) -> str:
+    """Quote a value for COPY ... WITH (FORMAT csv); unquoted empty fields are NULL"""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _column_converter(column, dialect) -> Callable[[Any], Optional[str]]:
+    """Build a value -> CSV field function for one column"""
+    if isinstance(column.type, JSON):
+        return lambda value: None if value is None else _quote(json_dumps(value))
+
+    # Enum columns go through their bind processor (member values for ValueEnum
+    # columns, member names for plain Enum); everything else is written via str()
+    process = column.type.bind_processor(dialect) if isinstance(column.type, Enum) else None
+
+    def convert(value):
+        if process is not None:
+            value = process(value)
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (datetime, date)):
+            return _quote(value.isoformat())
+        return _quote(str(value))
+
+    return convert
+
+
+def _csv_line(converters, columns: Sequence[str], row: Dict[str, Any]) -> str:
+    """One COPY CSV line for row; NULLs are left as unquoted empty fields"""
+    return ",".join(
+        field if field is not None else ""
+        for field in (convert(row.get(name)) for convert, name in zip(converters, columns))
+    ) + "\n"
+
+
+def _apply_defaults(table, rows: List[Dict[str, Any]], columns: List[str]) -> List[str]:
+    """Fill in client-side column defaults (e.g. uuid4 primary keys) that COPY would skip"""
+    defaulted = [
+        column for column in table.columns
+        if column.key not in columns and column.default is not None
+        and (column.default.is_scalar or column.default.is_callable)
+    ]
+    for row in rows:
+        for column in defaulted:
+            if column.key not in row:
+                row[column.key] = (
+                    column.default.arg(None) if column.default.is_callable else column.default.arg
+                )
+    return columns + [column.key for column in defaulted]
+
+
+def copy_insert(
+    session: Session,
+    model,
+    rows: Iterable[Dict[str, Any]],
+    columns: Optional[Sequence[str]] = None
+) -> int:
+    """
+    Insert rows (dicts keyed by column name) into the model's table
+
+    On PostgreSQL, batches of COPY_THRESHOLD rows or more are written with
+    COPY FROM STDIN on the session's own connection, so they commit or roll
+    back with the rest of the transaction. Smaller batches and other
+    dialects fall back to a single executemany INSERT. Returns the row count.
+    """
+    rows = [dict(row) for row in rows]
+    if not rows:
+        return 0
+
+    table = model.__table__
+    connection = session.connection()
+
+    if len(rows) < COPY_THRESHOLD or connection.dialect.name != "postgresql":
+        session.execute(insert(table), rows)
+        return len(rows)
+
+    columns = _apply_defaults(table, rows, list(columns or rows[0].keys()))
+    converters = [_column_converter(table.columns[name], connection.dialect) for name in columns]
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(_csv_line(converters, columns, row))
+    buffer.seek(0)
+
+    column_list = ", ".join(connection.dialect.identifier_preparer.quote(name) for name in columns)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    return len(rows)
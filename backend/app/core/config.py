@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 100
     
     # Email
     SENDGRID_API_KEY: Optional[str] = None
@@ -1,28 +1,48 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, Column, DateTime, DDL, Enum, FetchedValue, JSON, event, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
+import orjson
 import redis
-from typing import Generator
+import redis.asyncio
+from typing import Generator, Optional
 
 from app.core.config import settings
 
+
+def json_dumps(value) -> str:
+    """orjson encoder for JSON/JSONB binds (accepts non-string dict keys like the stdlib encoder)"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Compiled-statement cache entries per engine (SQLAlchemy's default is 500);
+# every distinct filter combination built by the search routes takes an entry
+QUERY_CACHE_SIZE = 1200
+
 # SQLAlchemy setup
 engine = create_engine(
     settings.DATABASE_URL,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,
-    echo=settings.DEBUG  # Log SQL queries in debug mode
+    echo=settings.DEBUG,  # Log SQL queries in debug mode
+    query_cache_size=QUERY_CACHE_SIZE,
+    json_serializer=json_dumps,
+    json_deserializer=orjson.loads
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Base class for all models
-Base = declarative_base()
+# asyncpg engine for high-volume writes issued from the event loop (payment
+# webhooks); created on first use so non-PostgreSQL setups never build it
+ASYNC_DATABASE_POOL_SIZE = 20
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
 
 # Naming convention for constraints
 convention = {
@@ -33,7 +53,65 @@ convention = {
     "pk": "pk_%(table_name)s"
 }
 
-Base.metadata = MetaData(naming_convention=convention)
+# Base class for all models (the metadata is passed in rather than assigned
+# afterwards, so relationship() strings such as secondary= resolve against it)
+Base = declarative_base(metadata=MetaData(naming_convention=convention))
+
+# PostgreSQL trigger function keeping updated_at current on every UPDATE
+SET_UPDATED_AT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+
+# JSON column type stored as binary JSONB (parsed once, GIN-indexable) on PostgreSQL
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
+def ValueEnum(enum_class, name: str) -> Enum:
+    """Native enum column type that stores member values (not names) under an explicit type name"""
+    return Enum(
+        enum_class,
+        name=name,
+        native_enum=True,
+        values_callable=lambda members: [member.value for member in members],
+        validate_strings=False
+    )
+
+
+class TimestampMixin:
+    """created_at/updated_at columns maintained entirely by the database
+    
+    Both default to now() on insert and a BEFORE UPDATE trigger refreshes
+    updated_at, so the ORM never renders timestamp expressions itself.
+    """
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue()
+    )
+
+
+@event.listens_for(TimestampMixin, "instrument_class", propagate=True)
+def _install_updated_at_trigger(mapper, cls):
+    """Create the updated_at trigger alongside each timestamped table"""
+    table = cls.__table__
+    event.listen(table, "after_create", SET_UPDATED_AT_FUNCTION.execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{table.name}_updated_at BEFORE UPDATE ON {table.name} "
+        f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+    ).execute_if(dialect="postgresql"))
+
+
+def set_fillfactor(table, fillfactor: int):
+    """Leave free space on each heap page of an update-heavy table so updates can stay HOT"""
+    event.listen(table, "after_create", DDL(
+        f"ALTER TABLE {table.name} SET (fillfactor = {fillfactor})"
+    ).execute_if(dialect="postgresql"))
+
 
 # Redis setup
 redis_client = redis.Redis.from_url(
@@ -42,6 +120,16 @@ redis_client = redis.Redis.from_url(
     decode_responses=True
 )
 
+# Async Redis client with a dedicated connection pool for request-path callers
+# (security middleware, 2FA) that await Redis from the event loop
+async_redis_pool = redis.asyncio.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS
+)
+async_redis_client = redis.asyncio.Redis(connection_pool=async_redis_pool)
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -54,11 +142,30 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_redis() -> redis.Redis:
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    AsyncSession factory bound to the shared asyncpg engine
+    """
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        _async_engine = create_async_engine(
+            settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+            pool_size=ASYNC_DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            echo=settings.DEBUG,
+            json_serializer=json_dumps,
+            json_deserializer=orjson.loads
+        )
+        _async_session_factory = async_sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+    return _async_session_factory
+
+
+def get_redis() -> redis.asyncio.Redis:
     """
-    Redis dependency for FastAPI
+    Async Redis dependency for FastAPI
     """
-    return redis_client
+    return async_redis_client
 
 
 def create_tables():
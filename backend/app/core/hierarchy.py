@@ -0,0 +1,62 @@
+"""
+Materialized-path hierarchies for MEDHASAKTHI
+Self-referencing trees (subjects, school topics) keep each row's chain of
+codes in a path column, so "all descendants of X" is one indexed prefix
+match instead of a recursive CTE over parent ids
+"""
+from typing import Optional
+
+from sqlalchemy import String, event, inspect, literal, select, update
+from sqlalchemy.sql import func
+
+PATH_SEPARATOR = "/"
+
+
+def descendants_filter(model, path: str):
+    """WHERE clause matching every row below the node with the given path"""
+    return model.path.startswith(path + PATH_SEPARATOR, autoescape=True)
+
+
+def _build_path(connection, model, parent_id, code: str) -> str:
+    """Parent's path plus this row's code (just the code for a root row)"""
+    if PATH_SEPARATOR in code:
+        raise ValueError(f"Code {code!r} may not contain {PATH_SEPARATOR!r}; it separates path segments")
+    parent_path = connection.execute(
+        select(model.path).where(model.id == parent_id)
+    ).scalar() if parent_id else None
+    return f"{parent_path}{PATH_SEPARATOR}{code}" if parent_path else code
+
+
+def materialized_path(model, parent_key: str, code_key: str = "code", scope_key: Optional[str] = None):
+    """
+    Keep model.path in sync with the parent chain on insert and update.
+    When a row's code or parent changes, every descendant's path is rewritten
+    in one UPDATE. scope_key names a column shared by the whole tree (e.g.
+    the subject of a topic tree) when codes are only unique within it.
+    """
+
+    @event.listens_for(model, "before_insert")
+    def _path_before_insert(mapper, connection, target):
+        target.path = _build_path(connection, model, getattr(target, parent_key), getattr(target, code_key))
+
+    @event.listens_for(model, "before_update")
+    def _path_before_update(mapper, connection, target):
+        state = inspect(target)
+        if not (
+            state.attrs[code_key].history.has_changes() or state.attrs[parent_key].history.has_changes()
+        ):
+            return
+
+        table = model.__table__
+        old_path = connection.execute(select(table.c.path).where(table.c.id == target.id)).scalar()
+        new_path = _build_path(connection, model, getattr(target, parent_key), getattr(target, code_key))
+        target.path = new_path
+        if not old_path or old_path == new_path:
+            return
+
+        subtree = update(table).where(table.c.path.startswith(old_path + PATH_SEPARATOR, autoescape=True))
+        if scope_key:
+            subtree = subtree.where(table.c[scope_key] == getattr(target, scope_key))
+        connection.execute(subtree.values(
+            path=literal(new_path, String) + func.substr(table.c.path, len(old_path) + 1)
+        ))
@@ -0,0 +1,64 @@
+"""
+Primary key generation for MEDHASAKTHI
+Time-ordered UUIDs for high-insert tables, generated client- or server-side
+"""
+import os
+import time
+import uuid
+
+from sqlalchemy import Column, DDL, FetchedValue, event
+from sqlalchemy.dialects.postgresql import UUID
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate an RFC 9562 version 7 UUID: 48-bit Unix epoch milliseconds followed
+    by 74 random bits. Values sort by creation time, so new rows land on the
+    rightmost B-tree leaf instead of a random page like uuid4 keys do.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    random_bits = int.from_bytes(os.urandom(10), "big")
+    
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                                  # version
+    value |= (random_bits >> 68) << 64                  # rand_a (12 bits)
+    value |= 0b10 << 62                                 # variant
+    value |= random_bits & 0x3FFF_FFFF_FFFF_FFFF        # rand_b (62 bits)
+    return uuid.UUID(int=value)
+
+
+# PostgreSQL counterpart of uuid7() so rows can get their key without the
+# client generating it (gen_random_uuid() is built in from PostgreSQL 13)
+UUID_GENERATE_V7_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+DECLARE
+    uuid_bytes bytea;
+BEGIN
+    uuid_bytes = substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+        || substring(uuid_send(gen_random_uuid()) FROM 7);
+    uuid_bytes = set_byte(uuid_bytes, 6, (b'0111' || get_byte(uuid_bytes, 6)::bit(4))::bit(8)::int);
+    uuid_bytes = set_byte(uuid_bytes, 8, (b'10' || get_byte(uuid_bytes, 8)::bit(6))::bit(8)::int);
+    RETURN encode(uuid_bytes, 'hex')::uuid;
+END;
+$$ LANGUAGE plpgsql VOLATILE
+""")
+
+
+class ServerUUIDv7Mixin:
+    """UUIDv7 primary key generated by the database on insert
+    
+    Meant for append-only tables whose rows are never referenced before they
+    are flushed; ORM inserts read the key back with RETURNING and bulk COPY
+    loads can leave the column out entirely.
+    """
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=FetchedValue())
+
+
+@event.listens_for(ServerUUIDv7Mixin, "instrument_class", propagate=True)
+def _install_uuid7_default(mapper, cls):
+    """Point the id column default at uuid_generate_v7() when the table is created"""
+    table = cls.__table__
+    event.listen(table, "after_create", UUID_GENERATE_V7_FUNCTION.execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"ALTER TABLE {table.name} ALTER COLUMN id SET DEFAULT uuid_generate_v7()"
+    ).execute_if(dialect="postgresql"))
@@ -0,0 +1,59 @@
+"""
+Time-range table partitioning for MEDHASAKTHI
+Monthly RANGE partitions for append-only log tables, so time-window queries
+prune to a few months and old months can be detached instead of vacuumed
+"""
+from typing import Dict
+
+from sqlalchemy import DDL, Table, event, text
+from sqlalchemy.orm import Session
+
+# Partitions are created this many months ahead of the current one
+PARTITION_MONTHS_AHEAD = 3
+
+# Table name -> partition column, for every table set up with partition_by_month()
+MONTHLY_PARTITIONED_TABLES: Dict[str, str] = {}
+
+# (DDL statements are %-formatted, hence the doubled format() placeholders)
+CREATE_MONTHLY_PARTITIONS_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent text, months_ahead integer) RETURNS void AS $$
+DECLARE
+    month_start date;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start = (date_trunc('month', now()) + make_interval(months => i))::date;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %%I PARTITION OF %%I FOR VALUES FROM (%%L) TO (%%L)',
+            parent || '_' || to_char(month_start, 'YYYY_MM'), parent,
+            month_start, (month_start + interval '1 month')::date
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+
+def partition_by_month(table: Table, column_name: str):
+    """
+    Create the monthly partitions (plus a DEFAULT catch-all) right after the
+    table itself. The table must declare postgresql_partition_by and include
+    column_name in its primary key.
+    """
+    MONTHLY_PARTITIONED_TABLES[table.name] = column_name
+    event.listen(table, "after_create", CREATE_MONTHLY_PARTITIONS_FUNCTION.execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"SELECT create_monthly_partitions('{table.name}', {PARTITION_MONTHS_AHEAD})"
+    ).execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE TABLE IF NOT EXISTS {table.name}_default PARTITION OF {table.name} DEFAULT"
+    ).execute_if(dialect="postgresql"))
+
+
+def ensure_monthly_partitions(db: Session):
+    """Roll every monthly-partitioned table forward (run periodically)"""
+    for table_name in MONTHLY_PARTITIONED_TABLES:
+        db.execute(
+            text("SELECT create_monthly_partitions(:parent, :months_ahead)"),
+            {"parent": table_name, "months_ahead": PARTITION_MONTHS_AHEAD}
+        )
+    db.commit()
@@ -0,0 +1,106 @@
+"""
+In-process pricing lookup cache for MEDHASAKTHI
+Keeps the active GlobalPricingConfig and the auto-apply DiscountCoupons as
+frozen snapshots so program pricing doesn't query them on every quote
+"""
+import time
+import threading
+from dataclasses import make_dataclass, replace
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.models.pricing_config import GlobalPricingConfig, DiscountCoupon
+
+# Pricing writes invalidate this worker immediately; other workers pick the
+# change up once their entry expires
+CONFIG_CACHE_SECONDS = 60
+COUPON_CACHE_SECONDS = 30
+
+
+def _snapshot_type(model):
+    """Frozen dataclass with one field per mapped column of the model"""
+    fields = [attribute.key for attribute in inspect(model).column_attrs]
+    return make_dataclass(f"{model.__name__}Snapshot", fields, frozen=True)
+
+
+PricingConfigSnapshot = _snapshot_type(GlobalPricingConfig)
+DiscountCouponSnapshot = _snapshot_type(DiscountCoupon)
+
+
+def _snapshot(snapshot_type, instance):
+    """Copy column values off a live ORM instance so no Session reference is kept"""
+    return snapshot_type(**{name: getattr(instance, name) for name in snapshot_type.__dataclass_fields__})
+
+
+def _coupon_snapshot(coupon: DiscountCoupon) -> DiscountCouponSnapshot:
+    """Coupon snapshot with its targeting lists as frozensets for O(1) eligibility checks"""
+    snapshot = _snapshot(DiscountCouponSnapshot, coupon)
+    return replace(
+        snapshot,
+        applicable_programs=frozenset(coupon.applicable_programs or ()),
+        applicable_categories=frozenset(coupon.applicable_categories or ()),
+        applicable_countries=frozenset(coupon.applicable_countries or ())
+    )
+
+
+class PricingCache:
+    """Tiny TTL cache of pricing lookups (one entry per key)"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, ttl: int, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader() when missing or expired"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + ttl, value)
+        return value
+
+    def invalidate(self):
+        """Drop every cached entry (call after committing a pricing or coupon change)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_active_config(self, db: Session) -> Optional[PricingConfigSnapshot]:
+        """Latest active and approved global pricing configuration"""
+
+        def load():
+            config = db.query(GlobalPricingConfig).filter(
+                GlobalPricingConfig.is_active == True,
+                GlobalPricingConfig.approval_status == "active"
+            ).order_by(GlobalPricingConfig.created_at.desc()).first()
+            return _snapshot(PricingConfigSnapshot, config) if config else None
+
+        return self.get_or_load("active_config", CONFIG_CACHE_SECONDS, load)
+
+    def get_auto_apply_coupons(self, db: Session) -> Tuple[DiscountCouponSnapshot, ...]:
+        """Active auto-apply coupons whose validity window covers the load time"""
+
+        def load():
+            coupons = db.query(DiscountCoupon).filter(
+                DiscountCoupon.is_active == True,
+                DiscountCoupon.valid_from <= datetime.utcnow(),
+                DiscountCoupon.valid_until >= datetime.utcnow(),
+                DiscountCoupon.is_auto_apply == True
+            ).all()
+            # Per-coupon checks that don't depend on the program or learner are
+            # settled here once, so exhausted coupons never reach eligibility
+            return tuple(
+                _coupon_snapshot(coupon) for coupon in coupons
+                if not (coupon.total_usage_limit and coupon.current_usage_count >= coupon.total_usage_limit)
+            )
+
+        return self.get_or_load("auto_apply_coupons", COUPON_CACHE_SECONDS, load)
+
+
+# Global instance
+pricing_cache = PricingCache()
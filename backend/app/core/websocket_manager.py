@@ -3,10 +3,16 @@ WebSocket Manager for Real-time Features in MEDHASAKTHI
 Handles real-time notifications, live exam monitoring, and collaborative features
 """
 import json
+import time
+import zlib
 import asyncio
-from typing import Dict, List, Set, Optional, Any
+import weakref
+from typing import Dict, List, Set, Optional, Any, Callable, Awaitable
+from dataclasses import dataclass, field
 from datetime import datetime
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 from sqlalchemy.orm import Session
 import redis
 import logging
@@ -27,21 +33,64 @@ ws_redis = redis.Redis(
     decode_responses=True
 )
 
+# Clients that offer a binary subprotocol receive broadcasts as binary frames
+# holding the UTF-8 JSON, encoded once for all recipients. With the deflate
+# subprotocol, large broadcasts are also zlib-compressed once per fan-out;
+# permessage-deflate is disabled on the server so frames are not compressed twice.
+#
+# Framing: medhasakthi.binary frames are the bare UTF-8 JSON. medhasakthi.deflate
+# frames start with one marker byte, DEFLATE_FRAME_ZLIB followed by zlib data or
+# DEFLATE_FRAME_RAW followed by the bare JSON, since small broadcasts are not
+# worth compressing. Text frames (personal messages) are always plain JSON.
+PRECOMPRESSED_SUBPROTOCOL = "medhasakthi.deflate"
+BINARY_SUBPROTOCOL = "medhasakthi.binary"
+DEFLATE_FRAME_RAW = b"\x00"
+DEFLATE_FRAME_ZLIB = b"\x01"
+BROADCAST_COMPRESS_MIN_BYTES = 512
+BROADCAST_COMPRESS_MIN_RECIPIENTS = 32
+
+
+@dataclass(slots=True)
+class ConnectionMetadata:
+    """Per-connection bookkeeping (slotted to keep large connection counts compact)"""
+    user_id: str
+    connection_type: str
+    connected_at: datetime
+    last_activity: float
+    # Unbound send_text/send_bytes for the negotiated frame type, called as
+    # send(websocket, data); unbound so the entry holds no reference to the socket
+    send: Callable[[WebSocket, Any], Awaitable[None]]
+    binary_frames: bool = False
+    precompressed: bool = False
+    room_ids: Set[str] = field(default_factory=set)
+
 
 class ConnectionManager:
     """Manages WebSocket connections and message broadcasting"""
-    
+
+    # PERF: memory-bound fan-out — optimize bytes moved and RTTs before CPU.
+    # Order of priority: fewer sends, overlapped sends, then cheaper encoding.
+    # Check changes against scripts/benchmark_websocket_fanout.py.
+
     def __init__(self):
         # Active connections by user_id
         self.active_connections: Dict[str, Set[WebSocket]] = {}
-        # Connection metadata
-        self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
+        # Connection metadata (weakly keyed so entries for sockets that were
+        # never passed to disconnect() are dropped once the socket is collected)
+        self.connection_metadata: "weakref.WeakKeyDictionary[WebSocket, ConnectionMetadata]" = weakref.WeakKeyDictionary()
         # Room-based connections (for group features)
         self.rooms: Dict[str, Set[WebSocket]] = {}
     
     async def connect(self, websocket: WebSocket, user_id: str, connection_type: str = "general"):
         """Accept new WebSocket connection"""
-        await websocket.accept()
+        offered_subprotocols = websocket.scope.get("subprotocols", [])
+        if PRECOMPRESSED_SUBPROTOCOL in offered_subprotocols:
+            subprotocol = PRECOMPRESSED_SUBPROTOCOL
+        elif BINARY_SUBPROTOCOL in offered_subprotocols:
+            subprotocol = BINARY_SUBPROTOCOL
+        else:
+            subprotocol = None
+        await websocket.accept(subprotocol=subprotocol)
         
         # Add to user connections
         if user_id not in self.active_connections:
@@ -49,12 +98,15 @@ class ConnectionManager:
         self.active_connections[user_id].add(websocket)
         
         # Store connection metadata
-        self.connection_metadata[websocket] = {
-            "user_id": user_id,
-            "connection_type": connection_type,
-            "connected_at": datetime.now(),
-            "last_activity": datetime.now()
-        }
+        self.connection_metadata[websocket] = ConnectionMetadata(
+            user_id=user_id,
+            connection_type=connection_type,
+            connected_at=datetime.now(),
+            last_activity=time.monotonic(),
+            send=type(websocket).send_bytes if subprotocol else type(websocket).send_text,
+            binary_frames=subprotocol is not None,
+            precompressed=subprotocol == PRECOMPRESSED_SUBPROTOCOL
+        )
         
         ws_logger.info(f"User {user_id} connected via WebSocket ({connection_type})")
         
@@ -69,7 +121,7 @@ class ConnectionManager:
         """Handle WebSocket disconnection"""
         if websocket in self.connection_metadata:
             metadata = self.connection_metadata[websocket]
-            user_id = metadata["user_id"]
+            user_id = metadata.user_id
             
             # Remove from user connections
             if user_id in self.active_connections:
@@ -77,9 +129,13 @@ class ConnectionManager:
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
             
-            # Remove from rooms
-            for room_connections in self.rooms.values():
-                room_connections.discard(websocket)
+            # Remove only from the rooms this connection joined
+            for room_id in metadata.room_ids:
+                room_connections = self.rooms.get(room_id)
+                if room_connections is not None:
+                    room_connections.discard(websocket)
+                    if not room_connections:
+                        del self.rooms[room_id]
             
             # Remove metadata
             del self.connection_metadata[websocket]
@@ -90,9 +146,9 @@ class ConnectionManager:
         """Send message to specific WebSocket connection"""
         try:
             await websocket.send_text(json.dumps(message))
-            # Update last activity
+            # Update last activity (monotonic seconds, only compared for idleness)
             if websocket in self.connection_metadata:
-                self.connection_metadata[websocket]["last_activity"] = datetime.now()
+                self.connection_metadata[websocket].last_activity = time.monotonic()
         except Exception as e:
             ws_logger.error(f"Error sending personal message: {e}")
     
@@ -119,7 +175,7 @@ class ConnectionManager:
         
         # Update metadata
         if websocket in self.connection_metadata:
-            self.connection_metadata[websocket]["room_id"] = room_id
+            self.connection_metadata[websocket].room_ids.add(room_id)
         
         ws_logger.info(f"Connection joined room: {room_id}")
     
@@ -132,17 +188,18 @@ class ConnectionManager:
         
         # Update metadata
         if websocket in self.connection_metadata:
-            self.connection_metadata[websocket].pop("room_id", None)
+            self.connection_metadata[websocket].room_ids.discard(room_id)
         
         ws_logger.info(f"Connection left room: {room_id}")
     
     async def broadcast_to_room(self, message: Dict[str, Any], room_id: str):
         """Broadcast message to all connections in a room"""
         if room_id in self.rooms:
+            payload, payload_text, deflate_frame = self._encode_broadcast(message, len(self.rooms[room_id]))
             disconnected_connections = set()
-            for websocket in self.rooms[room_id]:
+            for websocket in tuple(self.rooms[room_id]):
                 try:
-                    await websocket.send_text(json.dumps(message))
+                    await self._send_broadcast_payload(websocket, payload, payload_text, deflate_frame)
                 except Exception as e:
                     ws_logger.error(f"Error broadcasting to room: {e}")
                     disconnected_connections.add(websocket)
@@ -153,22 +210,78 @@ class ConnectionManager:
     
     async def broadcast_to_all(self, message: Dict[str, Any]):
         """Broadcast message to all active connections"""
-        all_connections = set()
-        for user_connections in self.active_connections.values():
-            all_connections.update(user_connections)
+        total_connections = sum(len(connections) for connections in self.active_connections.values())
+        payload, payload_text, deflate_frame = self._encode_broadcast(message, total_connections)
         
         disconnected_connections = set()
-        for websocket in all_connections:
-            try:
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                ws_logger.error(f"Error broadcasting to all: {e}")
-                disconnected_connections.add(websocket)
+        # Walk the per-user sets directly instead of flattening them into a
+        # new set; snapshot the containers since sends yield to the event loop
+        for user_connections in list(self.active_connections.values()):
+            for websocket in tuple(user_connections):
+                try:
+                    await self._send_broadcast_payload(websocket, payload, payload_text, deflate_frame)
+                except Exception as e:
+                    ws_logger.error(f"Error broadcasting to all: {e}")
+                    disconnected_connections.add(websocket)
         
         # Clean up disconnected connections
         for websocket in disconnected_connections:
             self.disconnect(websocket)
     
+    def _encode_broadcast(self, message: Dict[str, Any], recipient_count: int):
+        """Serialize a broadcast once, plus its marked frame for deflate clients"""
+        payload = orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS)
+        if (
+            len(payload) > BROADCAST_COMPRESS_MIN_BYTES
+            and recipient_count > BROADCAST_COMPRESS_MIN_RECIPIENTS
+        ):
+            deflate_frame = DEFLATE_FRAME_ZLIB + zlib.compress(payload)
+        else:
+            deflate_frame = DEFLATE_FRAME_RAW + payload
+        return payload, payload.decode(), deflate_frame
+    
+    async def _send_broadcast_payload(
+        self,
+        websocket: WebSocket,
+        payload: bytes,
+        payload_text: str,
+        deflate_frame: bytes
+    ):
+        """Send a pre-encoded broadcast in the frame format the client negotiated"""
+        metadata = self.connection_metadata.get(websocket)
+        if metadata is None:
+            await websocket.send_text(payload_text)
+            return
+        
+        send = metadata.send
+        if not metadata.binary_frames:
+            await send(websocket, payload_text)
+        elif metadata.precompressed:
+            await send(websocket, deflate_frame)
+        else:
+            await send(websocket, payload)
+    
+    async def sweep_stale_connections(self, max_idle_seconds: Optional[float] = None) -> int:
+        """Drop connections whose socket is no longer open, or idle past max_idle_seconds"""
+        now = time.monotonic()
+        stale_connections = []
+        for websocket, metadata in list(self.connection_metadata.items()):
+            if websocket.client_state != WebSocketState.CONNECTED:
+                stale_connections.append(websocket)
+            elif max_idle_seconds is not None and now - metadata.last_activity > max_idle_seconds:
+                try:
+                    await websocket.close(code=1001, reason="Idle timeout")
+                except Exception as e:
+                    ws_logger.error(f"Error closing idle connection: {e}")
+                stale_connections.append(websocket)
+        
+        for websocket in stale_connections:
+            self.disconnect(websocket)
+        
+        if stale_connections:
+            ws_logger.info(f"Swept {len(stale_connections)} stale WebSocket connections")
+        return len(stale_connections)
+    
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get WebSocket connection statistics"""
         total_connections = sum(len(connections) for connections in self.active_connections.values())
@@ -184,7 +297,7 @@ class ConnectionManager:
         """Get connection count by type"""
         type_counts = {}
         for metadata in self.connection_metadata.values():
-            conn_type = metadata.get("connection_type", "unknown")
+            conn_type = metadata.connection_type
             type_counts[conn_type] = type_counts.get(conn_type, 0) + 1
         return type_counts
 
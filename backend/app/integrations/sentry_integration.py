@@ -21,6 +21,10 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Event filtering lookups, built once instead of per event
+_SUPPRESSED_URL_SUFFIXES = ("/health", "/metrics", "/ready")
+_CLIENT_ERROR_EXCEPTION_TYPES = frozenset({"HTTPException", "ValidationError"})
+
 class SentryManager:
     """Advanced Sentry integration manager"""
     
@@ -85,19 +89,23 @@ class SentryManager:
     def before_send_filter(self, event: Dict[str, Any], hint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Filter events before sending to Sentry"""
         
-        # Don't send health check errors
-        if 'request' in event and event['request'].get('url', '').endswith('/health'):
+        # Don't send health check / probe errors
+        request_info = event.get('request')
+        if request_info and request_info.get('url', '').endswith(_SUPPRESSED_URL_SUFFIXES):
             return None
         
         # Filter out common non-critical errors
-        if 'exception' in event:
+        try:
             exception_type = event['exception']['values'][0]['type']
-            if exception_type in ['HTTPException', 'ValidationError']:
-                # Only send 5xx HTTP errors
-                if hasattr(hint.get('exc_info', [None, None, None])[1], 'status_code'):
-                    status_code = hint['exc_info'][1].status_code
-                    if status_code < 500:
-                        return None
+        except (KeyError, IndexError, TypeError):
+            exception_type = None
+        
+        if exception_type in _CLIENT_ERROR_EXCEPTION_TYPES:
+            # Only send 5xx HTTP errors
+            exc_value = hint.get('exc_info', (None, None, None))[1]
+            status_code = getattr(exc_value, 'status_code', None)
+            if status_code is not None and status_code < 500:
+                return None
         
         # Add custom context
         self.add_custom_context(event)
@@ -193,14 +201,27 @@ sentry_manager = SentryManager()
 def sentry_trace(operation_name: str = None):
     """Decorator to trace function performance"""
     def decorator(func):
+        # Sentry is not configured: leave the function unwrapped
+        if not sentry_manager.sentry_dsn:
+            return func
+        
+        op_name = operation_name or f"{func.__module__}.{func.__name__}"
+        start_transaction = sentry_sdk.start_transaction
+        start_span = sentry_sdk.start_span
+        get_current_span = sentry_sdk.get_current_span
+        
+        def _start_trace():
+            # Nest under an active transaction instead of opening a new one
+            if get_current_span() is not None:
+                return start_span(op=op_name, description=func.__name__)
+            return start_transaction(op=op_name, name=func.__name__)
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             if not sentry_manager.initialized:
                 return await func(*args, **kwargs)
             
-            op_name = operation_name or f"{func.__module__}.{func.__name__}"
-            
-            with sentry_sdk.start_transaction(op=op_name, name=func.__name__):
+            with _start_trace():
                 try:
                     result = await func(*args, **kwargs)
                     return result
@@ -213,9 +234,7 @@ def sentry_trace(operation_name: str = None):
             if not sentry_manager.initialized:
                 return func(*args, **kwargs)
             
-            op_name = operation_name or f"{func.__module__}.{func.__name__}"
-            
-            with sentry_sdk.start_transaction(op=op_name, name=func.__name__):
+            with _start_trace():
                 try:
                     result = func(*args, **kwargs)
                     return result
@@ -303,12 +322,18 @@ async def sentry_middleware(request: Request, call_next):
 def monitor_database_query(query_name: str = None):
     """Monitor database query performance"""
     def decorator(func):
+        if not sentry_manager.sentry_dsn:
+            return func
+        
+        description = query_name or func.__name__
+        start_span = sentry_sdk.start_span
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
             if not sentry_manager.initialized:
                 return await func(*args, **kwargs)
             
-            with sentry_sdk.start_span(op="db.query", description=query_name or func.__name__):
+            with start_span(op="db.query", description=description):
                 return await func(*args, **kwargs)
         
         return wrapper
@@ -317,12 +342,18 @@ def monitor_database_query(query_name: str = None):
 def monitor_external_api(api_name: str = None):
     """Monitor external API calls"""
     def decorator(func):
+        if not sentry_manager.sentry_dsn:
+            return func
+        
+        description = api_name or func.__name__
+        start_span = sentry_sdk.start_span
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
             if not sentry_manager.initialized:
                 return await func(*args, **kwargs)
             
-            with sentry_sdk.start_span(op="http.client", description=api_name or func.__name__):
+            with start_span(op="http.client", description=description):
                 return await func(*args, **kwargs)
         
         return wrapper
@@ -8,11 +8,15 @@ import json
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from collections import defaultdict, deque
+from bisect import bisect_right
+from itertools import accumulate
 import re
 import hashlib
 import ipaddress
+import socket
+from types import MappingProxyType
 
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import JSONResponse
@@ -21,61 +25,188 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db, get_redis
 from app.core.config import settings
+from app.core.redis_scripts import PipelineScript
+
+try:
+    import hyperscan
+except ImportError:  # Optional; pattern scanning falls back to the combined regex
+    hyperscan = None
 
 logger = logging.getLogger(__name__)
 
+# Fixed-window counter in a single round trip: increments the key, starts the
+# window on the first hit and returns {count, seconds until the window resets}
+FIXED_WINDOW_LUA = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return {count, redis.call('TTL', KEYS[1])}
+"""
+FIXED_WINDOW_SCRIPT = PipelineScript(FIXED_WINDOW_LUA)
+
+# IP blacklist: Redis set, change notifications channel, and how often each
+# worker re-reads its local copy of the set
+BLACKLIST_KEY = "blacklisted_ips"
+BLACKLIST_CHANNEL = "blacklist_updates"
+BLACKLIST_REFRESH_SECONDS = 30
+
+# Threat logs are audit-only: they are queued off the request path and written
+# to Redis in pipelined batches of up to THREAT_LOG_BATCH_SIZE
+THREAT_LOG_QUEUE_SIZE = 10000
+THREAT_LOG_BATCH_SIZE = 100
+
+# Suspicious request patterns by category
+SUSPICIOUS_PATTERNS = MappingProxyType({
+    'sql_injection': r'union|select|insert|delete|drop|create|alter|exec|script',
+    'xss': r'<script|javascript:|vbscript:|onload|onerror',
+    'path_traversal': r'\.\.\/|\.\.\\|\/etc\/|\/proc\/|\/sys\/',
+    'command_injection': r'cmd|powershell|bash|sh|exec|eval',
+    'encoding_attack': r'(?:base64|hex|url|html)encode',
+})
+
+# One alternation over every category, used only as an "any match" pre-filter:
+# finditer reports non-overlapping matches and only the first alternative at each
+# position, so it can't say which categories matched. Strings it hits are then
+# searched per category.
+COMBINED_THREAT_PATTERN = re.compile('|'.join(SUSPICIOUS_PATTERNS.values()), re.IGNORECASE)
+CATEGORY_PATTERNS = MappingProxyType({
+    name: re.compile(pattern, re.IGNORECASE) for name, pattern in SUSPICIOUS_PATTERNS.items()
+})
+
+# Request headers that carry client-controlled content worth pattern scanning
+RISK_HEADERS = ('referer', 'user-agent', 'x-forwarded-for', 'cookie', 'authorization', 'host', 'origin')
+
+# IPv4 ranges treated as private/loopback, as (network, netmask) integers.
+# Mirrors ipaddress.IPv4Address.is_private / is_loopback so the hot path can
+# test a packed address with integer masks instead of building an ip_address.
+PRIVATE_V4 = tuple(
+    (int(network.network_address), int(network.netmask))
+    for network in map(ipaddress.ip_network, (
+        '0.0.0.0/8', '10.0.0.0/8', '127.0.0.0/8', '169.254.0.0/16',
+        '172.16.0.0/12', '192.0.0.0/29', '192.0.0.170/31', '192.0.2.0/24',
+        '192.168.0.0/16', '198.18.0.0/15', '198.51.100.0/24', '203.0.113.0/24',
+        '240.0.0.0/4', '255.255.255.255/32',
+    ))
+)
+
+# Scanner / automation user agents, matched case-insensitively in one pass
+SUSPICIOUS_USER_AGENT_PATTERN = re.compile(
+    r'sqlmap|nikto|nmap|masscan|zap|burp|python-requests|curl|wget|bot|crawler|'
+    r'scanner|exploit|hack',
+    re.IGNORECASE
+)
+
+# Threat scoring thresholds
+THREAT_LEVELS = MappingProxyType({
+    'low': 10,
+    'medium': 25,
+    'high': 50,
+    'critical': 100
+})
+
+# Rate limiting configurations
+RATE_LIMITS = MappingProxyType({
+    'login': {'requests': 5, 'window': 300},  # 5 attempts per 5 minutes
+    'register': {'requests': 3, 'window': 3600},  # 3 registrations per hour
+    'api': {'requests': 100, 'window': 60},  # 100 API calls per minute
+    'payment': {'requests': 10, 'window': 3600},  # 10 payments per hour
+})
+
+# Static security headers, pre-encoded in ASGI raw header form
+STATIC_SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+)
+
+# Path substring -> rate limit endpoint type, checked in order ('api' otherwise)
+ENDPOINT_RULES = (
+    ('login', 'login'),
+    ('register', 'register'),
+    ('payment', 'payment'),
+)
+
+def resolve_endpoint_type(path: str) -> str:
+    """Map a request path to its rate limit endpoint type"""
+    return next((endpoint_type for fragment, endpoint_type in ENDPOINT_RULES if fragment in path), 'api')
+
 class ThreatDetector:
     """Advanced threat detection system"""
     
     def __init__(self):
         self.redis_client = get_redis()
-        self.suspicious_patterns = [
-            r'(?i)(union|select|insert|delete|drop|create|alter|exec|script)',  # SQL injection
-            r'(?i)(<script|javascript:|vbscript:|onload|onerror)',  # XSS
-            r'(?i)(\.\.\/|\.\.\\|\/etc\/|\/proc\/|\/sys\/)',  # Path traversal
-            r'(?i)(cmd|powershell|bash|sh|exec|eval)',  # Command injection
-            r'(?i)(base64|hex|url|html)encode',  # Encoding attacks
-        ]
-        self.compiled_patterns = [re.compile(pattern) for pattern in self.suspicious_patterns]
-        
-        # Threat scoring thresholds
-        self.threat_levels = {
-            'low': 10,
-            'medium': 25,
-            'high': 50,
-            'critical': 100
-        }
+        self.fixed_window_counter = self.redis_client.register_script(FIXED_WINDOW_LUA)
+        self.suspicious_patterns = SUSPICIOUS_PATTERNS
+        self.combined_pattern = COMBINED_THREAT_PATTERN
+        self.category_patterns = CATEGORY_PATTERNS
+        
+        # Hyperscan database scanning all categories in one SIMD pass, if available
+        self.pattern_categories = list(self.suspicious_patterns)
+        self.hs_db = None
+        if hyperscan is not None:
+            self.hs_db = hyperscan.Database()
+            self.hs_db.compile(
+                expressions=[pattern.encode() for pattern in self.suspicious_patterns.values()],
+                ids=list(range(len(self.pattern_categories))),
+                elements=len(self.pattern_categories),
+                flags=[hyperscan.HS_FLAG_CASELESS] * len(self.pattern_categories)
+            )
+            self.hs_scratch = hyperscan.Scratch(self.hs_db)
         
-        # Rate limiting configurations
-        self.rate_limits = {
-            'login': {'requests': 5, 'window': 300},  # 5 attempts per 5 minutes
-            'register': {'requests': 3, 'window': 3600},  # 3 registrations per hour
-            'api': {'requests': 100, 'window': 60},  # 100 API calls per minute
-            'payment': {'requests': 10, 'window': 3600},  # 10 payments per hour
-        }
+        self.threat_levels = THREAT_LEVELS
+        self.rate_limits = RATE_LIMITS
+        
+        # Local copy of the IP blacklist; re-read from Redis every
+        # BLACKLIST_REFRESH_SECONDS and updated from BLACKLIST_CHANNEL in between
+        self.blacklist_cache: Set[str] = set()
+        self.blacklist_refreshed_at = 0.0
+        self.blacklist_listener: Optional[asyncio.Task] = None
+        
+        # Pending threat logs and the background task that writes them
+        self.threat_log_queue: asyncio.Queue = asyncio.Queue(maxsize=THREAT_LOG_QUEUE_SIZE)
+        self.threat_log_writer: Optional[asyncio.Task] = None
 
-    async def detect_threats(self, request: Request) -> Dict:
-        """Comprehensive threat detection"""
+    async def detect_threats(
+        self,
+        request: Request,
+        redis_checks: Optional[Dict] = None,
+        url_path: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ) -> Dict:
+        """Comprehensive threat detection
+        
+        redis_checks may carry pre-fetched 'is_rapid'/'is_malicious' results (see
+        run_redis_security_checks) to avoid separate Redis round trips; url_path and
+        ip_address can be passed when the caller has already resolved them.
+        """
         threats = []
         threat_score = 0
         
         # Get request data
-        ip_address = self.get_client_ip(request)
+        if ip_address is None:
+            ip_address = self.get_client_ip(request)
+        if url_path is None:
+            url_path = request.url.path
         user_agent = request.headers.get('user-agent', '')
-        url_path = str(request.url.path)
         
         # Check for suspicious patterns in URL
-        for pattern in self.compiled_patterns:
-            if pattern.search(url_path):
-                threats.append(f"Suspicious pattern in URL: {pattern.pattern}")
-                threat_score += 15
-        
-        # Check for suspicious patterns in headers
-        for header_name, header_value in request.headers.items():
-            for pattern in self.compiled_patterns:
-                if pattern.search(header_value):
-                    threats.append(f"Suspicious pattern in header {header_name}")
-                    threat_score += 10
+        for category in self.match_pattern_categories(url_path):
+            threats.append(f"Suspicious pattern in URL: {category}")
+            threat_score += 15
+        
+        # Check for suspicious patterns in the high-risk headers
+        risk_headers = [
+            (header_name, header_value)
+            for header_name in RISK_HEADERS
+            for header_value in request.headers.getlist(header_name)
+        ]
+        for header_name, category in self.match_header_categories(risk_headers):
+            threats.append(f"Suspicious pattern in header {header_name}")
+            threat_score += 10
         
         # Check for suspicious user agents
         if self.is_suspicious_user_agent(user_agent):
@@ -83,7 +214,11 @@ class ThreatDetector:
             threat_score += 20
         
         # Check for rapid requests (potential DDoS)
-        if await self.check_rapid_requests(ip_address):
+        if redis_checks is not None:
+            is_rapid = redis_checks['is_rapid']
+        else:
+            is_rapid = await self.check_rapid_requests(ip_address)
+        if is_rapid:
             threats.append("Rapid request pattern detected")
             threat_score += 30
         
@@ -93,7 +228,11 @@ class ThreatDetector:
             threat_score += 25
         
         # Check for known malicious IPs
-        if await self.check_malicious_ip(ip_address):
+        if redis_checks is not None:
+            is_malicious = redis_checks['is_malicious']
+        else:
+            is_malicious = await self.check_malicious_ip(ip_address)
+        if is_malicious:
             threats.append("Known malicious IP address")
             threat_score += 50
         
@@ -105,6 +244,50 @@ class ThreatDetector:
             'timestamp': datetime.utcnow().isoformat()
         }
 
+    def match_pattern_categories(self, value: str) -> Set[str]:
+        """Return every suspicious pattern category found in a string"""
+        if self.hs_db is not None:
+            return {
+                self.pattern_categories[pattern_id]
+                for pattern_id, _ in self._hyperscan(value.encode('latin-1', 'replace'))
+            }
+        if self.combined_pattern.search(value) is None:
+            return set()
+        return {category for category, pattern in self.category_patterns.items() if pattern.search(value)}
+
+    def match_header_categories(self, headers) -> List[Tuple[str, str]]:
+        """Return (header name, category) pairs for suspicious header values"""
+        headers = list(headers)
+        if self.hs_db is None:
+            return [
+                (name, category)
+                for name, value in headers
+                for category in self.match_pattern_categories(value)
+            ]
+        
+        # Scan all values as one newline-separated buffer, then map match
+        # offsets back to the header they fall in
+        buffer = '\n'.join(value for _, value in headers).encode('latin-1', 'replace')
+        header_ends = list(accumulate(len(value) + 1 for _, value in headers))
+        found = {
+            (bisect_right(header_ends, end - 1), pattern_id)
+            for pattern_id, end in self._hyperscan(buffer)
+        }
+        return [
+            (headers[index][0], self.pattern_categories[pattern_id])
+            for index, pattern_id in sorted(found)
+        ]
+
+    def _hyperscan(self, data: bytes) -> List[Tuple[int, int]]:
+        """Scan bytes with the Hyperscan database, returning (pattern id, end offset) matches"""
+        matches = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matches.append((pattern_id, end))
+        
+        self.hs_db.scan(data, match_event_handler=on_match, scratch=self.hs_scratch)
+        return matches
+
     def get_client_ip(self, request: Request) -> str:
         """Get real client IP address"""
         # Check for forwarded headers
@@ -120,31 +303,14 @@ class ThreatDetector:
 
     def is_suspicious_user_agent(self, user_agent: str) -> bool:
         """Check for suspicious user agents"""
-        suspicious_agents = [
-            'sqlmap', 'nikto', 'nmap', 'masscan', 'zap', 'burp',
-            'python-requests', 'curl', 'wget', 'bot', 'crawler',
-            'scanner', 'exploit', 'hack'
-        ]
-        
-        user_agent_lower = user_agent.lower()
-        return any(agent in user_agent_lower for agent in suspicious_agents)
+        return SUSPICIOUS_USER_AGENT_PATTERN.search(user_agent) is not None
 
     async def check_rapid_requests(self, ip_address: str) -> bool:
         """Check for rapid request patterns"""
         key = f"requests:{ip_address}"
-        current_time = int(time.time())
-        
-        # Add current request
-        await self.redis_client.zadd(key, {current_time: current_time})
-        
-        # Remove old entries (older than 1 minute)
-        await self.redis_client.zremrangebyscore(key, 0, current_time - 60)
-        
-        # Count requests in last minute
-        request_count = await self.redis_client.zcard(key)
         
-        # Set expiry
-        await self.redis_client.expire(key, 60)
+        # Fixed one-minute window counter
+        request_count, _ = await self.fixed_window_counter(keys=[key], args=[60])
         
         return request_count > 50  # More than 50 requests per minute
 
@@ -153,18 +319,47 @@ class ThreatDetector:
         # This would integrate with a GeoIP service in production
         # For now, we'll check for private/local IPs
         try:
-            ip = ipaddress.ip_address(ip_address)
-            return ip.is_private or ip.is_loopback
-        except ValueError:
-            return True  # Invalid IP is suspicious
+            ip_int = int.from_bytes(socket.inet_pton(socket.AF_INET, ip_address), 'big')
+        except (OSError, TypeError):
+            # Not a dotted-quad IPv4 address; IPv6 goes through ipaddress
+            try:
+                ip = ipaddress.ip_address(ip_address)
+                return ip.is_private or ip.is_loopback
+            except ValueError:
+                return True  # Invalid IP is suspicious
+        
+        return any(ip_int & netmask == network for network, netmask in PRIVATE_V4)
 
     async def check_malicious_ip(self, ip_address: str) -> bool:
         """Check against known malicious IP lists"""
-        # Check our internal blacklist
-        blacklist_key = "blacklisted_ips"
-        is_blacklisted = await self.redis_client.sismember(blacklist_key, ip_address)
+        # Check our internal blacklist (served from the local copy)
+        if time.monotonic() - self.blacklist_refreshed_at > BLACKLIST_REFRESH_SECONDS:
+            await self.refresh_blacklist_cache()
         
-        return bool(is_blacklisted)
+        return ip_address in self.blacklist_cache
+
+    async def refresh_blacklist_cache(self):
+        """Reload the local blacklist copy and make sure the update listener is running"""
+        self.blacklist_cache = set(await self.redis_client.smembers(BLACKLIST_KEY))
+        self.blacklist_refreshed_at = time.monotonic()
+        
+        if self.blacklist_listener is None or self.blacklist_listener.done():
+            self.blacklist_listener = asyncio.create_task(self._listen_blacklist_updates())
+
+    async def _listen_blacklist_updates(self):
+        """Apply blacklist additions published by other workers"""
+        pubsub = self.redis_client.pubsub()
+        try:
+            await pubsub.subscribe(BLACKLIST_CHANNEL)
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    self.blacklist_cache.add(message['data'])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Blacklist update listener stopped: {e}")
+        finally:
+            await pubsub.aclose()
 
     def get_threat_level(self, threat_score: int) -> str:
         """Determine threat level based on score"""
@@ -179,94 +374,156 @@ class ThreatDetector:
         else:
             return 'none'
 
+    def queue_threat_log(self, threat_data: Dict):
+        """Queue a threat for logging without waiting on Redis"""
+        # Block critical IPs on this worker straight away; the Redis write and
+        # the notification to other workers follow with the next batch
+        if threat_data['threat_level'] == 'critical':
+            self.blacklist_cache.add(threat_data['ip_address'])
+            logger.critical(f"Critical threat detected: {threat_data}")
+        
+        try:
+            self.threat_log_queue.put_nowait((int(time.time()), threat_data))
+        except asyncio.QueueFull:
+            logger.warning(f"Threat log queue full, dropping threat from {threat_data['ip_address']}")
+            return
+        
+        if self.threat_log_writer is None or self.threat_log_writer.done():
+            self.threat_log_writer = asyncio.create_task(self._write_threat_logs())
+
+    async def _write_threat_logs(self):
+        """Drain the threat log queue, writing each batch in one pipeline"""
+        while True:
+            batch = [await self.threat_log_queue.get()]
+            while len(batch) < THREAT_LOG_BATCH_SIZE and not self.threat_log_queue.empty():
+                batch.append(self.threat_log_queue.get_nowait())
+            
+            try:
+                await self.log_threats(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} threat logs: {e}")
+
     async def log_threat(self, threat_data: Dict):
         """Log threat to Redis and potentially alert"""
-        threat_key = f"threats:{threat_data['ip_address']}:{int(time.time())}"
-        await self.redis_client.setex(threat_key, 86400, json.dumps(threat_data))  # 24 hours
-        
-        # If critical threat, add to blacklist temporarily
-        if threat_data['threat_level'] == 'critical':
-            await self.redis_client.sadd("blacklisted_ips", threat_data['ip_address'])
-            await self.redis_client.expire("blacklisted_ips", 3600)  # 1 hour blacklist
+        await self.log_threats([(int(time.time()), threat_data)])
+
+    async def log_threats(self, batch: List[Tuple[int, Dict]]):
+        """Write (unix time, threat) pairs to Redis in a single round trip"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        blacklisted = []
+        
+        for logged_at, threat_data in batch:
+            threat_key = f"threats:{threat_data['ip_address']}:{logged_at}"
+            pipe.setex(threat_key, 86400, json.dumps(threat_data))  # 24 hours
             
-            # Log critical threat
-            logger.critical(f"Critical threat detected: {threat_data}")
+            # If critical threat, add to blacklist temporarily
+            if threat_data['threat_level'] == 'critical':
+                self.blacklist_cache.add(threat_data['ip_address'])
+                blacklisted.append(threat_data['ip_address'])
+        
+        if blacklisted:
+            pipe.sadd(BLACKLIST_KEY, *blacklisted)
+            pipe.expire(BLACKLIST_KEY, 3600)  # 1 hour blacklist
+            
+            # Notify the other workers
+            for ip_address in blacklisted:
+                pipe.publish(BLACKLIST_CHANNEL, ip_address)
+        
+        await pipe.execute()
 
 class AdvancedRateLimiter:
     """Advanced rate limiting with multiple strategies"""
     
     def __init__(self):
         self.redis_client = get_redis()
+        self.fixed_window_counter = self.redis_client.register_script(FIXED_WINDOW_LUA)
     
     async def check_rate_limit(self, identifier: str, limit_type: str) -> Dict:
         """Check if request exceeds rate limit"""
-        if limit_type not in ThreatDetector().rate_limits:
+        config = RATE_LIMITS.get(limit_type)
+        if config is None:
             return {'allowed': True, 'remaining': float('inf')}
         
-        config = ThreatDetector().rate_limits[limit_type]
         key = f"rate_limit:{limit_type}:{identifier}"
-        current_time = int(time.time())
-        window_start = current_time - config['window']
         
-        # Remove old entries
-        await self.redis_client.zremrangebyscore(key, 0, window_start)
+        # Fixed-window counter: the key expires when the window ends
+        current_count, ttl = await self.fixed_window_counter(keys=[key], args=[config['window']])
         
-        # Count current requests
-        current_count = await self.redis_client.zcard(key)
-        
-        if current_count >= config['requests']:
+        return self.build_result(config, current_count, ttl)
+    
+    def build_result(self, config: Dict, current_count: int, ttl: int) -> Dict:
+        """Turn a fixed-window count and TTL into a rate limit decision"""
+        if current_count > config['requests']:
             return {
                 'allowed': False,
                 'remaining': 0,
-                'reset_time': window_start + config['window']
+                'reset_time': int(time.time()) + max(ttl, 0)
             }
         
-        # Add current request
-        await self.redis_client.zadd(key, {current_time: current_time})
-        await self.redis_client.expire(key, config['window'])
-        
         return {
             'allowed': True,
-            'remaining': config['requests'] - current_count - 1
+            'remaining': config['requests'] - current_count
         }
 
 # Middleware instances
 threat_detector = ThreatDetector()
 rate_limiter = AdvancedRateLimiter()
 
+async def run_redis_security_checks(client_ip: str, endpoint_type: str) -> Dict:
+    """Run the rapid-request and rate-limit checks in one pipelined round trip"""
+    config = RATE_LIMITS[endpoint_type]
+    
+    # Blacklist membership comes from the worker's local copy
+    is_malicious = await threat_detector.check_malicious_ip(client_ip)
+    
+    (request_count, _), (rate_count, rate_ttl) = await FIXED_WINDOW_SCRIPT.run_batch(threat_detector.redis_client, [
+        ([f"requests:{client_ip}"], [60]),
+        ([f"rate_limit:{endpoint_type}:{client_ip}"], [config['window']]),
+    ])
+    
+    return {
+        'is_malicious': is_malicious,
+        'is_rapid': request_count > 50,  # More than 50 requests per minute
+        'rate_limit': rate_limiter.build_result(config, rate_count, rate_ttl)
+    }
+
 async def advanced_security_middleware(request: Request, call_next):
     """Advanced security middleware"""
     start_time = time.time()
     
     try:
-        # Get client IP
+        # Get client IP and path once for all checks
         client_ip = threat_detector.get_client_ip(request)
+        path = request.url.path
+        
+        # Resolve the endpoint type used for rate limiting
+        endpoint_type = resolve_endpoint_type(path)
+        limit_config = RATE_LIMITS[endpoint_type]
+        
+        # Fetch all Redis-backed checks in a single round trip
+        redis_checks = await run_redis_security_checks(client_ip, endpoint_type)
         
         # Detect threats
-        threat_analysis = await threat_detector.detect_threats(request)
+        threat_analysis = await threat_detector.detect_threats(
+            request, redis_checks, url_path=path, ip_address=client_ip
+        )
         
         # Block critical threats immediately
         if threat_analysis['threat_level'] == 'critical':
-            await threat_detector.log_threat(threat_analysis)
+            threat_detector.queue_threat_log(threat_analysis)
             return JSONResponse(
                 status_code=403,
                 content={
                     "error": "Access Denied",
                     "message": "Suspicious activity detected",
-                    "threat_id": hashlib.md5(f"{client_ip}{time.time()}".encode()).hexdigest()
+                    "threat_id": hashlib.blake2b(f"{client_ip}{time.time()}".encode(), digest_size=16).hexdigest()
                 }
             )
         
         # Check rate limits
-        endpoint_type = 'api'  # Default
-        if 'login' in str(request.url.path):
-            endpoint_type = 'login'
-        elif 'register' in str(request.url.path):
-            endpoint_type = 'register'
-        elif 'payment' in str(request.url.path):
-            endpoint_type = 'payment'
-        
-        rate_limit_result = await rate_limiter.check_rate_limit(client_ip, endpoint_type)
+        rate_limit_result = redis_checks['rate_limit']
         
         if not rate_limit_result['allowed']:
             return JSONResponse(
@@ -277,7 +534,7 @@ async def advanced_security_middleware(request: Request, call_next):
                     "reset_time": rate_limit_result.get('reset_time')
                 },
                 headers={
-                    "X-RateLimit-Limit": str(ThreatDetector().rate_limits[endpoint_type]['requests']),
+                    "X-RateLimit-Limit": str(limit_config['requests']),
                     "X-RateLimit-Remaining": "0",
                     "X-RateLimit-Reset": str(rate_limit_result.get('reset_time', 0))
                 }
@@ -287,20 +544,15 @@ async def advanced_security_middleware(request: Request, call_next):
         response = await call_next(request)
         
         # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        response.raw_headers.extend(STATIC_SECURITY_HEADERS)
         
         # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(ThreatDetector().rate_limits[endpoint_type]['requests'])
+        response.headers["X-RateLimit-Limit"] = str(limit_config['requests'])
         response.headers["X-RateLimit-Remaining"] = str(rate_limit_result['remaining'])
         
         # Log high-level threats
         if threat_analysis['threat_level'] in ['high', 'medium']:
-            await threat_detector.log_threat(threat_analysis)
+            threat_detector.queue_threat_log(threat_analysis)
         
         # Add processing time
         process_time = time.time() - start_time
@@ -8,19 +8,32 @@ import hmac
 import hashlib
 import time
 from typing import Optional
+from urllib.parse import parse_qs
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import JSONResponse
+import blake3
 import logging
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Prefix of tokens signed with keyed BLAKE3; unprefixed tokens are legacy HMAC-SHA256
+TOKEN_VERSION_PREFIX = 'v2:'
+
 class CSRFProtection:
     """CSRF Protection Implementation"""
     
     def __init__(self):
         self.secret_key = getattr(settings, 'CSRF_SECRET_KEY', secrets.token_urlsafe(32))
+        # Keyed BLAKE3 prototype (32-byte key derived from the secret); copying it
+        # keeps the whole MAC in one native call per token
+        mac_key = blake3.blake3(
+            self.secret_key.encode(), derive_key_context='MEDHASAKTHI CSRF token v2'
+        ).digest()
+        self._mac_prototype = blake3.blake3(key=mac_key)
+        # Legacy HMAC-SHA256 prototype, only used to accept tokens issued before v2
+        self._hmac_prototype = hmac.new(self.secret_key.encode(), digestmod=hashlib.sha256)
         self.token_name = 'csrf_token'
         self.header_name = 'X-CSRF-Token'
         self.cookie_name = 'csrf_token'
@@ -29,14 +42,16 @@ class CSRFProtection:
         # Methods that require CSRF protection
         self.protected_methods = {'POST', 'PUT', 'PATCH', 'DELETE'}
         
-        # Paths that don't require CSRF protection
-        self.exempt_paths = {
+        # Paths that don't require CSRF protection (exact match)
+        self.exempt_paths = frozenset({
             '/api/v1/auth/login',
             '/api/v1/auth/register', 
             '/api/v1/payments/upi/webhook',  # Payment webhooks
             '/health',
             '/metrics'
-        }
+        })
+        # Path prefixes that don't require CSRF protection
+        self.exempt_prefixes = ('/static/',)
     
     def generate_token(self, session_id: str = None) -> str:
         """Generate CSRF token"""
@@ -46,14 +61,10 @@ class CSRFProtection:
         timestamp = str(int(time.time()))
         message = f"{session_id}:{timestamp}"
         
-        # Create HMAC signature
-        signature = hmac.new(
-            self.secret_key.encode(),
-            message.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        # Create keyed BLAKE3 signature
+        signature = self._sign(message)
         
-        token = f"{message}:{signature}"
+        token = f"{TOKEN_VERSION_PREFIX}{message}:{signature}"
         return token
     
     def validate_token(self, token: str, session_id: str = None) -> bool:
@@ -62,11 +73,21 @@ class CSRFProtection:
             if not token:
                 return False
             
-            parts = token.split(':')
-            if len(parts) != 3:
+            # Token layout is "v2:<session_id>:<timestamp>:<signature>"
+            # (legacy tokens have no version prefix and an HMAC signature)
+            if token.startswith(TOKEN_VERSION_PREFIX):
+                token = token[len(TOKEN_VERSION_PREFIX):]
+                sign = self._sign
+            else:
+                sign = self._sign_legacy
+            
+            message, separator, signature = token.rpartition(':')
+            if not separator:
                 return False
             
-            token_session_id, timestamp, signature = parts
+            token_session_id, separator, timestamp = message.rpartition(':')
+            if not separator:
+                return False
             
             # Check if session matches (if provided)
             if session_id and token_session_id != session_id:
@@ -79,12 +100,7 @@ class CSRFProtection:
                 return False
             
             # Verify signature
-            message = f"{token_session_id}:{timestamp}"
-            expected_signature = hmac.new(
-                self.secret_key.encode(),
-                message.encode(),
-                hashlib.sha256
-            ).hexdigest()
+            expected_signature = sign(message)
             
             return hmac.compare_digest(signature, expected_signature)
             
@@ -92,26 +108,48 @@ class CSRFProtection:
             logger.warning(f"CSRF token validation error: {e}")
             return False
     
+    def needs_refresh(self, token: str) -> bool:
+        """Check if a validated token is past half its lifetime and should be rotated"""
+        timestamp = token.rpartition(':')[0].rpartition(':')[2]
+        try:
+            return int(time.time()) - int(timestamp) > self.token_lifetime // 2
+        except ValueError:
+            return True
+    
+    def _sign(self, message: str) -> str:
+        """Keyed BLAKE3 hex signature (128-bit) of a token message"""
+        mac = self._mac_prototype.copy()
+        mac.update(message.encode())
+        return mac.hexdigest(16)
+    
+    def _sign_legacy(self, message: str) -> str:
+        """HMAC-SHA256 hex signature of a pre-v2 token message"""
+        mac = self._hmac_prototype.copy()
+        mac.update(message.encode())
+        return mac.hexdigest()
+    
     def is_exempt(self, path: str) -> bool:
         """Check if path is exempt from CSRF protection"""
-        return path in self.exempt_paths or path.startswith('/static/')
+        return path in self.exempt_paths or path.startswith(self.exempt_prefixes)
     
-    def get_token_from_request(self, request: Request) -> Optional[str]:
+    async def get_token_from_request(self, request: Request) -> Optional[str]:
         """Extract CSRF token from request"""
         # Try header first
         token = request.headers.get(self.header_name)
         if token:
             return token
         
-        # Try form data
-        if hasattr(request, 'form'):
+        # Try form data (only for urlencoded forms, so JSON and upload bodies are never parsed here).
+        # request.body() caches the bytes and Starlette replays them to the endpoint;
+        # request.form() would consume the receive stream and leave the endpoint an empty body.
+        if request.headers.get('content-type', '').startswith('application/x-www-form-urlencoded'):
             try:
-                form_data = request.form()
-                token = form_data.get(self.token_name)
+                body = await request.body()
+                token = next(iter(parse_qs(body.decode('latin-1')).get(self.token_name, ())), None)
                 if token:
                     return token
-            except:
-                pass
+            except Exception as e:
+                logger.warning(f"Could not read CSRF token from form data: {e}")
         
         # Try cookies as fallback
         token = request.cookies.get(self.cookie_name)
@@ -142,15 +180,17 @@ async def csrf_middleware(request: Request, call_next):
         
         return response
     
+    path = request.url.path
+    
     # Skip CSRF protection for exempt paths
-    if csrf_protection.is_exempt(request.url.path):
+    if csrf_protection.is_exempt(path):
         return await call_next(request)
     
     # Get CSRF token from request
-    csrf_token = csrf_protection.get_token_from_request(request)
+    csrf_token = await csrf_protection.get_token_from_request(request)
     
     if not csrf_token:
-        logger.warning(f"CSRF token missing for {request.method} {request.url.path}")
+        logger.warning(f"CSRF token missing for {request.method} {path}")
         return JSONResponse(
             status_code=403,
             content={
@@ -162,7 +202,7 @@ async def csrf_middleware(request: Request, call_next):
     
     # Validate CSRF token
     if not csrf_protection.validate_token(csrf_token):
-        logger.warning(f"Invalid CSRF token for {request.method} {request.url.path}")
+        logger.warning(f"Invalid CSRF token for {request.method} {path}")
         return JSONResponse(
             status_code=403,
             content={
@@ -175,7 +215,11 @@ async def csrf_middleware(request: Request, call_next):
     # Process request
     response = await call_next(request)
     
-    # Add new CSRF token to response
+    # Keep the client's token (double-submit) until it is half-way to expiry
+    if not csrf_protection.needs_refresh(csrf_token):
+        return response
+    
+    # Rotate the CSRF token
     new_token = csrf_protection.generate_token()
     response.headers[csrf_protection.header_name] = new_token
     response.set_cookie(
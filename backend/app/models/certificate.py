@@ -2,15 +2,18 @@
 Certificate models for MEDHASAKTHI
 """
 import uuid
+import base64
+import binascii
 from datetime import datetime
 from enum import Enum
 from sqlalchemy import (
     Column, String, Text, Boolean, DateTime, Integer, 
-    Float, JSON, ForeignKey, func, Index
+    Float, JSON, ForeignKey, func, Index, text, LargeBinary
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
-from app.core.database import Base
+from app.core.database import Base, TimestampMixin
 
 
 class CertificateType(str, Enum):
@@ -51,7 +54,39 @@ class ProfessionCategory(str, Enum):
     GENERAL = "general"
 
 
-class CertificateTemplate(Base):
+class Base64URLCode(TypeDecorator):
+    """Fixed-length random code stored as raw bytes, exposed as unpadded base64url
+    
+    Verification codes are secrets.token_urlsafe(32) strings; keeping the 32
+    raw bytes instead of the 43 character text makes the unique index smaller
+    and its comparisons plain memcmp. Strings that are not the canonical
+    encoding of exactly `length` bytes bind as NULL, so they match nothing.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def __init__(self, length: int):
+        super().__init__(length)
+        self.length = length
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        except (binascii.Error, ValueError):
+            return None
+        if len(raw) != self.length or self.process_result_value(raw, dialect) != value:
+            return None
+        return raw
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return base64.urlsafe_b64encode(value).rstrip(b"=").decode("ascii")
+
+
+class CertificateTemplate(TimestampMixin, Base):
     """Certificate templates for different professions and types"""
     __tablename__ = "certificate_templates"
     
@@ -87,10 +122,6 @@ class CertificateTemplate(Base):
     # Usage tracking
     usage_count = Column(Integer, default=0)
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    
     # Relationships
     certificates = relationship("Certificate", back_populates="template")
     
@@ -98,7 +129,7 @@ class CertificateTemplate(Base):
         return f"<CertificateTemplate(name={self.name}, category={self.profession_category})>"
 
 
-class Certificate(Base):
+class Certificate(TimestampMixin, Base):
     """Generated certificates"""
     __tablename__ = "certificates"
     
@@ -106,7 +137,7 @@ class Certificate(Base):
     
     # Certificate identification
     certificate_number = Column(String(50), unique=True, nullable=False, index=True)
-    verification_code = Column(String(100), unique=True, nullable=False, index=True)
+    verification_code = Column(Base64URLCode(32), unique=True, nullable=False, index=True)
     
     # Certificate details
     title = Column(String(300), nullable=False)
@@ -150,21 +181,27 @@ class Certificate(Base):
     valid_from = Column(DateTime(timezone=True))
     valid_until = Column(DateTime(timezone=True))
     
-    # Timestamps
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     issued_at = Column(DateTime(timezone=True))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     template = relationship("CertificateTemplate", back_populates="certificates")
     student = relationship("Student")
     institute = relationship("Institute")
     
+    # Server defaults (timestamps) are loaded on access rather than returned
+    # from every INSERT, so bulk generation can batch its inserts
+    __mapper_args__ = {'eager_defaults': False}
+    
     # Indexes for performance
+    # (verification lookups use the unique verification_code index; the
+    # status/date index only covers certificates that can be verified)
     __table_args__ = (
         Index('idx_certificate_recipient', 'recipient_email', 'institute_id'),
-        Index('idx_certificate_status_date', 'status', 'issued_at'),
-        Index('idx_certificate_verification', 'verification_code', 'status'),
+        Index(
+            'idx_certificate_status_date', 'status', 'issued_at',
+            postgresql_where=text("status IN ('generated', 'issued')")
+        ),
     )
     
     def __repr__(self):
@@ -3,13 +3,17 @@ Independent Learner Models for MEDHASAKTHI
 For individuals registering outside of institutions
 """
 import uuid
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Date, Text, JSON, Enum as SQLEnum, ForeignKey, Numeric
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, Boolean, DateTime, Date, Text, ForeignKey, Numeric, Index,
+    CheckConstraint, Computed, DDL, event, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
 
-from app.core.database import Base
+from app.core.database import Base, TimestampMixin, JSONDocument, ValueEnum, set_fillfactor
+from app.core.ids import uuid7
 
 
 class Gender(str, Enum):
@@ -45,7 +49,7 @@ class EducationLevel(str, Enum):
     PROFESSIONAL = "professional"
 
 
-class IndependentLearner(Base):
+class IndependentLearner(TimestampMixin, Base):
     """Independent learner profile for non-institutional users"""
     __tablename__ = "independent_learners"
     
@@ -59,7 +63,7 @@ class IndependentLearner(Base):
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     date_of_birth = Column(Date)
-    gender = Column(SQLEnum(Gender))
+    gender = Column(ValueEnum(Gender, 'gender'))
     nationality = Column(String(50))
     
     # Contact Information
@@ -73,8 +77,8 @@ class IndependentLearner(Base):
     postal_code = Column(String(20))
     
     # Professional Information
-    category = Column(SQLEnum(LearnerCategory), nullable=False)
-    education_level = Column(SQLEnum(EducationLevel), nullable=False)
+    category = Column(ValueEnum(LearnerCategory, 'learner_category'), nullable=False)
+    education_level = Column(ValueEnum(EducationLevel, 'education_level'), nullable=False)
     current_occupation = Column(String(200))
     organization_name = Column(String(200))
     work_experience_years = Column(Integer, default=0)
@@ -88,9 +92,9 @@ class IndependentLearner(Base):
     percentage_cgpa = Column(String(20))
     
     # Learning Preferences
-    preferred_subjects = Column(JSON)  # Array of subjects interested in
+    preferred_subjects = Column(JSONDocument)  # Array of subjects interested in
     learning_goals = Column(Text)  # What they want to achieve
-    preferred_exam_types = Column(JSON)  # Types of exams they're interested in
+    preferred_exam_types = Column(JSONDocument)  # Types of exams they're interested in
     study_time_availability = Column(String(50))  # Hours per week
     preferred_language = Column(String(50), default="English")
     
@@ -119,22 +123,30 @@ class IndependentLearner(Base):
     referred_by_code = Column(String(20))  # Who referred them
     referral_bonus_earned = Column(Numeric(10, 2), default=0)
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     last_activity_at = Column(DateTime(timezone=True))
     
     # Relationships
-    user = relationship("User", back_populates="independent_learner_profile")
+    # One-to-one, so it rides along in the learner SELECT; the collections stay
+    # lazy and query sites eager-load them (and their programs) when iterating
+    user = relationship("User", back_populates="independent_learner_profile", lazy="joined")
     exam_registrations = relationship("IndependentExamRegistration", back_populates="learner")
     certificates = relationship("IndependentCertificate", back_populates="learner")
     payments = relationship("IndependentPayment", back_populates="learner")
     
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_independent_learner_category_active', 'category', postgresql_where=text("is_active")),
+        Index('idx_independent_learner_subscription_end', 'subscription_type', 'subscription_end_date'),
+        # Lets revenue reports read location through an index-only scan instead of wide heap rows
+        Index('idx_independent_learner_location', 'id', postgresql_include=['country', 'state', 'city']),
+    )
+    
     def __repr__(self):
         return f"<IndependentLearner {self.learner_id}: {self.first_name} {self.last_name}>"
 
 
-class CertificationProgram(Base):
+class CertificationProgram(TimestampMixin, Base):
     """Certification programs available for independent learners"""
     __tablename__ = "certification_programs"
     
@@ -154,11 +166,11 @@ class CertificationProgram(Base):
     validity_months = Column(Integer, default=24)  # Certificate validity
     
     # Eligibility Criteria
-    min_education_level = Column(SQLEnum(EducationLevel))
+    min_education_level = Column(ValueEnum(EducationLevel, 'education_level'))
     min_age = Column(Integer, default=16)
     max_age = Column(Integer)
-    prerequisites = Column(JSON)  # Array of prerequisite skills/certifications
-    target_audience = Column(JSON)  # Array of target learner categories
+    prerequisites = Column(JSONDocument)  # Array of prerequisite skills/certifications
+    target_audience = Column(JSONDocument)  # Array of target learner categories
     
     # Pricing Configuration
     base_price = Column(Numeric(10, 2), nullable=False)
@@ -166,8 +178,8 @@ class CertificationProgram(Base):
     currency = Column(String(10), default="INR")
     
     # Category-based Pricing
-    pricing_tiers = Column(JSON)  # Different prices for different learner categories
-    bulk_discount_config = Column(JSON)  # Bulk purchase discounts
+    pricing_tiers = Column(JSONDocument)  # Different prices for different learner categories
+    bulk_discount_config = Column(JSONDocument)  # Bulk purchase discounts
     referral_discount_percent = Column(Integer, default=0)
     
     # Exam Configuration
@@ -178,10 +190,10 @@ class CertificationProgram(Base):
     retake_fee = Column(Numeric(10, 2))
     
     # Content & Resources
-    study_materials = Column(JSON)  # Links to study resources
+    study_materials = Column(JSONDocument)  # Links to study resources
     practice_tests_count = Column(Integer, default=5)
     video_lectures_hours = Column(Integer, default=0)
-    downloadable_resources = Column(JSON)
+    downloadable_resources = Column(JSONDocument)
     
     # Program Status
     is_active = Column(Boolean, default=True)
@@ -193,11 +205,11 @@ class CertificationProgram(Base):
     total_enrollments = Column(Integer, default=0)
     total_certifications = Column(Integer, default=0)
     average_score = Column(Numeric(5, 2), default=0)
-    success_rate = Column(Numeric(5, 2), default=0)
+    success_rate = Column(Numeric(5, 2), Computed(
+        "CAST(total_certifications AS NUMERIC) * 100 / NULLIF(total_enrollments, 0)", persisted=True
+    ))
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     
     # Relationships
     registrations = relationship("IndependentExamRegistration", back_populates="program")
@@ -207,11 +219,11 @@ class CertificationProgram(Base):
         return f"<CertificationProgram {self.program_code}: {self.title}>"
 
 
-class IndependentExamRegistration(Base):
+class IndependentExamRegistration(TimestampMixin, Base):
     """Exam registrations for independent learners"""
     __tablename__ = "independent_exam_registrations"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     learner_id = Column(UUID(as_uuid=True), ForeignKey("independent_learners.id"), nullable=False)
     program_id = Column(UUID(as_uuid=True), ForeignKey("certification_programs.id"), nullable=False)
     
@@ -236,31 +248,40 @@ class IndependentExamRegistration(Base):
     exam_completed_at = Column(DateTime(timezone=True))
     
     # Results
-    score_obtained = Column(Integer)
-    total_score = Column(Integer)
-    percentage = Column(Numeric(5, 2))
+    score_obtained = Column(SmallInteger)
+    total_score = Column(SmallInteger)
+    # Derived by the database so it always matches the raw scores
+    percentage = Column(Numeric(5, 2), Computed(
+        "CAST(score_obtained AS NUMERIC) * 100 / NULLIF(total_score, 0)", persisted=True
+    ))
     result = Column(String(20))  # pass, fail
     grade = Column(String(10))  # A+, A, B+, B, C, F
     
     # Proctoring Information
     proctoring_enabled = Column(Boolean, default=True)
-    proctoring_violations = Column(JSON)  # Array of violation records
-    proctoring_score = Column(Integer)  # Integrity score out of 100
+    proctoring_violations = Column(JSONDocument)  # Array of violation records
+    proctoring_score = Column(SmallInteger)  # Integrity score out of 100
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     
     # Relationships
     learner = relationship("IndependentLearner", back_populates="exam_registrations")
     program = relationship("CertificationProgram", back_populates="registrations")
     certificate = relationship("IndependentCertificate", back_populates="registration", uselist=False)
     
+    # Indexes for performance, plus the score bound the generated percentage relies on
+    # (upcoming exams only ever look at registrations still in "registered")
+    __table_args__ = (
+        Index('idx_independent_registration_learner_exam_date', 'learner_id', 'exam_date'),
+        Index('idx_independent_registration_upcoming', 'exam_date', postgresql_where=text("status = 'registered'")),
+        CheckConstraint('score_obtained <= total_score', name='score_within_total'),
+    )
+    
     def __repr__(self):
         return f"<IndependentExamRegistration {self.registration_number}>"
 
 
-class IndependentCertificate(Base):
+class IndependentCertificate(TimestampMixin, Base):
     """Certificates issued to independent learners"""
     __tablename__ = "independent_certificates"
     
@@ -295,24 +316,22 @@ class IndependentCertificate(Base):
     revocation_reason = Column(String(200))
     revoked_at = Column(DateTime(timezone=True))
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     
     # Relationships
     learner = relationship("IndependentLearner", back_populates="certificates")
     program = relationship("CertificationProgram", back_populates="certificates")
-    registration = relationship("IndependentExamRegistration", back_populates="certificate")
+    registration = relationship("IndependentExamRegistration", back_populates="certificate", lazy="joined")
     
     def __repr__(self):
         return f"<IndependentCertificate {self.certificate_number}>"
 
 
-class IndependentPayment(Base):
+class IndependentPayment(TimestampMixin, Base):
     """Payment records for independent learners"""
     __tablename__ = "independent_payments"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     learner_id = Column(UUID(as_uuid=True), ForeignKey("independent_learners.id"), nullable=False)
     
     # Payment Information
@@ -335,7 +354,7 @@ class IndependentPayment(Base):
     billing_name = Column(String(200))
     billing_email = Column(String(200))
     billing_phone = Column(String(20))
-    billing_address = Column(JSON)
+    billing_address = Column(JSONDocument)
     
     # Transaction Details
     initiated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -349,12 +368,51 @@ class IndependentPayment(Base):
     refund_reason = Column(String(500))
     refunded_at = Column(DateTime(timezone=True))
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     
     # Relationships
     learner = relationship("IndependentLearner", back_populates="payments")
     
+    # Indexes for performance
+    # (created_at grows with insertion order, so a BRIN index covers audit range scans)
+    __table_args__ = (
+        Index('idx_independent_payment_pending', 'initiated_at', postgresql_where=text("status = 'pending'")),
+        Index('idx_independent_payment_created_brin', 'created_at', postgresql_using='brin'),
+    )
+    
     def __repr__(self):
         return f"<IndependentPayment {self.payment_id}: {self.amount} {self.currency}>"
+
+
+# Learner, registration and payment rows are updated in place through their
+# lifecycle (status, activity, payment state)
+UPDATE_HEAVY_FILLFACTOR = 85
+for _model in (IndependentLearner, IndependentExamRegistration, IndependentPayment):
+    set_fillfactor(_model.__table__, UPDATE_HEAVY_FILLFACTOR)
+
+
+# Per-program daily revenue read by the revenue report (same definition as
+# migration 012), built with the registrations table so create_tables()
+# installs match migrated ones
+CREATE_PROGRAM_REVENUE_VIEW = DDL("""
+CREATE MATERIALIZED VIEW IF NOT EXISTS program_revenue_mv AS
+SELECT program_id,
+       date_trunc('day', payment_date) AS day,
+       SUM(amount_paid) AS revenue,
+       COUNT(*) AS registrations
+FROM independent_exam_registrations
+WHERE payment_status = 'paid' AND payment_date IS NOT NULL
+GROUP BY 1, 2
+WITH DATA
+""")
+# A unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE_PROGRAM_REVENUE_VIEW_INDEX = DDL(
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_program_revenue_mv_program_day ON program_revenue_mv (program_id, day)"
+)
+
+_registrations = IndependentExamRegistration.__table__
+event.listen(_registrations, "after_create", CREATE_PROGRAM_REVENUE_VIEW.execute_if(dialect="postgresql"))
+event.listen(_registrations, "after_create", CREATE_PROGRAM_REVENUE_VIEW_INDEX.execute_if(dialect="postgresql"))
+event.listen(_registrations, "before_drop", DDL(
+    "DROP MATERIALIZED VIEW IF EXISTS program_revenue_mv"
+).execute_if(dialect="postgresql"))
@@ -3,12 +3,14 @@ Pricing Configuration Models for MEDHASAKTHI
 Super admin configurable pricing for independent learners
 """
 import uuid
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Date, Text, JSON, Enum as SQLEnum, Numeric
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Date, Text, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from enum import Enum
 
-from app.core.database import Base
+from app.core.database import Base, TimestampMixin, JSONDocument, ValueEnum
+from app.core.ids import ServerUUIDv7Mixin
+from app.core.partitioning import partition_by_month
 
 
 class PricingTier(str, Enum):
@@ -27,7 +29,7 @@ class DiscountType(str, Enum):
     BULK_DISCOUNT = "bulk_discount"
 
 
-class GlobalPricingConfig(Base):
+class GlobalPricingConfig(TimestampMixin, Base):
     """Global pricing configuration managed by super admin"""
     __tablename__ = "global_pricing_config"
     
@@ -45,8 +47,8 @@ class GlobalPricingConfig(Base):
     
     # Currency Configuration
     primary_currency = Column(String(10), default="INR")
-    supported_currencies = Column(JSON)  # ["INR", "USD", "EUR"]
-    currency_conversion_rates = Column(JSON)  # Exchange rates
+    supported_currencies = Column(JSONDocument)  # ["INR", "USD", "EUR"]
+    currency_conversion_rates = Column(JSONDocument)  # Exchange rates
     
     # Category-based Pricing Multipliers
     student_multiplier = Column(Numeric(5, 2), default=0.7)  # 30% discount for students
@@ -55,25 +57,25 @@ class GlobalPricingConfig(Base):
     premium_multiplier = Column(Numeric(5, 2), default=1.5)  # 50% premium
     
     # Geographic Pricing
-    country_pricing_multipliers = Column(JSON)  # Country-specific pricing
-    state_pricing_multipliers = Column(JSON)  # State-specific pricing (for India)
-    city_tier_multipliers = Column(JSON)  # Tier 1, 2, 3 city pricing
+    country_pricing_multipliers = Column(JSONDocument)  # Country-specific pricing
+    state_pricing_multipliers = Column(JSONDocument)  # State-specific pricing (for India)
+    city_tier_multipliers = Column(JSONDocument)  # Tier 1, 2, 3 city pricing
     
     # Volume Discounts
-    bulk_discount_config = Column(JSON)  # Bulk purchase discounts
+    bulk_discount_config = Column(JSONDocument)  # Bulk purchase discounts
     referral_discount_percent = Column(Integer, default=10)
-    loyalty_discount_config = Column(JSON)  # Loyalty program discounts
+    loyalty_discount_config = Column(JSONDocument)  # Loyalty program discounts
     
     # Seasonal Pricing
-    seasonal_discounts = Column(JSON)  # Festival/seasonal discounts
-    promotional_campaigns = Column(JSON)  # Active promotional campaigns
+    seasonal_discounts = Column(JSONDocument)  # Festival/seasonal discounts
+    promotional_campaigns = Column(JSONDocument)  # Active promotional campaigns
     
     # Payment Gateway Charges
-    gateway_charges_config = Column(JSON)  # Payment gateway specific charges
+    gateway_charges_config = Column(JSONDocument)  # Payment gateway specific charges
     convenience_fee_percent = Column(Numeric(5, 2), default=2.0)
     
     # Tax Configuration
-    tax_config = Column(JSON)  # GST/VAT configuration by region
+    tax_config = Column(JSONDocument)  # GST/VAT configuration by region
     tax_inclusive_pricing = Column(Boolean, default=True)
     
     # Status and Validity
@@ -87,15 +89,21 @@ class GlobalPricingConfig(Base):
     approval_status = Column(String(20), default="draft")  # draft, approved, active, archived
     approval_date = Column(DateTime(timezone=True))
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
+    
+    # Indexes for performance (containment lookups such as multipliers @> '{"IN": ...}')
+    __table_args__ = (
+        Index('idx_global_pricing_country_multipliers', 'country_pricing_multipliers',
+              postgresql_using='gin', postgresql_ops={'country_pricing_multipliers': 'jsonb_path_ops'}),
+        Index('idx_global_pricing_tax_config', 'tax_config',
+              postgresql_using='gin', postgresql_ops={'tax_config': 'jsonb_path_ops'}),
+    )
     
     def __repr__(self):
         return f"<GlobalPricingConfig {self.config_name} v{self.config_version}>"
 
 
-class ProgramPricingOverride(Base):
+class ProgramPricingOverride(TimestampMixin, Base):
     """Program-specific pricing overrides"""
     __tablename__ = "program_pricing_overrides"
     
@@ -117,13 +125,13 @@ class ProgramPricingOverride(Base):
     premium_price_override = Column(Numeric(10, 2))
     
     # Special Pricing Rules
-    early_bird_discount = Column(JSON)  # Early registration discounts
-    group_discount_config = Column(JSON)  # Group registration discounts
-    corporate_pricing = Column(JSON)  # Corporate bulk pricing
+    early_bird_discount = Column(JSONDocument)  # Early registration discounts
+    group_discount_config = Column(JSONDocument)  # Group registration discounts
+    corporate_pricing = Column(JSONDocument)  # Corporate bulk pricing
     
     # Geographic Overrides
-    country_specific_pricing = Column(JSON)
-    region_specific_pricing = Column(JSON)
+    country_specific_pricing = Column(JSONDocument)
+    region_specific_pricing = Column(JSONDocument)
     
     # Validity
     valid_from = Column(DateTime(timezone=True), nullable=False)
@@ -135,15 +143,13 @@ class ProgramPricingOverride(Base):
     approved_by = Column(String(100))
     approval_status = Column(String(20), default="draft")
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
     
     def __repr__(self):
         return f"<ProgramPricingOverride {self.override_name}>"
 
 
-class DiscountCoupon(Base):
+class DiscountCoupon(TimestampMixin, Base):
     """Discount coupons for independent learners"""
     __tablename__ = "discount_coupons"
     
@@ -155,7 +161,7 @@ class DiscountCoupon(Base):
     description = Column(Text)
     
     # Discount Configuration
-    discount_type = Column(SQLEnum(DiscountType), nullable=False)
+    discount_type = Column(ValueEnum(DiscountType, 'discount_type'), nullable=False)
     discount_value = Column(Numeric(10, 2), nullable=False)  # Percentage or amount
     max_discount_amount = Column(Numeric(10, 2))  # Cap for percentage discounts
     min_order_amount = Column(Numeric(10, 2))  # Minimum order for coupon
@@ -171,9 +177,9 @@ class DiscountCoupon(Base):
     is_active = Column(Boolean, default=True)
     
     # Targeting
-    applicable_programs = Column(JSON)  # Specific programs
-    applicable_categories = Column(JSON)  # Learner categories
-    applicable_countries = Column(JSON)  # Geographic targeting
+    applicable_programs = Column(JSONDocument)  # Specific programs
+    applicable_categories = Column(JSONDocument)  # Learner categories
+    applicable_countries = Column(JSONDocument)  # Geographic targeting
     first_time_users_only = Column(Boolean, default=False)
     
     # Coupon Type
@@ -189,19 +195,25 @@ class DiscountCoupon(Base):
     approved_by = Column(String(100))
     approval_status = Column(String(20), default="draft")
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Timestamps (created_at/updated_at come from TimestampMixin)
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_discount_coupon_active_window', 'is_active', 'valid_from', 'valid_until'),
+        Index('idx_discount_coupon_programs', 'applicable_programs',
+              postgresql_using='gin', postgresql_ops={'applicable_programs': 'jsonb_path_ops'}),
+        Index('idx_discount_coupon_categories', 'applicable_categories',
+              postgresql_using='gin', postgresql_ops={'applicable_categories': 'jsonb_path_ops'}),
+    )
     
     def __repr__(self):
         return f"<DiscountCoupon {self.coupon_code}>"
 
 
-class CouponUsage(Base):
+class CouponUsage(ServerUUIDv7Mixin, Base):
     """Track coupon usage by learners"""
     __tablename__ = "coupon_usage"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     coupon_id = Column(UUID(as_uuid=True), nullable=False)
     learner_id = Column(UUID(as_uuid=True), nullable=False)
     
@@ -219,19 +231,26 @@ class CouponUsage(Base):
     user_agent = Column(String(500))
     ip_address = Column(String(50))
     
-    # Timestamps
-    used_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Timestamps (partition key, so part of the primary key)
+    used_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    
+    # Partitioned by month; BRIN suits the append-only timestamp within each partition
+    __table_args__ = (
+        Index('idx_coupon_usage_used_at_brin', 'used_at', postgresql_using='brin'),
+        {'postgresql_partition_by': 'RANGE (used_at)'},
+    )
     
     def __repr__(self):
         return f"<CouponUsage {self.coupon_id} by {self.learner_id}>"
 
 
-class PricingAuditLog(Base):
+partition_by_month(CouponUsage.__table__, "used_at")
+
+
+class PricingAuditLog(ServerUUIDv7Mixin, Base):
     """Audit log for pricing changes"""
     __tablename__ = "pricing_audit_log"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    
     # Change Information
     entity_type = Column(String(50), nullable=False)  # global_config, program_override, coupon
     entity_id = Column(UUID(as_uuid=True), nullable=False)
@@ -250,23 +269,30 @@ class PricingAuditLog(Base):
     user_agent = Column(String(500))
     
     # Impact Analysis
-    affected_programs = Column(JSON)  # Programs affected by change
+    affected_programs = Column(JSONDocument)  # Programs affected by change
     estimated_revenue_impact = Column(Numeric(15, 2))
     affected_learners_count = Column(Integer)
     
-    # Timestamps
-    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Timestamps (partition key, so part of the primary key)
+    changed_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    
+    # Partitioned by month; BRIN suits the append-only timestamp within each partition
+    __table_args__ = (
+        Index('idx_pricing_audit_log_changed_at_brin', 'changed_at', postgresql_using='brin'),
+        {'postgresql_partition_by': 'RANGE (changed_at)'},
+    )
     
     def __repr__(self):
         return f"<PricingAuditLog {self.action} on {self.entity_type}>"
 
 
-class RevenueReport(Base):
+partition_by_month(PricingAuditLog.__table__, "changed_at")
+
+
+class RevenueReport(ServerUUIDv7Mixin, Base):
     """Revenue reporting and analytics"""
     __tablename__ = "revenue_reports"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    
     # Report Information
     report_name = Column(String(100), nullable=False)
     report_type = Column(String(50), nullable=False)  # daily, weekly, monthly, quarterly, yearly
@@ -296,17 +322,17 @@ class RevenueReport(Base):
     enterprise_revenue = Column(Numeric(15, 2), default=0)
     
     # Geographic Breakdown
-    country_wise_revenue = Column(JSON)
-    state_wise_revenue = Column(JSON)
-    city_wise_revenue = Column(JSON)
+    country_wise_revenue = Column(JSONDocument)
+    state_wise_revenue = Column(JSONDocument)
+    city_wise_revenue = Column(JSONDocument)
     
     # Program Performance
-    top_performing_programs = Column(JSON)
-    program_wise_revenue = Column(JSON)
+    top_performing_programs = Column(JSONDocument)
+    program_wise_revenue = Column(JSONDocument)
     
     # Payment Analytics
-    payment_method_breakdown = Column(JSON)
-    gateway_wise_revenue = Column(JSON)
+    payment_method_breakdown = Column(JSONDocument)
+    gateway_wise_revenue = Column(JSONDocument)
     refund_amount = Column(Numeric(15, 2), default=0)
     
     # Report Status
@@ -1,14 +1,16 @@
 """
 Question and exam-related database models
 """
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Text, ForeignKey, Float, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, SmallInteger, Text, ForeignKey, Float, Index, CheckConstraint, event, false, insert, inspect, lambda_stmt, select, text, update
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
-import uuid
 from enum import Enum
+from typing import Dict, Optional, Sequence
 
-from app.core.database import Base
+from app.core.database import Base, JSONDocument, ValueEnum
+from app.core.hierarchy import materialized_path
+from app.core.ids import uuid7
 
 
 class QuestionType(str, Enum):
@@ -44,24 +46,30 @@ class Subject(Base):
     """Academic subjects"""
     __tablename__ = "subjects"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     name = Column(String(100), nullable=False, unique=True)
     code = Column(String(20), nullable=False, unique=True)
     description = Column(Text)
     
     # Hierarchy
     parent_subject_id = Column(UUID(as_uuid=True), ForeignKey("subjects.id"))
-    level = Column(Integer, default=0)  # 0=main subject, 1=sub-subject, etc.
+    level = Column(SmallInteger, default=0)  # 0=main subject, 1=sub-subject, etc.
+    path = Column(Text)  # Codes from the root down, e.g. "SCI/PHY/MECH" (see app.core.hierarchy)
     
     # Metadata
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    parent = relationship("Subject", remote_side=[id])
+    parent = relationship("Subject", remote_side=[id], back_populates="children")
     children = relationship("Subject", back_populates="parent")
     questions = relationship("Question", back_populates="subject")
     
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_subjects_path', 'path', postgresql_ops={'path': 'text_pattern_ops'}),
+    )
+    
     def __repr__(self):
         return f"<Subject(code={self.code}, name={self.name})>"
 
@@ -70,14 +78,14 @@ class Topic(Base):
     """Topics within subjects"""
     __tablename__ = "topics"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     subject_id = Column(UUID(as_uuid=True), ForeignKey("subjects.id"), nullable=False)
     name = Column(String(200), nullable=False)
     description = Column(Text)
     
     # Learning objectives
-    learning_objectives = Column(JSON)  # Array of learning objectives
-    prerequisites = Column(JSON)  # Array of prerequisite topics
+    learning_objectives = Column(JSONDocument)  # Array of learning objectives
+    prerequisites = Column(JSONDocument)  # Array of prerequisite topics
     
     # Metadata
     is_active = Column(Boolean, default=True)
@@ -95,48 +103,58 @@ class Question(Base):
     """Questions in the question bank"""
     __tablename__ = "questions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Content
     question_text = Column(Text, nullable=False)
-    question_type = Column(String(50), nullable=False, index=True)
-    difficulty_level = Column(String(20), nullable=False, index=True)
+    question_type = Column(ValueEnum(QuestionType, 'question_type'), nullable=False)
+    difficulty_level = Column(ValueEnum(DifficultyLevel, 'difficulty_level'), nullable=False, index=True)
     
     # Academic classification
     subject_id = Column(UUID(as_uuid=True), ForeignKey("subjects.id"), nullable=False)
     topic_id = Column(UUID(as_uuid=True), ForeignKey("topics.id"))
     grade_level = Column(String(20))
     
+    # Copies of the subject/topic labels so listings never join subjects/topics
+    # (kept in sync by the listeners at the bottom of this module)
+    subject_code = Column(String(20), index=True)
+    subject_name = Column(String(100))
+    topic_name = Column(String(200))
+    
     # Question data
-    options = Column(JSON)  # For MCQ: [{"id": "A", "text": "Option A", "is_correct": false}]
+    options = Column(JSONDocument)  # For MCQ: [{"id": "A", "text": "Option A", "is_correct": false}]
     correct_answer = Column(Text)  # For non-MCQ questions
     explanation = Column(Text)  # Detailed explanation
-    hints = Column(JSON)  # Array of hints
+    hints = Column(JSONDocument)  # Array of hints
     
     # Media
     image_url = Column(String(500))
     audio_url = Column(String(500))
     video_url = Column(String(500))
-    attachments = Column(JSON)  # Array of attachment URLs
+    attachments = deferred(Column(JSONDocument))  # Array of attachment URLs
     
     # AI Generation metadata
-    ai_generated = Column(Boolean, default=False)
+    # (the prompt and raw metadata are only read when auditing a generation,
+    # so they and attachments are left out of every SELECT until accessed)
+    ai_generated = Column(Boolean, server_default=false())
     ai_model_used = Column(String(100))  # e.g., "gpt-4", "claude-3"
-    generation_prompt = Column(Text)  # Prompt used for generation
-    generation_metadata = Column(JSON)  # Additional AI metadata
+    generation_prompt = deferred(Column(Text), group="generation")  # Prompt used for generation
+    generation_metadata = deferred(Column(JSONDocument), group="generation")  # Additional AI metadata
+    generation_id = Column(UUID(as_uuid=True), ForeignKey("ai_question_generations.id"), index=True)
     
     # Quality metrics
-    quality_score = Column(Float, default=0.0)  # 0-100 quality score
-    difficulty_score = Column(Float, default=0.0)  # Calculated difficulty
-    discrimination_index = Column(Float, default=0.0)  # How well it discriminates
+    # (these defaults are server-side so bulk INSERTs don't send them per row)
+    quality_score = Column(Float, server_default=text('0'))  # 0-100 quality score
+    difficulty_score = Column(Float, server_default=text('0'))  # Calculated difficulty
+    discrimination_index = Column(Float, server_default=text('0'))  # How well it discriminates
     
     # Usage statistics
-    times_used = Column(Integer, default=0)
-    times_correct = Column(Integer, default=0)
-    average_time_taken = Column(Float, default=0.0)  # In seconds
+    times_used = Column(Integer, server_default=text('0'))
+    times_correct = Column(Integer, server_default=text('0'))
+    average_time_taken = Column(Float, server_default=text('0'))  # In seconds
     
     # Status and approval
-    status = Column(String(20), default=QuestionStatus.DRAFT.value, index=True)
+    status = Column(ValueEnum(QuestionStatus, 'question_status'), server_default=text("'draft'"))
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     reviewed_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     approved_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -152,11 +170,37 @@ class Question(Base):
     keywords = Column(ARRAY(String))  # Array of keywords for search
     
     # Relationships
-    subject = relationship("Subject", back_populates="questions")
-    topic = relationship("Topic", back_populates="questions")
-    creator = relationship("User", foreign_keys=[created_by])
-    reviewer = relationship("User", foreign_keys=[reviewed_by])
-    approver = relationship("User", foreign_keys=[approved_by])
+    # (never lazy loaded: listings read the denormalized labels above, anything
+    # else asks for the relation explicitly with selectinload/joinedload)
+    subject = relationship("Subject", back_populates="questions", lazy="raise_on_sql")
+    topic = relationship("Topic", back_populates="questions", lazy="raise_on_sql")
+    creator = relationship("User", foreign_keys=[created_by], lazy="raise_on_sql")
+    reviewer = relationship("User", foreign_keys=[reviewed_by], lazy="raise_on_sql")
+    approver = relationship("User", foreign_keys=[approved_by], lazy="raise_on_sql")
+    generation = relationship("AIQuestionGeneration", back_populates="generated_questions", lazy="raise_on_sql")
+    
+    # Server defaults (timestamps) are loaded on access rather than returned
+    # from every INSERT, so generated questions can be inserted in one batch
+    __mapper_args__ = {'eager_defaults': False}
+    
+    # Indexes for performance: subject/topic listings filtered by status (and
+    # difficulty) newest first, a partial index for the approved questions most
+    # reads target, containment lookups such as generation_metadata @> '{"model": ...}'
+    # and tag/keyword overlap such as tags && ARRAY[...]
+    __table_args__ = (
+        Index('idx_q_subject_status_diff_created', 'subject_id', 'status', 'difficulty_level', 'created_at',
+              postgresql_include=['quality_score']),
+        Index('idx_q_topic_status_created', 'topic_id', 'status', 'created_at'),
+        Index('idx_q_active_approved', 'subject_id', 'difficulty_level', 'created_at',
+              postgresql_where=text("status = 'approved'")),
+        Index('idx_questions_generation_metadata', 'generation_metadata',
+              postgresql_using='gin', postgresql_ops={'generation_metadata': 'jsonb_path_ops'}),
+        Index('idx_questions_tags_gin', 'tags', postgresql_using='gin'),
+        Index('idx_questions_keywords_gin', 'keywords', postgresql_using='gin'),
+        # Value domains (status/type/difficulty are already bounded by their enum types)
+        CheckConstraint('quality_score BETWEEN 0 AND 100', name='quality_score_range'),
+        CheckConstraint('times_correct <= times_used', name='correct_within_used'),
+    )
     
     def __repr__(self):
         return f"<Question(id={self.id}, type={self.question_type}, difficulty={self.difficulty_level})>"
@@ -166,7 +210,7 @@ class QuestionBank(Base):
     """Question banks for organizing questions"""
     __tablename__ = "question_banks"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text)
     
@@ -181,17 +225,18 @@ class QuestionBank(Base):
     
     # Metadata
     total_questions = Column(Integer, default=0)
-    subjects_covered = Column(JSON)  # Array of subject IDs
-    difficulty_distribution = Column(JSON)  # Distribution of difficulty levels
+    subjects_covered = Column(JSONDocument)  # Array of subject IDs
+    difficulty_distribution = Column(JSONDocument)  # Distribution of difficulty levels
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    institute = relationship("Institute")
-    creator = relationship("User")
-    questions = relationship("Question", secondary="question_bank_questions")
+    # (never lazy loaded; use selectinload(QuestionBank.questions) and friends)
+    institute = relationship("Institute", lazy="raise_on_sql")
+    creator = relationship("User", lazy="raise_on_sql")
+    questions = relationship("Question", secondary="question_bank_questions", lazy="raise_on_sql")
     
     def __repr__(self):
         return f"<QuestionBank(name={self.name}, questions={self.total_questions})>"
@@ -201,9 +246,9 @@ class QuestionBankQuestion(Base):
     """Many-to-many relationship between question banks and questions"""
     __tablename__ = "question_bank_questions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    question_bank_id = Column(UUID(as_uuid=True), ForeignKey("question_banks.id"), nullable=False)
-    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
+    # The pair is the primary key; a surrogate id would only add a third index
+    question_bank_id = Column(UUID(as_uuid=True), ForeignKey("question_banks.id"), primary_key=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), primary_key=True)
     
     # Metadata
     added_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -213,13 +258,22 @@ class QuestionBankQuestion(Base):
     question_bank = relationship("QuestionBank")
     question = relationship("Question")
     added_by_user = relationship("User")
+    
+    # Indexes for performance
+    # (the primary key serves bank -> questions; this serves question -> banks)
+    __table_args__ = (
+        Index('idx_qbq_question', 'question_id', 'question_bank_id'),
+    )
+    
+    # added_at is loaded on access, so bank links can be inserted in one batch
+    __mapper_args__ = {'eager_defaults': False}
 
 
 class AIQuestionGeneration(Base):
     """Track AI question generation requests and results"""
     __tablename__ = "ai_question_generations"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Request details
     requested_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -228,14 +282,14 @@ class AIQuestionGeneration(Base):
     # Generation parameters
     subject_id = Column(UUID(as_uuid=True), ForeignKey("subjects.id"), nullable=False)
     topic_id = Column(UUID(as_uuid=True), ForeignKey("topics.id"))
-    question_type = Column(String(50), nullable=False)
-    difficulty_level = Column(String(20), nullable=False)
+    question_type = Column(ValueEnum(QuestionType, 'question_type'), nullable=False)
+    difficulty_level = Column(ValueEnum(DifficultyLevel, 'difficulty_level'), nullable=False)
     count_requested = Column(Integer, nullable=False)
     
     # AI configuration
     ai_model = Column(String(100), nullable=False)  # e.g., "gpt-4", "claude-3"
     prompt_template = Column(Text)
-    generation_parameters = Column(JSON)  # Temperature, max_tokens, etc.
+    generation_parameters = Column(JSONDocument)  # Temperature, max_tokens, etc.
     
     # Results
     count_generated = Column(Integer, default=0)
@@ -256,9 +310,13 @@ class AIQuestionGeneration(Base):
     institute = relationship("Institute")
     subject = relationship("Subject")
     topic = relationship("Topic")
-    generated_questions = relationship("Question", 
-                                     primaryjoin="AIQuestionGeneration.id == foreign(Question.generation_metadata['generation_id'].astext.cast(UUID))",
-                                     viewonly=True)
+    generated_questions = relationship("Question", back_populates="generation")
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_ai_question_generations_parameters', 'generation_parameters',
+              postgresql_using='gin', postgresql_ops={'generation_parameters': 'jsonb_path_ops'}),
+    )
     
     def __repr__(self):
         return f"<AIQuestionGeneration(id={self.id}, status={self.status}, count={self.count_generated})>"
@@ -268,13 +326,13 @@ class QuestionFeedback(Base):
     """Feedback on questions for quality improvement"""
     __tablename__ = "question_feedback"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     # Feedback details
     feedback_type = Column(String(50), nullable=False)  # quality, difficulty, clarity, etc.
-    rating = Column(Integer)  # 1-5 rating
+    rating = Column(SmallInteger)  # 1-5 rating
     comment = Column(Text)
     
     # Specific issues
@@ -291,5 +349,142 @@ class QuestionFeedback(Base):
     question = relationship("Question")
     user = relationship("User")
     
+    __table_args__ = (
+        CheckConstraint('rating BETWEEN 1 AND 5', name='rating_range'),
+    )
+    
     def __repr__(self):
         return f"<QuestionFeedback(question_id={self.question_id}, rating={self.rating})>"
+
+
+# Enum values as frozensets, so validating a raw string is a single hash lookup
+QUESTION_TYPES = frozenset(member.value for member in QuestionType)
+DIFFICULTY_LEVELS = frozenset(member.value for member in DifficultyLevel)
+QUESTION_STATUSES = frozenset(member.value for member in QuestionStatus)
+
+
+def is_valid_question_type(value: str) -> bool:
+    return value in QUESTION_TYPES
+
+
+def is_valid_difficulty_level(value: str) -> bool:
+    return value in DIFFICULTY_LEVELS
+
+
+def is_valid_question_status(value: str) -> bool:
+    return value in QUESTION_STATUSES
+
+
+def record_question_usage(session, question_id, correct: bool, elapsed: float):
+    """
+    Count one answer to a question with a single atomic UPDATE, folding the
+    answer time into the running average without loading the row
+    """
+    session.execute(
+        update(Question.__table__).where(Question.id == question_id).values(
+            times_used=Question.times_used + 1,
+            times_correct=Question.times_correct + (1 if correct else 0),
+            average_time_taken=(
+                Question.average_time_taken * Question.times_used + elapsed
+            ) / (Question.times_used + 1)
+        )
+    )
+
+
+def add_questions_to_bank(session, question_bank_id, question_ids: Sequence, added_by=None) -> int:
+    """
+    Link questions to a bank in one INSERT and bump its question count atomically
+    (questions already in the bank violate the (bank, question) primary key)
+    """
+    question_ids = list(question_ids)
+    if not question_ids:
+        return 0
+    
+    session.execute(insert(QuestionBankQuestion), [
+        {"question_bank_id": question_bank_id, "question_id": question_id, "added_by": added_by}
+        for question_id in question_ids
+    ])
+    session.execute(
+        update(QuestionBank.__table__).where(QuestionBank.id == question_bank_id).values(
+            total_questions=QuestionBank.total_questions + len(question_ids)
+        )
+    )
+    return len(question_ids)
+
+
+# Statement builders for hot question listings. lambda_stmt caches the
+# constructed and compiled statement per call site; only the bound values
+# (subject_id, limit) are re-extracted on each call.
+def approved_by_subject(subject_id, limit: int):
+    """
+    Newest approved questions of a subject. idx_q_active_approved narrows the
+    rows, but its difficulty_level column sits before created_at, so the
+    matches are sorted rather than read in index order.
+    """
+    return lambda_stmt(
+        lambda: select(Question)
+        .where(Question.status == QuestionStatus.APPROVED.value)
+        .where(Question.subject_id == subject_id)
+        .order_by(Question.created_at.desc())
+        .limit(limit)
+    )
+
+
+def classification_labels(connection, subject_id, topic_id=None) -> Dict[str, Optional[str]]:
+    """Denormalized subject/topic label columns for a question in the given subject and topic"""
+    subject = connection.execute(
+        select(Subject.code, Subject.name).where(Subject.id == subject_id)
+    ).first()
+    topic_name = connection.execute(
+        select(Topic.name).where(Topic.id == topic_id)
+    ).scalar() if topic_id else None
+    return {
+        "subject_code": subject.code if subject else None,
+        "subject_name": subject.name if subject else None,
+        "topic_name": topic_name
+    }
+
+
+def _copy_classification_labels(connection, question: Question, changed_only: bool):
+    """Fill the denormalized subject/topic labels from the referenced rows"""
+    state = inspect(question)
+    if changed_only and not (
+        state.attrs.subject_id.history.has_changes() or state.attrs.topic_id.history.has_changes()
+    ):
+        return
+    for key, value in classification_labels(connection, question.subject_id, question.topic_id).items():
+        setattr(question, key, value)
+
+
+materialized_path(Subject, parent_key="parent_subject_id")
+
+
+@event.listens_for(Question, "before_insert")
+def _question_before_insert(mapper, connection, question):
+    _copy_classification_labels(connection, question, changed_only=False)
+
+
+@event.listens_for(Question, "before_update")
+def _question_before_update(mapper, connection, question):
+    _copy_classification_labels(connection, question, changed_only=True)
+
+
+@event.listens_for(Subject, "after_update")
+def _subject_after_update(mapper, connection, subject):
+    """Push renamed subject labels down to its questions"""
+    state = inspect(subject)
+    if state.attrs.code.history.has_changes() or state.attrs.name.history.has_changes():
+        connection.execute(
+            update(Question.__table__).where(Question.subject_id == subject.id)
+            .values(subject_code=subject.code, subject_name=subject.name)
+        )
+
+
+@event.listens_for(Topic, "after_update")
+def _topic_after_update(mapper, connection, topic):
+    """Push a renamed topic down to its questions"""
+    if inspect(topic).attrs.name.history.has_changes():
+        connection.execute(
+            update(Question.__table__).where(Question.topic_id == topic.id)
+            .values(topic_name=topic.name)
+        )
@@ -2,16 +2,18 @@
 School Education models for MEDHASAKTHI
 Comprehensive support for Indian school education system (Class 1-12)
 """
-import uuid
 from datetime import datetime, date
 from enum import Enum
+from typing import Optional
 from sqlalchemy import (
-    Column, String, Text, Boolean, DateTime, Integer, 
-    Float, JSON, ForeignKey, func, Index
+    Column, String, Text, Boolean, DateTime, Integer, SmallInteger,
+    Float, ForeignKey, func, Index, event, inspect, select, text, update
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from app.core.database import Base
+from app.core.database import Base, JSONDocument, ValueEnum
+from app.core.hierarchy import materialized_path
+from app.core.ids import uuid7
 
 
 class EducationBoard(str, Enum):
@@ -92,7 +94,7 @@ class SchoolSubject(Base):
     """School subjects for different classes and boards"""
     __tablename__ = "school_subjects"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Subject identification
     name = Column(String(100), nullable=False)
@@ -100,9 +102,10 @@ class SchoolSubject(Base):
     display_name = Column(String(150))
     
     # Classification
-    education_board = Column(String(50), nullable=False, index=True)
-    class_level = Column(String(20), nullable=False, index=True)
-    education_level = Column(String(30), nullable=False, index=True)
+    education_board = Column(ValueEnum(EducationBoard, 'education_board'), nullable=False, index=True)
+    class_level = Column(ValueEnum(ClassLevel, 'class_level'), nullable=False, index=True)
+    class_level_num = Column(SmallInteger)  # 1-12, mirrors class_level for range filters
+    education_level = Column(ValueEnum(EducationLevel, 'school_education_level'), nullable=False, index=True)
     
     # Subject details
     is_core_subject = Column(Boolean, default=True)
@@ -111,22 +114,22 @@ class SchoolSubject(Base):
     subject_category = Column(String(50))  # Science, Mathematics, Language, Social_Science, etc.
     
     # Stream association (for Class 11-12)
-    applicable_streams = Column(JSON)  # List of streams where this subject is available
+    applicable_streams = Column(JSONDocument)  # List of streams where this subject is available
     
     # Curriculum details
-    syllabus_outline = Column(JSON)  # Detailed syllabus structure
-    learning_objectives = Column(JSON)  # Learning outcomes
-    assessment_pattern = Column(JSON)  # How the subject is assessed
+    syllabus_outline = Column(JSONDocument)  # Detailed syllabus structure
+    learning_objectives = Column(JSONDocument)  # Learning outcomes
+    assessment_pattern = Column(JSONDocument)  # How the subject is assessed
     
     # Prerequisites and progression
-    prerequisite_subjects = Column(JSON)  # Required previous subjects
-    next_level_subjects = Column(JSON)  # What subjects this leads to
+    prerequisite_subjects = Column(JSONDocument)  # Required previous subjects
+    next_level_subjects = Column(JSONDocument)  # What subjects this leads to
     
     # Practical/Theory components
     has_practical = Column(Boolean, default=False)
-    theory_marks = Column(Integer)
-    practical_marks = Column(Integer)
-    internal_assessment_marks = Column(Integer)
+    theory_marks = Column(SmallInteger)
+    practical_marks = Column(SmallInteger)
+    internal_assessment_marks = Column(SmallInteger)
     
     # Status
     is_active = Column(Boolean, default=True, index=True)
@@ -136,13 +139,14 @@ class SchoolSubject(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    topics = relationship("SchoolTopic", back_populates="subject")
+    topics = relationship("SchoolTopic", back_populates="subject", lazy="raise_on_sql")
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_school_subject_board_class', 'education_board', 'class_level'),
+        Index('idx_school_subject_board_class', 'education_board', 'class_level_num'),
         Index('idx_school_subject_level_category', 'education_level', 'subject_category'),
         Index('idx_school_subject_core_optional', 'is_core_subject', 'is_optional'),
+        Index('idx_ss_active', 'education_board', 'class_level', postgresql_where=text('is_active')),
     )
     
     def __repr__(self):
@@ -153,7 +157,7 @@ class SchoolTopic(Base):
     """Topics within school subjects"""
     __tablename__ = "school_topics"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Topic identification
     name = Column(String(200), nullable=False)
@@ -163,29 +167,31 @@ class SchoolTopic(Base):
     # Hierarchy
     subject_id = Column(UUID(as_uuid=True), ForeignKey("school_subjects.id"), nullable=False)
     parent_topic_id = Column(UUID(as_uuid=True), ForeignKey("school_topics.id"))
-    level = Column(Integer, default=0)  # 0=main topic, 1=subtopic, etc.
-    sequence_order = Column(Integer, default=0)
+    level = Column(SmallInteger, default=0)  # 0=main topic, 1=subtopic, etc.
+    path = Column(Text)  # Topic codes from the subject's root topic down (see app.core.hierarchy)
+    class_level_num = Column(SmallInteger, index=True)  # Copied from the subject
+    sequence_order = Column(SmallInteger, default=0)
     
     # Content details
     description = Column(Text)
-    learning_objectives = Column(JSON)
-    key_concepts = Column(JSON)
+    learning_objectives = Column(JSONDocument)
+    key_concepts = Column(JSONDocument)
     difficulty_level = Column(String(20), default="intermediate")
     
     # Time allocation
     estimated_hours = Column(Float)
-    weightage_percentage = Column(Float)  # Weightage in exams
+    weightage_percentage = Column(Float(precision=24))  # Weightage in exams (REAL)
     
     # Prerequisites
-    prerequisite_topics = Column(JSON)  # Required previous topics
+    prerequisite_topics = Column(JSONDocument)  # Required previous topics
     
     # Assessment
-    assessment_methods = Column(JSON)  # How this topic is assessed
-    sample_questions = Column(JSON)  # Sample question types
+    assessment_methods = Column(JSONDocument)  # How this topic is assessed
+    sample_questions = Column(JSONDocument)  # Sample question types
     
     # Resources
-    reference_materials = Column(JSON)  # Books, videos, etc.
-    practical_activities = Column(JSON)  # Hands-on activities
+    reference_materials = Column(JSONDocument)  # Books, videos, etc.
+    practical_activities = Column(JSONDocument)  # Hands-on activities
     
     # Status
     is_active = Column(Boolean, default=True, index=True)
@@ -195,15 +201,17 @@ class SchoolTopic(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    subject = relationship("SchoolSubject", back_populates="topics")
-    parent_topic = relationship("SchoolTopic", remote_side=[id])
-    subtopics = relationship("SchoolTopic", back_populates="parent_topic")
+    # (never lazy loaded; topic trees are fetched with selectinload)
+    subject = relationship("SchoolSubject", back_populates="topics", lazy="raise_on_sql")
+    parent_topic = relationship("SchoolTopic", remote_side=[id], back_populates="subtopics", lazy="raise_on_sql")
+    subtopics = relationship("SchoolTopic", back_populates="parent_topic", lazy="raise_on_sql")
     
     # Indexes
     __table_args__ = (
         Index('idx_school_topic_subject_level', 'subject_id', 'level'),
         Index('idx_school_topic_sequence', 'subject_id', 'sequence_order'),
         Index('idx_school_topic_difficulty', 'difficulty_level', 'weightage_percentage'),
+        Index('idx_school_topic_path', 'subject_id', 'path', postgresql_ops={'path': 'text_pattern_ops'}),
     )
     
     def __repr__(self):
@@ -214,38 +222,39 @@ class SchoolCurriculum(Base):
     """Curriculum structure for different boards and classes"""
     __tablename__ = "school_curricula"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Curriculum identification
     name = Column(String(200), nullable=False)
     code = Column(String(50), nullable=False, unique=True)
     
     # Classification
-    education_board = Column(String(50), nullable=False, index=True)
-    class_level = Column(String(20), nullable=False, index=True)
+    education_board = Column(ValueEnum(EducationBoard, 'education_board'), nullable=False, index=True)
+    class_level = Column(ValueEnum(ClassLevel, 'class_level'), nullable=False, index=True)
+    class_level_num = Column(SmallInteger)  # 1-12, mirrors class_level for range filters
     academic_year = Column(String(20), nullable=False, index=True)
     
     # Stream (for Class 11-12)
-    stream = Column(String(30))
+    stream = Column(ValueEnum(Stream, 'stream'))
     
     # Curriculum details
     description = Column(Text)
-    objectives = Column(JSON)
-    learning_outcomes = Column(JSON)
+    objectives = Column(JSONDocument)
+    learning_outcomes = Column(JSONDocument)
     
     # Subject structure
-    core_subjects = Column(JSON)  # List of mandatory subjects
-    optional_subjects = Column(JSON)  # List of optional subjects
-    co_curricular_subjects = Column(JSON)  # Art, Music, PE, etc.
+    core_subjects = Column(JSONDocument)  # List of mandatory subjects
+    optional_subjects = Column(JSONDocument)  # List of optional subjects
+    co_curricular_subjects = Column(JSONDocument)  # Art, Music, PE, etc.
     
     # Assessment structure
-    assessment_pattern = Column(JSON)  # How students are assessed
-    grading_system = Column(JSON)  # Grading scale and criteria
-    promotion_criteria = Column(JSON)  # Requirements to move to next class
+    assessment_pattern = Column(JSONDocument)  # How students are assessed
+    grading_system = Column(JSONDocument)  # Grading scale and criteria
+    promotion_criteria = Column(JSONDocument)  # Requirements to move to next class
     
     # Time allocation
     total_teaching_hours = Column(Integer)
-    subject_wise_hours = Column(JSON)  # Hours allocated to each subject
+    subject_wise_hours = Column(JSONDocument)  # Hours allocated to each subject
     
     # Examination details
     internal_assessment_weightage = Column(Float)
@@ -254,7 +263,7 @@ class SchoolCurriculum(Base):
     
     # Board exam information (for Class 10, 12)
     has_board_exam = Column(Boolean, default=False)
-    board_exam_pattern = Column(JSON)
+    board_exam_pattern = Column(JSONDocument)
     
     # Status and versioning
     version = Column(String(20), default="1.0")
@@ -274,9 +283,11 @@ class SchoolCurriculum(Base):
     
     # Indexes
     __table_args__ = (
-        Index('idx_curriculum_board_class_year', 'education_board', 'class_level', 'academic_year'),
+        Index('idx_curriculum_board_class_year', 'education_board', 'class_level_num', 'academic_year'),
         Index('idx_curriculum_stream_current', 'stream', 'is_current'),
         Index('idx_curriculum_board_exam', 'has_board_exam', 'education_board'),
+        Index('idx_sc_current', 'education_board', 'class_level', 'academic_year',
+              postgresql_where=text('is_current AND is_active')),
     )
     
     def __repr__(self):
@@ -287,7 +298,7 @@ class SchoolAcademicYear(Base):
     """Academic year configuration for schools"""
     __tablename__ = "school_academic_years"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Academic year identification
     year_code = Column(String(20), nullable=False, unique=True, index=True)  # e.g., "2024-25"
@@ -298,13 +309,13 @@ class SchoolAcademicYear(Base):
     end_date = Column(Date, nullable=False)
     
     # Term structure
-    term_structure = Column(JSON)  # Details about terms/semesters
+    term_structure = Column(JSONDocument)  # Details about terms/semesters
     
     # Important dates
     admission_start_date = Column(Date)
     admission_end_date = Column(Date)
-    exam_schedule = Column(JSON)  # Schedule of various exams
-    holiday_calendar = Column(JSON)  # List of holidays
+    exam_schedule = Column(JSONDocument)  # Schedule of various exams
+    holiday_calendar = Column(JSONDocument)  # List of holidays
     
     # Status
     is_current = Column(Boolean, default=False, index=True)
@@ -314,6 +325,12 @@ class SchoolAcademicYear(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # At most one academic year can be current
+    __table_args__ = (
+        Index('idx_say_current', 'is_current', unique=True,
+              postgresql_where=text('is_current'), sqlite_where=text('is_current')),
+    )
+    
     def __repr__(self):
         return f"<SchoolAcademicYear(year_code={self.year_code}, is_current={self.is_current})>"
 
@@ -322,23 +339,23 @@ class SchoolGradingSystem(Base):
     """Grading systems for different boards"""
     __tablename__ = "school_grading_systems"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # System identification
     name = Column(String(100), nullable=False)
     code = Column(String(50), nullable=False)
     
     # Board and class applicability
-    education_board = Column(String(50), nullable=False, index=True)
-    applicable_classes = Column(JSON)  # List of classes where this system applies
+    education_board = Column(ValueEnum(EducationBoard, 'education_board'), nullable=False, index=True)
+    applicable_classes = Column(JSONDocument)  # List of classes where this system applies
     
     # Grading structure
-    grading_scale = Column(JSON)  # Grade boundaries and descriptions
-    grade_points = Column(JSON)  # Grade point values
+    grading_scale = Column(JSONDocument)  # Grade boundaries and descriptions
+    grade_points = Column(JSONDocument)  # Grade point values
     
     # Calculation method
     calculation_method = Column(String(50))  # percentage, cgpa, etc.
-    passing_criteria = Column(JSON)  # Minimum requirements to pass
+    passing_criteria = Column(JSONDocument)  # Minimum requirements to pass
     
     # Status
     is_active = Column(Boolean, default=True, index=True)
@@ -349,3 +366,65 @@ class SchoolGradingSystem(Base):
     
     def __repr__(self):
         return f"<SchoolGradingSystem(name={self.name}, board={self.education_board})>"
+
+
+# Topic codes are only unique within a subject, so paths are scoped to it
+materialized_path(SchoolTopic, parent_key="parent_topic_id", scope_key="subject_id")
+
+
+# Enum values as frozensets, so validating a raw string is a single hash lookup
+EDUCATION_BOARDS = frozenset(member.value for member in EducationBoard)
+CLASS_LEVELS = frozenset(member.value for member in ClassLevel)
+
+
+def is_valid_education_board(value: str) -> bool:
+    return value in EDUCATION_BOARDS
+
+
+def is_valid_class_level(value: str) -> bool:
+    return value in CLASS_LEVELS
+
+
+# Class levels as integers, so "class 6 to 10" is a BETWEEN on class_level_num
+CLASS_LEVEL_NUMBERS = {member.value: int(member.value.rsplit("_", 1)[1]) for member in ClassLevel}
+
+
+def class_level_number(class_level: Optional[str]) -> Optional[int]:
+    return CLASS_LEVEL_NUMBERS.get(class_level)
+
+
+def _set_class_level_num(mapper, connection, target):
+    if inspect(target).attrs.class_level.history.has_changes():
+        target.class_level_num = class_level_number(target.class_level)
+
+
+for _model in (SchoolSubject, SchoolCurriculum):
+    event.listen(_model, "before_insert", _set_class_level_num)
+    event.listen(_model, "before_update", _set_class_level_num)
+
+
+def _copy_subject_class_level(connection, topic: SchoolTopic):
+    topic.class_level_num = connection.execute(
+        select(SchoolSubject.class_level_num).where(SchoolSubject.id == topic.subject_id)
+    ).scalar()
+
+
+@event.listens_for(SchoolTopic, "before_insert")
+def _topic_before_insert(mapper, connection, topic):
+    _copy_subject_class_level(connection, topic)
+
+
+@event.listens_for(SchoolTopic, "before_update")
+def _topic_before_update(mapper, connection, topic):
+    if inspect(topic).attrs.subject_id.history.has_changes():
+        _copy_subject_class_level(connection, topic)
+
+
+@event.listens_for(SchoolSubject, "after_update")
+def _subject_after_update(mapper, connection, subject):
+    """Push a changed class level down to the subject's topics"""
+    if inspect(subject).attrs.class_level.history.has_changes():
+        connection.execute(
+            update(SchoolTopic.__table__).where(SchoolTopic.subject_id == subject.id)
+            .values(class_level_num=subject.class_level_num)
+        )
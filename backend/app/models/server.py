@@ -3,7 +3,7 @@ Server Model for Dynamic Load Balancing
 Stores information about servers in the load balancer pool
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -26,7 +26,7 @@ class Server(Base):
     fail_timeout = Column(Integer, default=30)  # seconds
     
     # Status and metadata
-    status = Column(String(20), default='active', index=True)  # 'active', 'inactive', 'maintenance'
+    status = Column(String(20), default='active')  # 'active', 'inactive', 'maintenance'
     region = Column(String(50), nullable=True)
     availability_zone = Column(String(50), nullable=True)
     instance_type = Column(String(50), nullable=True)
@@ -69,6 +69,12 @@ class Server(Base):
     added_by_user = relationship("User", foreign_keys=[added_by], back_populates="added_servers")
     removed_by_user = relationship("User", foreign_keys=[removed_by], back_populates="removed_servers")
     
+    # Indexes for performance
+    # (the load balancer and auto-scaler look up active servers by type)
+    __table_args__ = (
+        Index('idx_servers_active_type', 'server_type', postgresql_where=text("status = 'active'")),
+    )
+    
     def __repr__(self):
         return f"<Server(hostname='{self.hostname}', ip='{self.ip_address}', type='{self.server_type}', status='{self.status}')>"
     
@@ -158,6 +164,11 @@ class ServerMetrics(Base):
     # Relationship
     server = relationship("Server", back_populates="metrics")
     
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_server_metrics_server_time', 'server_id', 'recorded_at'),
+    )
+    
     def __repr__(self):
         return f"<ServerMetrics(server_id={self.server_id}, recorded_at='{self.recorded_at}')>"
 
@@ -253,6 +264,11 @@ class ServerMetrics(Base):
     # Relationship
     server = relationship("Server", back_populates="metrics")
 
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_server_metrics_server_time', 'server_id', 'recorded_at'),
+    )
+
     def __repr__(self):
         return f"<ServerMetrics(server_id={self.server_id}, recorded_at={self.recorded_at})>"
 
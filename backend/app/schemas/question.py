@@ -95,6 +95,9 @@ class QuestionResponseSchema(BaseModel):
     subject_id: str
     topic_id: Optional[str]
     grade_level: Optional[str]
+    subject_code: Optional[str] = None
+    subject_name: Optional[str] = None
+    topic_name: Optional[str] = None
     
     options: Optional[List[Dict[str, Any]]]
     correct_answer: Optional[str]
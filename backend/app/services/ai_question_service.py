@@ -4,7 +4,9 @@ AI-powered question generation service
 import json
 import time
 import asyncio
+import logging
 from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 import openai
@@ -14,13 +16,17 @@ import requests
 from app.core.config import settings
 from app.models.question import (
     Question, Subject, Topic, AIQuestionGeneration,
-    QuestionType, DifficultyLevel, QuestionStatus
+    QuestionType, DifficultyLevel, QuestionStatus, classification_labels,
+    is_valid_question_type, is_valid_difficulty_level
 )
+from app.core.ids import uuid7
 from app.models.user import User
 from app.utils.comprehensive_subjects import get_pharmacy_specific_prompts, get_subject_specific_question_types
 from app.utils.indian_education_system import INDIAN_EDUCATION_SYSTEM, INDIAN_STATE_BOARDS, INDIAN_ENTRANCE_EXAMS
 from app.utils.professional_certifications import PROFESSIONAL_CERTIFICATIONS, INDUSTRY_SKILLS
 
+logger = logging.getLogger(__name__)
+
 
 class AIQuestionGenerator:
     """AI-powered question generation service"""
@@ -362,6 +368,8 @@ class AIQuestionGenerator:
                     )
                     
                     if question_data:
+                        if generation_record:
+                            question_data["generation_id"] = str(generation_record.id)
                         questions.append(question_data)
                     
                 except Exception as e:
@@ -645,36 +653,64 @@ class AIQuestionGenerator:
     ) -> Tuple[bool, str, List[str]]:
         """Save generated questions to database"""
         try:
-            saved_question_ids = []
-            
-            for question_data in questions_data:
-                question = Question(
-                    question_text=question_data["question_text"],
-                    question_type=question_data["question_type"],
-                    difficulty_level=question_data["difficulty_level"],
-                    subject_id=question_data["subject_id"],
-                    topic_id=question_data.get("topic_id"),
-                    grade_level=question_data.get("grade_level"),
-                    options=question_data.get("options"),
-                    correct_answer=question_data.get("correct_answer"),
-                    explanation=question_data.get("explanation"),
-                    hints=question_data.get("hints"),
-                    keywords=question_data.get("keywords", []),
-                    ai_generated=question_data.get("ai_generated", True),
-                    ai_model_used=question_data.get("ai_model_used"),
-                    generation_prompt=question_data.get("generation_prompt"),
-                    generation_metadata=question_data.get("generation_metadata", {}),
-                    status=question_data.get("status", QuestionStatus.PENDING_REVIEW.value),
-                    created_by=created_by
-                )
+            # Generated questions share a handful of subject/topic pairs, so their
+            # denormalized labels are looked up once per pair (the bulk INSERT
+            # below skips the per-object ORM listeners that normally fill them)
+            labels = {}
+            rows = []
+            skipped = 0
+            for index, question_data in enumerate(questions_data):
+                # One bad enum value would fail the whole batched INSERT, so
+                # malformed AI output is dropped up front (and reported)
+                if not (is_valid_question_type(question_data["question_type"])
+                        and is_valid_difficulty_level(question_data["difficulty_level"])):
+                    skipped += 1
+                    logger.warning(
+                        f"Skipping generated question {index + 1}: invalid question_type "
+                        f"{question_data['question_type']!r} or difficulty_level "
+                        f"{question_data['difficulty_level']!r}"
+                    )
+                    continue
+                
+                classification = (question_data["subject_id"], question_data.get("topic_id"))
+                if classification not in labels:
+                    labels[classification] = classification_labels(db, *classification)
                 
-                db.add(question)
-                db.flush()  # Get the ID
-                saved_question_ids.append(str(question.id))
+                rows.append({
+                    "id": uuid7(),
+                    "question_text": question_data["question_text"],
+                    "question_type": question_data["question_type"],
+                    "difficulty_level": question_data["difficulty_level"],
+                    "subject_id": question_data["subject_id"],
+                    "topic_id": question_data.get("topic_id"),
+                    "grade_level": question_data.get("grade_level"),
+                    "options": question_data.get("options"),
+                    "correct_answer": question_data.get("correct_answer"),
+                    "explanation": question_data.get("explanation"),
+                    "hints": question_data.get("hints"),
+                    "keywords": question_data.get("keywords", []),
+                    "ai_generated": question_data.get("ai_generated", True),
+                    "ai_model_used": question_data.get("ai_model_used"),
+                    "generation_prompt": question_data.get("generation_prompt"),
+                    "generation_metadata": question_data.get("generation_metadata", {}),
+                    "generation_id": question_data.get("generation_id"),
+                    "status": question_data.get("status", QuestionStatus.PENDING_REVIEW.value),
+                    "created_by": created_by,
+                    **labels[classification]
+                })
             
+            # One executemany INSERT for the whole batch; ids are generated
+            # client-side so nothing has to be returned per row
+            if rows:
+                db.execute(insert(Question), rows)
             db.commit()
             
-            return True, f"Successfully saved {len(saved_question_ids)} questions", saved_question_ids
+            saved_question_ids = [str(row["id"]) for row in rows]
+            
+            message = f"Successfully saved {len(saved_question_ids)} questions"
+            if skipped:
+                message += f" ({skipped} skipped with an invalid question type or difficulty level)"
+            return True, message, saved_question_ids
             
         except Exception as e:
             db.rollback()
@@ -59,6 +59,32 @@ class CertificateGenerationService:
     ) -> Tuple[bool, str, Optional[Certificate]]:
         """Generate a single certificate"""
         
+        try:
+            success, message, certificate = await self._build_certificate(
+                certificate_data, template_id, db
+            )
+            if not success:
+                return False, message, None
+            
+            # Save to database
+            if db:
+                db.add(certificate)
+                db.commit()
+                db.refresh(certificate)
+            
+            return True, "Certificate generated successfully", certificate
+            
+        except Exception as e:
+            return False, f"Error generating certificate: {str(e)}", None
+    
+    async def _build_certificate(
+        self,
+        certificate_data: Dict[str, Any],
+        template_id: Optional[str],
+        db: Session
+    ) -> Tuple[bool, str, Optional[Certificate]]:
+        """Create a certificate and its PDF without persisting the certificate"""
+        
         try:
             # Get or create template
             template = await self._get_or_create_template(
@@ -110,12 +136,6 @@ class CertificateGenerationService:
             certificate.status = CertificateStatus.GENERATED
             certificate.issued_at = datetime.now(timezone.utc)
             
-            # Save to database
-            if db:
-                db.add(certificate)
-                db.commit()
-                db.refresh(certificate)
-            
             return True, "Certificate generated successfully", certificate
             
         except Exception as e:
@@ -149,7 +169,7 @@ class CertificateGenerationService:
         
         for i, cert_data in enumerate(certificates_data):
             try:
-                success, message, certificate = await self.generate_single_certificate(
+                success, message, certificate = await self._build_certificate(
                     cert_data, template_id, db
                 )
                 
@@ -166,13 +186,25 @@ class CertificateGenerationService:
         processing_time = (end_time - start_time).total_seconds()
         
         if db and generation:
+            # Insert the whole batch and the generation result in one transaction;
+            # Certificate doesn't fetch server defaults eagerly, so rows go out
+            # as batched executemany INSERTs rather than one RETURNING per row
+            db.add_all(generated_certificates)
             generation.certificates_generated = len(generated_certificates)
             generation.certificates_failed = len(errors)
             generation.processing_time = processing_time
             generation.status = "completed" if not errors else "partial"
             generation.completed_at = end_time
             generation.error_details = {"errors": errors} if errors else None
+            db.flush()
+            # Ids are read before commit expires the instances; reading them
+            # afterwards would refresh each certificate with its own SELECT
+            certificate_ids = [certificate.id for certificate in generated_certificates]
             db.commit()
+            
+            # Reload the committed certificates with one query instead of one per row
+            if certificate_ids:
+                db.query(Certificate).filter(Certificate.id.in_(certificate_ids)).all()
         
         success_message = f"Generated {len(generated_certificates)} certificates"
         if errors:
@@ -5,9 +5,10 @@ Handles registration, pricing, and certification for individual learners
 import uuid
 import random
 import string
+from dataclasses import dataclass
 from typing import Dict, List, Any, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func, desc, tuple_, table, column, text, select
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta, date
 from decimal import Decimal
@@ -21,8 +22,62 @@ from app.models.pricing_config import (
     GlobalPricingConfig, ProgramPricingOverride, DiscountCoupon, CouponUsage
 )
 from app.core.security import get_password_hash
+from app.core.pricing_cache import pricing_cache
 from app.services.email_service import email_service
 
+# Shared Decimal constants for the pricing path
+ZERO = Decimal('0')
+ONE = Decimal('1')
+
+# Per-program daily revenue, refreshed by the scheduler (created alongside
+# independent_exam_registrations, see app.models.independent_learner)
+program_revenue_mv = table(
+    "program_revenue_mv",
+    column("program_id"), column("day"), column("revenue"), column("registrations")
+)
+# Advisory lock key held while one worker refreshes program_revenue_mv
+PROGRAM_REVENUE_REFRESH_LOCK = 7_210_501
+
+
+@dataclass(slots=True, frozen=True)
+class RegistrationRow:
+    """Read-only registration projection for list views (no ORM hydration)"""
+    id: Any
+    registration_number: str
+    program_id: Any
+    program_title: str
+    program_code: str
+    program_category: Optional[str]
+    registration_date: datetime
+    exam_date: Optional[date]
+    exam_time: Optional[str]
+    exam_center: Optional[str]
+    amount_paid: Decimal
+    payment_status: Optional[str]
+    status: Optional[str]
+    attempt_number: Optional[int]
+    score_obtained: Optional[int]
+    percentage: Optional[Decimal]
+    result: Optional[str]
+    grade: Optional[str]
+
+
+@dataclass(slots=True, frozen=True)
+class CertificateRow:
+    """Read-only certificate projection for list views (no ORM hydration)"""
+    id: Any
+    certificate_number: str
+    program_title: str
+    program_code: str
+    issue_date: date
+    expiry_date: Optional[date]
+    score_achieved: Optional[int]
+    grade_obtained: Optional[str]
+    verification_code: str
+    certificate_url: Optional[str]
+    status: Optional[str]
+    is_verified: Optional[bool]
+
 
 class IndependentLearnerService:
     """Service for independent learner operations"""
@@ -269,10 +324,14 @@ class IndependentLearnerService:
         
         programs = query.order_by(CertificationProgram.is_featured.desc()).all()
         
+        # Pricing inputs are loaded once for the whole listing, not per program
+        pricing_context = self._load_pricing_context(learner_id, db)
+        program_overrides = self._load_program_overrides([program.id for program in programs], db)
+        
         programs_data = []
         for program in programs:
             # Calculate pricing for the learner
-            pricing = self.calculate_program_pricing(program.id, learner_id, db)
+            pricing = self._price_program(program, pricing_context, program_overrides.get(program.id))
             
             programs_data.append({
                 "id": str(program.id),
@@ -325,74 +384,101 @@ class IndependentLearnerService:
                 detail="Program not found"
             )
         
+        pricing_context = self._load_pricing_context(learner_id, db)
+        program_overrides = self._load_program_overrides([program.id], db)
+        
+        return self._price_program(program, pricing_context, program_overrides.get(program.id))
+    
+    def _load_pricing_context(self, learner_id: Optional[str], db: Session) -> Dict[str, Any]:
+        """Load the pricing inputs shared by every program: global config, learner category and auto-apply coupons"""
+        
         # Get global pricing config
-        global_config = db.query(GlobalPricingConfig).filter(
-            GlobalPricingConfig.is_active == True,
-            GlobalPricingConfig.approval_status == "active"
-        ).order_by(GlobalPricingConfig.created_at.desc()).first()
+        global_config = pricing_cache.get_active_config(db)
         
+        context = {
+            "global_config": global_config,
+            "learner_category": None,
+            "learner_multiplier": ONE,
+            "coupons": []
+        }
         if not global_config:
-            # Fallback to program base price
-            return {
-                "base_price": float(program.base_price),
-                "final_price": float(program.base_price),
-                "currency": program.currency,
-                "discounts": [],
-                "total_discount": 0
-            }
-        
-        # Start with program base price or global base price
-        base_price = program.base_price or global_config.base_exam_fee
+            return context
         
         # Get learner category for pricing
-        learner_multiplier = 1.0
-        learner_category = None
-        
         if learner_id:
-            learner = db.query(IndependentLearner).filter(
+            learner_category = db.query(IndependentLearner.category).filter(
                 IndependentLearner.learner_id == learner_id
-            ).first()
+            ).scalar()
             
-            if learner:
-                learner_category = learner.category
+            if learner_category:
+                context["learner_category"] = learner_category
                 
                 # Apply category-based multiplier
-                if learner.category == LearnerCategory.SCHOOL_STUDENT:
-                    learner_multiplier = float(global_config.student_multiplier)
-                elif learner.category == LearnerCategory.WORKING_PROFESSIONAL:
-                    learner_multiplier = float(global_config.professional_multiplier)
+                if learner_category == LearnerCategory.SCHOOL_STUDENT:
+                    context["learner_multiplier"] = global_config.student_multiplier
+                elif learner_category == LearnerCategory.WORKING_PROFESSIONAL:
+                    context["learner_multiplier"] = global_config.professional_multiplier
                 # Add more category mappings as needed
         
-        # Calculate category-adjusted price
-        category_price = base_price * Decimal(str(learner_multiplier))
+        # Check for applicable coupons
+        context["coupons"] = pricing_cache.get_auto_apply_coupons(db)
         
-        # Check for program-specific overrides
-        program_override = db.query(ProgramPricingOverride).filter(
-            ProgramPricingOverride.program_id == program_id,
+        return context
+    
+    def _load_program_overrides(self, program_ids: List[Any], db: Session) -> Dict[Any, ProgramPricingOverride]:
+        """Load the currently valid pricing override (first match) for each of the given programs"""
+        
+        overrides = db.query(ProgramPricingOverride).filter(
+            ProgramPricingOverride.program_id.in_(program_ids),
             ProgramPricingOverride.is_active == True,
             ProgramPricingOverride.valid_from <= datetime.utcnow(),
             or_(
                 ProgramPricingOverride.valid_until.is_(None),
                 ProgramPricingOverride.valid_until >= datetime.utcnow()
             )
-        ).first()
+        ).all()
+        
+        program_overrides = {}
+        for override in overrides:
+            program_overrides.setdefault(override.program_id, override)
+        return program_overrides
+    
+    def _price_program(
+        self,
+        program: CertificationProgram,
+        pricing_context: Dict[str, Any],
+        program_override: Optional[ProgramPricingOverride]
+    ) -> Dict[str, Any]:
+        """Price one program from preloaded inputs (no database access)"""
+        
+        global_config = pricing_context["global_config"]
+        if not global_config:
+            # Fallback to program base price
+            return {
+                "base_price": float(program.base_price),
+                "final_price": float(program.base_price),
+                "currency": program.currency,
+                "discounts": [],
+                "total_discount": 0
+            }
+        
+        # Start with program base price or global base price
+        base_price = program.base_price or global_config.base_exam_fee
+        learner_category = pricing_context["learner_category"]
+        learner_multiplier = pricing_context["learner_multiplier"]
+        
+        # Calculate category-adjusted price (the multiplier is already a Decimal)
+        category_price = base_price * learner_multiplier
         
+        # Check for program-specific overrides
         if program_override and program_override.custom_base_price:
             category_price = program_override.custom_base_price
         
         # Apply available discounts
         discounts = []
-        total_discount = Decimal('0')
-        
-        # Check for applicable coupons
-        applicable_coupons = db.query(DiscountCoupon).filter(
-            DiscountCoupon.is_active == True,
-            DiscountCoupon.valid_from <= datetime.utcnow(),
-            DiscountCoupon.valid_until >= datetime.utcnow(),
-            DiscountCoupon.is_auto_apply == True
-        ).all()
+        total_discount = ZERO
         
-        for coupon in applicable_coupons:
+        for coupon in pricing_context["coupons"]:
             # Check if coupon is applicable to this program/category
             if self._is_coupon_applicable(coupon, program, learner_category):
                 discount_amount = self._calculate_coupon_discount(coupon, category_price)
@@ -406,7 +492,7 @@ class IndependentLearnerService:
                     total_discount += discount_amount
         
         # Calculate final price
-        final_price = max(category_price - total_discount, Decimal('0'))
+        final_price = max(category_price - total_discount, ZERO)
         
         return {
             "base_price": float(base_price),
@@ -414,7 +500,7 @@ class IndependentLearnerService:
             "final_price": float(final_price),
             "currency": program.currency,
             "learner_category": learner_category.value if learner_category else None,
-            "category_multiplier": learner_multiplier,
+            "category_multiplier": float(learner_multiplier),
             "discounts": discounts,
             "total_discount": float(total_discount),
             "retake_fee": float(program.retake_fee) if program.retake_fee else float(global_config.base_retake_fee)
@@ -433,17 +519,14 @@ class IndependentLearnerService:
             if learner_category.value not in coupon.applicable_categories:
                 return False
         
-        # Check usage limits
-        if coupon.total_usage_limit and coupon.current_usage_count >= coupon.total_usage_limit:
-            return False
-        
+        # (exhausted coupons were already dropped when the coupon cache loaded)
         return True
     
     def _calculate_coupon_discount(self, coupon: DiscountCoupon, price: Decimal) -> Decimal:
         """Calculate discount amount from coupon"""
         
         if coupon.min_order_amount and price < coupon.min_order_amount:
-            return Decimal('0')
+            return ZERO
         
         if coupon.discount_type == "percentage":
             discount = price * (coupon.discount_value / 100)
@@ -453,7 +536,70 @@ class IndependentLearnerService:
         elif coupon.discount_type == "fixed_amount":
             return min(coupon.discount_value, price)
         
-        return Decimal('0')
+        return ZERO
+    
+    def get_registration_rows(
+        self,
+        learner_pk: Any,
+        registration_status: Optional[str],
+        db: Session
+    ) -> List[RegistrationRow]:
+        """List a learner's registrations (newest first) as plain row projections"""
+        
+        query = select(
+            IndependentExamRegistration.id,
+            IndependentExamRegistration.registration_number,
+            CertificationProgram.id,
+            CertificationProgram.title,
+            CertificationProgram.program_code,
+            CertificationProgram.category,
+            IndependentExamRegistration.registration_date,
+            IndependentExamRegistration.exam_date,
+            IndependentExamRegistration.exam_time,
+            IndependentExamRegistration.exam_center,
+            IndependentExamRegistration.amount_paid,
+            IndependentExamRegistration.payment_status,
+            IndependentExamRegistration.status,
+            IndependentExamRegistration.attempt_number,
+            IndependentExamRegistration.score_obtained,
+            IndependentExamRegistration.percentage,
+            IndependentExamRegistration.result,
+            IndependentExamRegistration.grade
+        ).join(
+            CertificationProgram, IndependentExamRegistration.program_id == CertificationProgram.id
+        ).where(
+            IndependentExamRegistration.learner_id == learner_pk
+        )
+        
+        if registration_status:
+            query = query.where(IndependentExamRegistration.status == registration_status)
+        
+        query = query.order_by(IndependentExamRegistration.created_at.desc())
+        return [RegistrationRow(*row) for row in db.execute(query)]
+    
+    def get_certificate_rows(self, learner_pk: Any, db: Session) -> List[CertificateRow]:
+        """List a learner's certificates (latest issue first) as plain row projections"""
+        
+        query = select(
+            IndependentCertificate.id,
+            IndependentCertificate.certificate_number,
+            IndependentCertificate.program_title,
+            CertificationProgram.program_code,
+            IndependentCertificate.issue_date,
+            IndependentCertificate.expiry_date,
+            IndependentCertificate.score_achieved,
+            IndependentCertificate.grade_obtained,
+            IndependentCertificate.verification_code,
+            IndependentCertificate.certificate_url,
+            IndependentCertificate.status,
+            IndependentCertificate.is_verified
+        ).join(
+            CertificationProgram, IndependentCertificate.program_id == CertificationProgram.id
+        ).where(
+            IndependentCertificate.learner_id == learner_pk
+        ).order_by(IndependentCertificate.issue_date.desc())
+        
+        return [CertificateRow(*row) for row in db.execute(query)]
     
     def get_learner_dashboard(self, learner_id: str, db: Session) -> Dict[str, Any]:
         """Get dashboard data for independent learner"""
@@ -484,12 +630,16 @@ class IndependentLearnerService:
         ).count()
         
         # Get recent activities
-        recent_registrations = db.query(IndependentExamRegistration).filter(
+        recent_registrations = db.query(IndependentExamRegistration).options(
+            joinedload(IndependentExamRegistration.program)
+        ).filter(
             IndependentExamRegistration.learner_id == learner.id
         ).order_by(IndependentExamRegistration.created_at.desc()).limit(5).all()
         
         # Get upcoming exams
-        upcoming_exams = db.query(IndependentExamRegistration).filter(
+        upcoming_exams = db.query(IndependentExamRegistration).options(
+            joinedload(IndependentExamRegistration.program)
+        ).filter(
             IndependentExamRegistration.learner_id == learner.id,
             IndependentExamRegistration.exam_date >= date.today(),
             IndependentExamRegistration.status == "registered"
@@ -610,6 +760,7 @@ class PricingManagementService:
 
             db.add(new_config)
             db.commit()
+            pricing_cache.invalidate()
 
             return {
                 "success": True,
@@ -685,6 +836,7 @@ class PricingManagementService:
 
             db.add(coupon)
             db.commit()
+            pricing_cache.invalidate()
 
             return {
                 "success": True,
@@ -754,6 +906,98 @@ class PricingManagementService:
             }
         }
 
+    def generate_revenue_report(self, start_dt: datetime, end_dt: datetime, db: Session) -> Dict[str, Any]:
+        """Aggregate successful payments in the period into every revenue breakdown at once
+
+        One GROUPING SETS query scans independent_payments a single time; the
+        grouping() bitmask tells which breakdown (or the grand total) a row belongs to.
+        """
+
+        dimensions = {
+            "countries": IndependentLearner.country,
+            "states": IndependentLearner.state,
+            "cities": IndependentLearner.city,
+            "gateways": IndependentPayment.gateway,
+            "payment_methods": IndependentPayment.payment_method,
+            "payment_types": IndependentPayment.payment_type,
+        }
+        columns = list(dimensions.values())
+
+        rows = db.query(
+            func.grouping(*columns),
+            *columns,
+            func.sum(IndependentPayment.amount),
+            func.count(IndependentPayment.id)
+        ).join(
+            IndependentLearner, IndependentPayment.learner_id == IndependentLearner.id
+        ).filter(
+            IndependentPayment.completed_at >= start_dt,
+            IndependentPayment.completed_at <= end_dt,
+            IndependentPayment.status == "success"
+        ).group_by(
+            func.grouping_sets(*[tuple_(dimension) for dimension in columns], tuple_())
+        ).all()
+
+        # grouping() sets a bit for every column *not* grouped in that row
+        all_bits = (1 << len(columns)) - 1
+        breakdown_by_mask = {
+            all_bits ^ (1 << (len(columns) - 1 - position)): (name, position)
+            for position, name in enumerate(dimensions)
+        }
+
+        breakdown = {name: {} for name in dimensions}
+        total_revenue = 0.0
+        total_transactions = 0
+        for mask, *values in rows:
+            amount, count = float(values[-2] or 0), values[-1]
+            if mask == all_bits:
+                total_revenue, total_transactions = amount, count
+                continue
+            name, position = breakdown_by_mask[mask]
+            breakdown[name][values[position] or "unknown"] = amount
+
+        # Program revenue comes from the precomputed daily view, not a fresh aggregate
+        program_rows = db.query(
+            CertificationProgram.title,
+            func.sum(program_revenue_mv.c.revenue).label("revenue"),
+            func.sum(program_revenue_mv.c.registrations).label("registrations")
+        ).join(
+            program_revenue_mv, program_revenue_mv.c.program_id == CertificationProgram.id
+        ).filter(
+            program_revenue_mv.c.day >= func.date_trunc("day", start_dt),
+            program_revenue_mv.c.day <= end_dt
+        ).group_by(CertificationProgram.id, CertificationProgram.title).order_by(desc("revenue")).all()
+
+        breakdown["programs"] = {title: float(revenue or 0) for title, revenue, _ in program_rows}
+
+        return {
+            "summary": {
+                "total_revenue": total_revenue,
+                "total_transactions": total_transactions,
+                "average_transaction_value": round(total_revenue / total_transactions, 2) if total_transactions > 0 else 0
+            },
+            "breakdown": breakdown,
+            "top_performing_programs": [
+                {"title": title, "revenue": float(revenue or 0), "registrations": int(registrations or 0)}
+                for title, revenue, registrations in program_rows[:10]
+            ]
+        }
+
+    def refresh_program_revenue_view(self, db: Session) -> bool:
+        """
+        Refresh program_revenue_mv without blocking readers. Every worker runs
+        the refresh loop, so a transaction-scoped advisory lock lets one of
+        them refresh and the others skip; returns whether this call refreshed.
+        """
+
+        acquired = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PROGRAM_REVENUE_REFRESH_LOCK}
+        ).scalar()
+        if acquired:
+            db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY program_revenue_mv"))
+        db.commit()
+        return bool(acquired)
+
 
 # Global instance
 pricing_management_service = PricingManagementService()
@@ -0,0 +1,142 @@
+"""
+Payment webhook ingestion for MEDHASAKTHI
+Coalesces payment records that arrive within a short window and writes
+each window with one executemany INSERT over the asyncpg engine
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import get_async_session_factory
+from app.models.independent_learner import IndependentPayment
+
+logger = logging.getLogger(__name__)
+
+# Records arriving within this many seconds of the first one share an INSERT
+PAYMENT_FLUSH_WINDOW = 0.05
+PAYMENT_BATCH_SIZE = 500
+PAYMENT_QUEUE_SIZE = 10000
+
+
+def _column_default(column) -> Callable[[], Any]:
+    """Zero-argument factory for a column's Python-side default (None if it has none)"""
+    default = column.default
+    if default is None:
+        return lambda: None
+    if default.is_callable:
+        return lambda: default.arg(None)
+    return lambda: default.arg
+
+
+# Columns every queued payment is normalized to, so all rows in a window share
+# one VALUES shape. Server-generated columns (timestamps) are left to the database.
+PAYMENT_COLUMN_DEFAULTS = {
+    column.key: _column_default(column)
+    for column in IndependentPayment.__table__.columns
+    if column.server_default is None
+}
+
+
+def normalize_payment(payment_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a payment record with exactly the PAYMENT_COLUMN_DEFAULTS keys,
+    filling missing columns with their model default
+    """
+    unknown = payment_data.keys() - PAYMENT_COLUMN_DEFAULTS.keys()
+    if unknown:
+        raise ValueError(f"Unknown payment columns: {', '.join(sorted(unknown))}")
+    return {
+        key: payment_data[key] if key in payment_data else default()
+        for key, default in PAYMENT_COLUMN_DEFAULTS.items()
+    }
+
+
+def _settle(done: asyncio.Future, error: Optional[Exception] = None):
+    """Resolve a submitter's future unless it was already cancelled"""
+    if done.done():
+        return
+    if error is None:
+        done.set_result(None)
+    else:
+        done.set_exception(error)
+
+
+async def record_payment(batch: List[Dict[str, Any]]):
+    """
+    Insert a batch of IndependentPayment rows (dicts keyed by column name) in
+    one transaction. Gateways retry webhooks, so rows whose payment_id is
+    already stored are skipped rather than failing the whole batch.
+    """
+    statement = insert(IndependentPayment).on_conflict_do_nothing(index_elements=["payment_id"])
+    async with get_async_session_factory()() as session:
+        async with session.begin():
+            await session.execute(statement, batch)
+
+
+class PaymentBatcher:
+    """Queues payment records and flushes them to the database in small time windows"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=PAYMENT_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+
+    async def submit(self, payment_data: Dict[str, Any]):
+        """
+        Queue one payment record and wait until its batch is committed,
+        so a webhook is only acknowledged once the payment is stored
+        """
+        payment_data = normalize_payment(payment_data)
+        if self.writer is None or self.writer.done():
+            self.writer = asyncio.create_task(self._flush_loop())
+
+        done = asyncio.get_running_loop().create_future()
+        await self.queue.put((payment_data, done))
+        await done
+
+    async def _collect_batch(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        """Wait for one record, then take whatever else arrives within the flush window"""
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + PAYMENT_FLUSH_WINDOW
+        while len(batch) < PAYMENT_BATCH_SIZE:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush_loop(self):
+        """Write queued payments batch by batch, resolving each submitter's future"""
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await record_payment([payment_data for payment_data, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    logger.error(f"Failed to record payment {batch[0][0]['payment_id']}: {e}")
+                    _settle(batch[0][1], e)
+                    continue
+                logger.warning(f"Failed to record {len(batch)} payments together, retrying one by one: {e}")
+                await self._record_each(batch)
+            else:
+                for _, done in batch:
+                    _settle(done)
+
+    async def _record_each(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Write a failed batch row by row, so only the rows that fail again report an error"""
+        for payment_data, done in batch:
+            try:
+                await record_payment([payment_data])
+            except Exception as e:
+                logger.error(f"Failed to record payment {payment_data['payment_id']}: {e}")
+                _settle(done, e)
+            else:
+                _settle(done)
+
+
+# Global instance
+payment_batcher = PaymentBatcher()
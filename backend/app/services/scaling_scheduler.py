@@ -27,6 +27,7 @@ class ScalingScheduler:
         self.metrics_collection_interval = getattr(settings, 'METRICS_COLLECTION_INTERVAL_SECONDS', 60)
         self.scaling_check_interval = getattr(settings, 'SCALING_CHECK_INTERVAL_SECONDS', 300)  # 5 minutes
         self.cleanup_interval = getattr(settings, 'CLEANUP_INTERVAL_SECONDS', 3600)  # 1 hour
+        self.revenue_view_refresh_interval = getattr(settings, 'REVENUE_VIEW_REFRESH_INTERVAL_SECONDS', 300)  # 5 minutes
         
     async def start(self):
         """Start the background scheduler"""
@@ -42,7 +43,8 @@ class ScalingScheduler:
             asyncio.create_task(self._health_check_loop()),
             asyncio.create_task(self._metrics_collection_loop()),
             asyncio.create_task(self._scaling_check_loop()),
-            asyncio.create_task(self._cleanup_loop())
+            asyncio.create_task(self._cleanup_loop()),
+            asyncio.create_task(self._revenue_view_refresh_loop())
         ]
         
         logger.info("Scaling scheduler started successfully")
@@ -106,6 +108,8 @@ class ScalingScheduler:
         while self.running:
             try:
                 await self._perform_cleanup()
+                await self._sweep_websocket_connections()
+                await self._ensure_table_partitions()
                 await asyncio.sleep(self.cleanup_interval)
             except asyncio.CancelledError:
                 break
@@ -113,6 +117,35 @@ class ScalingScheduler:
                 logger.error(f"Error in cleanup loop: {e}")
                 await asyncio.sleep(self.cleanup_interval)
     
+    async def _revenue_view_refresh_loop(self):
+        """Periodic refresh of the precomputed program revenue view"""
+        while self.running:
+            try:
+                await self._refresh_revenue_view()
+                await asyncio.sleep(self.revenue_view_refresh_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in revenue view refresh loop: {e}")
+                await asyncio.sleep(self.revenue_view_refresh_interval)
+    
+    async def _refresh_revenue_view(self):
+        """Refresh program_revenue_mv used by revenue reports"""
+        # The refresh is a blocking psycopg2 call that can take a while, so it
+        # runs on a worker thread instead of stalling the event loop
+        await asyncio.to_thread(self._refresh_revenue_view_blocking)
+    
+    def _refresh_revenue_view_blocking(self):
+        db = next(get_db())
+        try:
+            from app.services.independent_learner_service import pricing_management_service
+            pricing_management_service.refresh_program_revenue_view(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error refreshing program revenue view: {e}")
+        finally:
+            db.close()
+    
     async def _perform_health_checks(self):
         """Perform health checks on all active servers"""
         try:
@@ -310,6 +343,26 @@ class ScalingScheduler:
         finally:
             db.close()
     
+    async def _sweep_websocket_connections(self):
+        """Drop WebSocket bookkeeping for connections that closed without disconnect()"""
+        try:
+            from app.core.websocket_manager import connection_manager
+            await connection_manager.sweep_stale_connections()
+        except Exception as e:
+            logger.error(f"Error sweeping WebSocket connections: {e}")
+    
+    async def _ensure_table_partitions(self):
+        """Create upcoming monthly partitions for partitioned log tables"""
+        db = next(get_db())
+        try:
+            from app.core.partitioning import ensure_monthly_partitions
+            ensure_monthly_partitions(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error creating table partitions: {e}")
+        finally:
+            db.close()
+    
     async def get_status(self) -> Dict:
         """Get scheduler status"""
         return {
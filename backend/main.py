@@ -402,5 +402,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8080,
         reload=settings.DEBUG,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        ws_per_message_deflate=False
     )
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+WebSocket Fan-out Micro-benchmark for MEDHASAKTHI
+Measures single-recipient send latency, room/broadcast fan-out latency and
+bulk notification throughput of the in-process ConnectionManager.
+
+The fan-out path is memory/IO-bound, so use these numbers to check that a
+change actually reduces bytes moved or awaits per recipient before merging it.
+
+Usage: python scripts/benchmark_websocket_fanout.py [--recipients 1000] [--rounds 20]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+
+from app.core import websocket_manager
+from app.core.websocket_manager import ConnectionManager, NotificationManager
+
+
+class BenchWebSocket:
+    """Minimal in-memory stand-in for a Starlette WebSocket"""
+
+    def __init__(self, subprotocols=None):
+        self.scope = {"subprotocols": subprotocols or []}
+        self.client_state = WebSocketState.CONNECTED
+        self.bytes_sent = 0
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_text(self, data: str):
+        self.bytes_sent += len(data.encode())
+        await asyncio.sleep(0)
+
+    async def send_bytes(self, data: bytes):
+        self.bytes_sent += len(data)
+        await asyncio.sleep(0)
+
+    async def close(self, code: int = 1000, reason: str = None):
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+async def _connect_clients(manager: ConnectionManager, count: int, subprotocols=None):
+    clients = []
+    for i in range(count):
+        websocket = BenchWebSocket(subprotocols)
+        await manager.connect(websocket, f"user-{i}")
+        clients.append(websocket)
+    return clients
+
+
+def _report(name: str, samples):
+    samples_ms = [s * 1000 for s in samples]
+    print(
+        f"{name:<32} median {statistics.median(samples_ms):8.3f} ms"
+        f"  p95 {sorted(samples_ms)[int(len(samples_ms) * 0.95) - 1]:8.3f} ms"
+    )
+
+
+async def bench_single_recipient(rounds: int):
+    """(a) one personal message to one socket"""
+    manager = ConnectionManager()
+    websocket, = await _connect_clients(manager, 1)
+    message = {"type": "pong", "timestamp": time.time()}
+
+    samples = []
+    for _ in range(rounds * 100):
+        start = time.perf_counter()
+        await manager.send_personal_message(message, websocket)
+        samples.append(time.perf_counter() - start)
+    _report("single recipient send", samples)
+
+
+async def bench_broadcast(recipients: int, rounds: int, subprotocols=None, label="text"):
+    """(b) one announcement fanned out to every connected socket"""
+    manager = ConnectionManager()
+    clients = await _connect_clients(manager, recipients, subprotocols)
+    message = {
+        "type": "system_announcement",
+        "title": "Scheduled maintenance",
+        "message": "The platform will be unavailable from 02:00 to 03:00 IST. " * 10,
+        "priority": "high",
+    }
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await manager.broadcast_to_all(message)
+        samples.append(time.perf_counter() - start)
+    _report(f"broadcast x{recipients} ({label})", samples)
+    print(f"{'':<32} bytes/recipient/round {clients[0].bytes_sent / rounds:8.0f}")
+
+
+async def bench_bulk_notification(recipients: int, rounds: int):
+    """(c) send_bulk_notification throughput (Redis replaced with a no-op mock)"""
+    websocket_manager.ws_redis = MagicMock()
+    manager = ConnectionManager()
+    notifications = NotificationManager(manager)
+    await _connect_clients(manager, recipients)
+    user_ids = [f"user-{i}" for i in range(recipients)]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await notifications.send_bulk_notification(
+            user_ids, "exam_reminder", "Exam tomorrow", "Your talent exam starts at 10:00"
+        )
+    elapsed = time.perf_counter() - start
+    print(f"{'bulk notification throughput':<32} {recipients * rounds / elapsed:10.0f} notifications/s")
+
+
+async def main(recipients: int, rounds: int):
+    print("📊 MEDHASAKTHI WebSocket fan-out benchmark")
+    print("=" * 60)
+    await bench_single_recipient(rounds)
+    await bench_broadcast(recipients, rounds)
+    await bench_broadcast(
+        recipients, rounds, [websocket_manager.BINARY_SUBPROTOCOL], label="binary"
+    )
+    await bench_broadcast(
+        recipients, rounds, [websocket_manager.PRECOMPRESSED_SUBPROTOCOL], label="deflate"
+    )
+    await bench_bulk_notification(recipients, rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket fan-out paths")
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.recipients, args.rounds))
@@ -0,0 +1,79 @@
+"""
+Unit tests for bulk certificate generation
+"""
+import secrets
+import uuid
+from functools import partial
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.certificate import Certificate, CertificateGeneration, CertificateTemplate
+from app.services.certificate_generation_service import certificate_generation_service
+
+
+class TestBulkCertificateGeneration:
+    """Test cases for generate_bulk_certificates"""
+
+    @pytest.fixture
+    def engine(self):
+        """In-memory SQLite engine with the certificate tables"""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        CertificateTemplate.metadata.create_all(engine, tables=[
+            CertificateTemplate.__table__, Certificate.__table__, CertificateGeneration.__table__
+        ])
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def db(self, engine):
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    def _certificate(self, index: int, template_id, institute_id) -> Certificate:
+        return Certificate(
+            certificate_number=f"CERT-{index:04d}",
+            verification_code=secrets.token_urlsafe(32),
+            title="Course Completion",
+            certificate_type="course_completion",
+            recipient_name=f"Learner {index}",
+            recipient_email=f"learner{index}@example.com",
+            institute_id=institute_id,
+            template_id=template_id
+        )
+
+    @pytest.mark.asyncio
+    async def test_bulk_generation_reloads_with_one_select(self, engine, db):
+        """Committed certificates are reloaded by one IN query, not one refresh per row"""
+        template_id, institute_id = uuid.uuid4(), uuid.uuid4()
+        certificates = [self._certificate(i, template_id, institute_id) for i in range(5)]
+
+        certificate_selects = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record_select(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("SELECT") and "\nFROM certificates" in statement:
+                certificate_selects.append(statement)
+
+        build = AsyncMock(side_effect=[(True, "ok", certificate) for certificate in certificates])
+        # The bulk path doesn't know the requesting user; fill the required columns
+        generation = partial(CertificateGeneration, requested_by=uuid.uuid4(), institute_id=institute_id)
+
+        with patch.object(certificate_generation_service, "_build_certificate", build), \
+                patch("app.services.certificate_generation_service.CertificateGeneration", generation):
+            success, message, generated, errors = await certificate_generation_service.generate_bulk_certificates(
+                [{} for _ in certificates], db=db
+            )
+
+        assert success
+        assert errors == []
+        assert len(generated) == 5
+        assert len(certificate_selects) == 1
+        assert " IN " in certificate_selects[0]
+        assert db.query(Certificate).count() == 5
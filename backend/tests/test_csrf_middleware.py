@@ -0,0 +1,47 @@
+"""
+Unit tests for the CSRF protection middleware
+"""
+import pytest
+from fastapi import FastAPI, Form
+from fastapi.testclient import TestClient
+
+from app.middleware.csrf_middleware import csrf_middleware, csrf_protection
+
+
+class TestCSRFFormPosts:
+    """Test cases for CSRF tokens submitted in urlencoded form bodies"""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.middleware("http")(csrf_middleware)
+
+        @app.post("/profile")
+        async def update_profile(name: str = Form(...), city: str = Form(...), csrf_token: str = Form(...)):
+            return {"name": name, "city": city}
+
+        with TestClient(app) as client:
+            yield client
+
+    def test_form_post_reaches_endpoint_with_its_fields(self, client):
+        """Reading the token from the body leaves the body intact for the endpoint"""
+        response = client.post("/profile", data={
+            "name": "Asha", "city": "Chennai", "csrf_token": csrf_protection.generate_token()
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {"name": "Asha", "city": "Chennai"}
+
+    def test_form_post_without_token_is_rejected(self, client):
+        response = client.post("/profile", data={"name": "Asha", "city": "Chennai"})
+
+        assert response.status_code == 403
+        assert response.json()["code"] == "CSRF_TOKEN_MISSING"
+
+    def test_form_post_with_forged_token_is_rejected(self, client):
+        response = client.post("/profile", data={
+            "name": "Asha", "city": "Chennai", "csrf_token": "v2:session:0:forged"
+        })
+
+        assert response.status_code == 403
+        assert response.json()["code"] == "CSRF_TOKEN_INVALID"
@@ -0,0 +1,87 @@
+"""
+Unit tests for materialized-path hierarchies
+"""
+import pytest
+from sqlalchemy import Column, ForeignKey, Integer, String, Text, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.core.hierarchy import descendants_filter, materialized_path
+
+TreeBase = declarative_base()
+
+
+class Node(TreeBase):
+    """Minimal self-referencing tree, scoped like school topics"""
+    __tablename__ = "nodes"
+
+    id = Column(Integer, primary_key=True)
+    code = Column(String(20), nullable=False)
+    parent_id = Column(Integer, ForeignKey("nodes.id"))
+    tree_id = Column(Integer, nullable=False)
+    path = Column(Text)
+
+
+materialized_path(Node, parent_key="parent_id", scope_key="tree_id")
+
+
+class TestMaterializedPath:
+    """Test cases for the path listeners and descendants_filter"""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite://")
+        TreeBase.metadata.create_all(engine)
+        with Session(engine) as session:
+            yield session
+        engine.dispose()
+
+    def _add(self, db, node_id, code, parent_id=None, tree_id=1) -> Node:
+        node = Node(id=node_id, code=code, parent_id=parent_id, tree_id=tree_id)
+        db.add(node)
+        db.flush()
+        return node
+
+    def _paths(self, db):
+        db.expire_all()
+        return {node.id: node.path for node in db.query(Node)}
+
+    def test_paths_follow_parent_chain(self, db):
+        self._add(db, 1, "SCI")
+        self._add(db, 2, "PHY", parent_id=1)
+        self._add(db, 3, "MECH", parent_id=2)
+
+        assert self._paths(db) == {1: "SCI", 2: "SCI/PHY", 3: "SCI/PHY/MECH"}
+
+    def test_reparenting_rewrites_descendant_paths(self, db):
+        self._add(db, 1, "SCI")
+        self._add(db, 2, "MATH")
+        physics = self._add(db, 3, "PHY", parent_id=1)
+        self._add(db, 4, "MECH", parent_id=3)
+        self._add(db, 5, "STATICS", parent_id=4)
+        # Same codes in another tree must not be touched
+        self._add(db, 6, "SCI", tree_id=2)
+        self._add(db, 7, "PHY", parent_id=6, tree_id=2)
+        self._add(db, 8, "MECH", parent_id=7, tree_id=2)
+
+        physics.parent_id = 2
+        db.flush()
+
+        assert self._paths(db) == {
+            1: "SCI", 2: "MATH", 3: "MATH/PHY", 4: "MATH/PHY/MECH", 5: "MATH/PHY/MECH/STATICS",
+            6: "SCI", 7: "SCI/PHY", 8: "SCI/PHY/MECH"
+        }
+
+    def test_descendants_filter_matches_whole_segments(self, db):
+        self._add(db, 1, "PHY")
+        self._add(db, 2, "MECH", parent_id=1)
+        self._add(db, 3, "OPTICS", parent_id=1)
+        self._add(db, 4, "PHY_LAB")
+        self._add(db, 5, "BENCH", parent_id=4)
+
+        descendants = db.query(Node.id).filter(descendants_filter(Node, "PHY")).order_by(Node.id)
+
+        assert [node_id for node_id, in descendants] == [2, 3]
+
+    def test_code_with_separator_is_rejected(self, db):
+        with pytest.raises(ValueError):
+            self._add(db, 1, "A/B")
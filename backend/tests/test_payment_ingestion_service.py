@@ -0,0 +1,136 @@
+"""
+Unit tests for batched payment ingestion
+"""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.models.independent_learner import IndependentPayment
+from app.services.payment_ingestion_service import PaymentBatcher, normalize_payment, record_payment
+
+
+class SyncBackedAsyncSession:
+    """Just enough of AsyncSession for record_payment, running on a sync SQLite session"""
+
+    def __init__(self, engine):
+        self.session = Session(engine)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.session.close()
+
+    @asynccontextmanager
+    async def begin(self):
+        with self.session.begin():
+            yield
+
+    async def execute(self, statement, params=None):
+        return self.session.execute(statement, params)
+
+
+class TestPaymentIngestion:
+    """Test cases for record_payment and PaymentBatcher"""
+
+    @pytest.fixture
+    def engine(self):
+        """In-memory SQLite engine with the payments table"""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        IndependentPayment.metadata.create_all(engine, tables=[IndependentPayment.__table__])
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def session_factory(self, engine):
+        """Patch the asyncpg session factory with one backed by the SQLite engine"""
+        with patch(
+            "app.services.payment_ingestion_service.get_async_session_factory",
+            return_value=lambda: SyncBackedAsyncSession(engine)
+        ):
+            yield
+
+    def _payment(self, payment_id: str, learner_id) -> dict:
+        return {
+            "learner_id": learner_id,
+            "payment_id": payment_id,
+            "amount": Decimal("499.00"),
+            "status": "success"
+        }
+
+    def _stored_payment_ids(self, engine):
+        with Session(engine) as session:
+            return sorted(session.execute(select(IndependentPayment.payment_id)).scalars())
+
+    @pytest.mark.asyncio
+    async def test_duplicate_in_batch_is_skipped(self, engine, session_factory):
+        """A retried webhook's payment_id doesn't fail the rest of the batch"""
+        learner_id = uuid.uuid4()
+        await record_payment([
+            self._payment("pay_1", learner_id),
+            self._payment("pay_2", learner_id),
+            self._payment("pay_1", learner_id)
+        ])
+
+        assert self._stored_payment_ids(engine) == ["pay_1", "pay_2"]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_of_stored_payment_resolves_every_submitter(self, engine, session_factory):
+        """Submitters sharing a window with a duplicate all get their payment acknowledged"""
+        learner_id = uuid.uuid4()
+        await record_payment([self._payment("pay_1", learner_id)])
+
+        batcher = PaymentBatcher()
+        results = await asyncio.gather(
+            batcher.submit(self._payment("pay_1", learner_id)),
+            batcher.submit(self._payment("pay_2", learner_id)),
+            batcher.submit(self._payment("pay_3", learner_id)),
+            return_exceptions=True
+        )
+        batcher.writer.cancel()
+
+        assert results == [None, None, None]
+        assert self._stored_payment_ids(engine) == ["pay_1", "pay_2", "pay_3"]
+
+    @pytest.mark.asyncio
+    async def test_bad_row_only_fails_its_own_submitter(self, engine, session_factory):
+        """A row the database rejects doesn't take the rest of its window down with it"""
+        learner_id = uuid.uuid4()
+        batcher = PaymentBatcher()
+        results = await asyncio.gather(
+            batcher.submit(self._payment("pay_1", learner_id)),
+            batcher.submit(self._payment("pay_bad", None)),  # learner_id is NOT NULL
+            batcher.submit({**self._payment("pay_2", learner_id), "gateway": "razorpay"}),
+            return_exceptions=True
+        )
+        batcher.writer.cancel()
+
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], IntegrityError)
+        assert self._stored_payment_ids(engine) == ["pay_1", "pay_2"]
+
+    def test_rows_are_normalized_to_one_column_set(self):
+        """Rows with different keys share a shape, missing columns taking the model defaults"""
+        learner_id = uuid.uuid4()
+        sparse = normalize_payment({"learner_id": learner_id, "payment_id": "pay_1", "amount": Decimal("1.00")})
+        full = normalize_payment({**self._payment("pay_2", learner_id), "gateway": "razorpay"})
+
+        assert sparse.keys() == full.keys()
+        assert sparse["status"] == "pending"
+        assert sparse["currency"] == "INR"
+        assert sparse["gateway"] is None
+        assert sparse["id"] != full["id"]
+
+    def test_unknown_column_is_rejected_at_submit(self):
+        with pytest.raises(ValueError):
+            normalize_payment({**self._payment("pay_1", uuid.uuid4()), "amount_paise": 49900})
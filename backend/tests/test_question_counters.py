@@ -0,0 +1,147 @@
+"""
+Unit tests for the atomic question usage and bank counters
+"""
+import uuid
+
+import pytest
+from sqlalchemy import (
+    CheckConstraint, Column, DateTime, Float, ForeignKey, Integer, MetaData, Table,
+    create_engine, event, select, text
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.question import add_questions_to_bank, record_question_usage
+
+# Just the columns the helpers touch (the full tables need PostgreSQL ARRAY types)
+counter_metadata = MetaData()
+
+questions = Table(
+    "questions", counter_metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("times_used", Integer, server_default=text("0")),
+    Column("times_correct", Integer, server_default=text("0")),
+    Column("average_time_taken", Float, server_default=text("0")),
+    Column("updated_at", DateTime),
+    CheckConstraint("times_correct <= times_used")
+)
+
+question_banks = Table(
+    "question_banks", counter_metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("total_questions", Integer, server_default=text("0")),
+    Column("updated_at", DateTime)
+)
+
+question_bank_questions = Table(
+    "question_bank_questions", counter_metadata,
+    Column("question_bank_id", UUID(as_uuid=True), ForeignKey("question_banks.id"), primary_key=True),
+    Column("question_id", UUID(as_uuid=True), ForeignKey("questions.id"), primary_key=True),
+    Column("added_at", DateTime),
+    Column("added_by", UUID(as_uuid=True))
+)
+
+
+class TestQuestionCounters:
+    """Test cases for record_question_usage and add_questions_to_bank"""
+
+    @pytest.fixture
+    def engine(self):
+        engine = create_engine("sqlite://")
+        counter_metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def statements(self, engine):
+        """SQL statements sent to the database, in order"""
+        executed = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement)
+
+        return executed
+
+    @pytest.fixture
+    def db(self, engine):
+        with Session(engine) as session:
+            yield session
+
+    def _question(self, db, **stats) -> uuid.UUID:
+        question_id = uuid.uuid4()
+        db.execute(questions.insert().values(id=question_id, **stats))
+        return question_id
+
+    def _bank(self, db) -> uuid.UUID:
+        bank_id = uuid.uuid4()
+        db.execute(question_banks.insert().values(id=bank_id))
+        return bank_id
+
+    def test_usage_is_one_update_without_reading_the_row(self, db, statements):
+        question_id = self._question(db)
+        statements.clear()
+
+        record_question_usage(db, question_id, correct=True, elapsed=12.0)
+
+        assert len(statements) == 1
+        assert statements[0].startswith("UPDATE questions SET")
+        assert "times_used=(questions.times_used + ?)" in statements[0]
+
+    def test_usage_counts_answers_and_averages_time(self, db):
+        question_id = self._question(db)
+
+        for correct, elapsed in [(True, 10.0), (False, 20.0), (True, 30.0)]:
+            record_question_usage(db, question_id, correct, elapsed)
+
+        stats = db.execute(
+            select(questions.c.times_used, questions.c.times_correct, questions.c.average_time_taken)
+        ).one()
+        assert stats == (3, 2, 20.0)
+
+    def test_usage_folds_into_existing_average(self, db):
+        question_id = self._question(db, times_used=4, times_correct=1, average_time_taken=10.0)
+
+        record_question_usage(db, question_id, correct=False, elapsed=20.0)
+
+        stats = db.execute(
+            select(questions.c.times_used, questions.c.times_correct, questions.c.average_time_taken)
+        ).one()
+        assert stats == (5, 1, 12.0)
+
+    def test_batch_links_questions_and_bumps_count(self, db, statements):
+        bank_id = self._bank(db)
+        first = [self._question(db) for _ in range(3)]
+        second = [self._question(db) for _ in range(2)]
+        statements.clear()
+
+        assert add_questions_to_bank(db, bank_id, first) == 3
+        assert add_questions_to_bank(db, bank_id, iter(second)) == 2
+
+        # One multi-row INSERT and one UPDATE per batch
+        assert [statement.split()[0] for statement in statements] == ["INSERT", "UPDATE"] * 2
+        linked = db.execute(
+            select(question_bank_questions.c.question_id).where(question_bank_questions.c.question_bank_id == bank_id)
+        ).scalars()
+        assert set(linked) == set(first + second)
+        assert db.execute(select(question_banks.c.total_questions)).scalar_one() == 5
+
+    def test_empty_batch_issues_no_statements(self, db, statements):
+        bank_id = self._bank(db)
+        statements.clear()
+
+        assert add_questions_to_bank(db, bank_id, []) == 0
+        assert statements == []
+
+    def test_question_already_in_bank_leaves_count_unchanged(self, db):
+        bank_id = self._bank(db)
+        question_id = self._question(db)
+        add_questions_to_bank(db, bank_id, [question_id])
+        db.commit()
+
+        with pytest.raises(IntegrityError):
+            add_questions_to_bank(db, bank_id, [question_id, self._question(db)])
+        db.rollback()
+
+        assert db.execute(select(question_banks.c.total_questions)).scalar_one() == 1
@@ -0,0 +1,65 @@
+"""
+Unit tests for pipelined Redis Lua scripts
+"""
+import pytest
+from redis.exceptions import NoScriptError
+
+from app.core.redis_scripts import PipelineScript
+
+
+class RecordingRedis:
+    """Just enough of an async Redis client to count round trips and model the script cache"""
+
+    def __init__(self):
+        self.loaded = set()
+        self.round_trips = []
+
+    def pipeline(self, transaction=True):
+        return RecordingPipeline(self)
+
+    async def script_load(self, script):
+        self.round_trips.append(["SCRIPT LOAD"])
+        self.loaded.add(PipelineScript(script).sha)
+
+
+class RecordingPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def evalsha(self, sha, numkeys, *keys_and_args):
+        self.commands.append((sha, list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:])))
+
+    async def execute(self):
+        self.client.round_trips.append(["EVALSHA"] * len(self.commands))
+        if any(sha not in self.client.loaded for sha, _, _ in self.commands):
+            raise NoScriptError("NOSCRIPT No matching script")
+        return [(keys, args) for _, keys, args in self.commands]
+
+
+class TestPipelineScript:
+    """Test cases for PipelineScript.run_batch"""
+
+    @pytest.fixture
+    def script(self):
+        return PipelineScript("return redis.call('INCR', KEYS[1])")
+
+    @pytest.mark.asyncio
+    async def test_cached_script_runs_batch_in_one_round_trip(self, script):
+        client = RecordingRedis()
+        client.loaded.add(script.sha)
+
+        results = await script.run_batch(client, [(["a"], [60]), (["b"], [30])])
+
+        assert results == [(["a"], [60]), (["b"], [30])]
+        assert client.round_trips == [["EVALSHA", "EVALSHA"]]
+
+    @pytest.mark.asyncio
+    async def test_missing_script_is_loaded_and_batch_replayed(self, script):
+        client = RecordingRedis()
+
+        results = await script.run_batch(client, [(["a"], [60])])
+        await script.run_batch(client, [(["a"], [60])])
+
+        assert results == [(["a"], [60])]
+        assert client.round_trips == [["EVALSHA"], ["SCRIPT LOAD"], ["EVALSHA"], ["EVALSHA"]]